@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,6 +16,51 @@ class Settings(BaseSettings):
 
     # Uploads:
     upload_dir: str = Field("/data/uploads", validation_alias="UPLOAD_DIR")
+    upload_max_bytes: int = Field(
+        10 * 1024 * 1024 * 1024, validation_alias="UPLOAD_MAX_BYTES"
+    )
+    upload_chunk_bytes: int = Field(1024 * 1024, validation_alias="UPLOAD_CHUNK_BYTES")
+    # Resumable uploads with no chunk for this long are deleted
+    upload_partial_ttl_seconds: int = Field(
+        24 * 3600, validation_alias="UPLOAD_PARTIAL_TTL_SECONDS"
+    )
+
+    # Ingestion:
+    ingest_chunk_rows: int = Field(10_000, validation_alias="INGEST_CHUNK_ROWS")
+    # "copy" streams rows with PostgreSQL COPY; "orm" is the portable fallback
+    ingest_loader: Literal["copy", "orm"] = Field(
+        "copy", validation_alias="INGEST_LOADER"
+    )
+    # Skip files and rows that were already ingested. Rows are compared on
+    # every canonical column, so repeated identical postings (also within one
+    # file) are loaded once, which changes counts and percentiles
+    ingest_dedup: bool = Field(True, validation_alias="INGEST_DEDUP")
+    # COPY each upload into a detached partition and build its indexes once,
+    # when attaching it to jobs at the end of the load
+    ingest_deferred_indexes: bool = Field(
+        True, validation_alias="INGEST_DEFERRED_INDEXES"
+    )
+    # Keep a columnar (Arrow IPC) copy of Excel uploads for re-reads
+    ingest_staging: bool = Field(False, validation_alias="INGEST_STAGING")
+    # Sharded mode: CSVs above the threshold are split across this many tasks
+    ingest_shards: int = Field(4, validation_alias="INGEST_SHARDS")
+    ingest_shard_min_bytes: int = Field(
+        64 * 1024 * 1024, validation_alias="INGEST_SHARD_MIN_BYTES"
+    )
+
+    # Analytics:
+    # Answer percentile endpoints from the salary rollups instead of scanning jobs
+    analytics_rollups: bool = Field(True, validation_alias="ANALYTICS_ROLLUPS")
+    # Seconds analytics results stay cached in Redis (0 disables the cache)
+    analytics_cache_ttl: int = Field(300, validation_alias="ANALYTICS_CACHE_TTL")
+    # "numpy" answers summary/compare from an in-process snapshot of jobs
+    analytics_engine: Literal["sql", "numpy"] = Field(
+        "sql", validation_alias="ANALYTICS_ENGINE"
+    )
+    # How often the snapshot checks for newly ingested rows
+    analytics_snapshot_check_seconds: float = Field(
+        1.0, validation_alias="ANALYTICS_SNAPSHOT_CHECK_SECONDS"
+    )
 
     # DB:
     db_host: str = Field("localhost", validation_alias="DB_HOST")
@@ -26,6 +71,19 @@ class Settings(BaseSettings):
     database_url_override: Optional[str] = Field(
         default=None, validation_alias="DATABASE_URL"
     )
+    # Log every statement (SQLAlchemy echo); slow for anything but debugging
+    db_echo: bool = Field(False, validation_alias="DB_ECHO")
+    # Statements slower than this are logged and counted (0 disables)
+    db_slow_query_ms: float = Field(500.0, validation_alias="DB_SLOW_QUERY_MS")
+
+    # Worker DB pool (one engine per Celery worker process):
+    worker_db_pool_size: int = Field(2, validation_alias="WORKER_DB_POOL_SIZE")
+    worker_db_max_overflow: int = Field(2, validation_alias="WORKER_DB_MAX_OVERFLOW")
+    worker_db_pool_recycle: int = Field(1800, validation_alias="WORKER_DB_POOL_RECYCLE")
+    worker_db_pool_timeout: int = Field(30, validation_alias="WORKER_DB_POOL_TIMEOUT")
+    # Prometheus metrics of each worker process on this port + its pool index
+    # (0 disables)
+    worker_metrics_port: int = Field(0, validation_alias="WORKER_METRICS_PORT")
 
     # Redis:
     redis_host: str = Field("redis", validation_alias="REDIS_HOST")
@@ -37,6 +95,16 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = Field(
         30, validation_alias="ACCESS_TOKEN_EXPIRE_MINUTES"
     )
+    # bcrypt runs on its own thread pool; up to workers + queue calls are in
+    # flight, later ones wait this long for a slot before getting a 503
+    auth_hash_workers: int = Field(4, validation_alias="AUTH_HASH_WORKERS")
+    auth_hash_queue: int = Field(32, validation_alias="AUTH_HASH_QUEUE")
+    auth_hash_wait_seconds: float = Field(
+        5.0, validation_alias="AUTH_HASH_WAIT_SECONDS"
+    )
+    # Verified tokens -> user, kept in process (0 disables either bound)
+    auth_user_cache_ttl: float = Field(60.0, validation_alias="AUTH_USER_CACHE_TTL")
+    auth_user_cache_size: int = Field(10_000, validation_alias="AUTH_USER_CACHE_SIZE")
 
     # CORS:
     cors_origins: str = Field(
@@ -0,0 +1,47 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Password hashing (see app.users.auth): time spent waiting for a thread of
+# the bcrypt pool, and calls turned away once its queue stayed full
+PASSWORD_HASH_WAIT = Histogram(
+    "skillora_password_hash_wait_seconds",
+    "Time a password hash or verification waited before running",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "skillora_password_hash_rejected_total",
+    "Password hashes or verifications rejected because the pool was saturated",
+    ["operation"],
+)
+
+# Requests, by route name (not raw path, which would explode cardinality)
+HTTP_REQUEST_SECONDS = Histogram(
+    "skillora_http_request_seconds",
+    "Time until the response started, by route",
+    ["method", "route", "status"],
+)
+
+# Database (see app.infrastructure.instrumentation). `engine` is "api" or
+# "worker"; `route` is the HTTP route name or Celery task the statement ran for
+DB_QUERY_SECONDS = Histogram(
+    "skillora_db_query_seconds",
+    "Statement execution time",
+    ["engine", "route", "operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_SLOW_QUERIES = Counter(
+    "skillora_db_slow_queries_total",
+    "Statements slower than DB_SLOW_QUERY_MS",
+    ["engine", "route"],
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "skillora_db_pool_wait_seconds",
+    "Time spent getting a connection from the pool (including connecting)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "skillora_db_pool_connections",
+    "Pooled connections by state",
+    ["engine", "state"],
+)
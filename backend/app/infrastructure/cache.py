@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+KEY_PREFIX = "skillora:analytics"
+
+# Bumped by the workers whenever jobs change; part of every cache key, so
+# entries computed before the bump are never read again (and expire by TTL).
+DATA_VERSION_KEY = f"{KEY_PREFIX}:data_version"
+
+# Bumped when rows disappear or show up below the highest id (purged or
+# attached partitions): copies of jobs must be reloaded, not just extended.
+RESET_VERSION_KEY = f"{KEY_PREFIX}:reset_version"
+
+_client: Optional[aioredis.Redis] = None
+_sync_client: Optional[redis.Redis] = None
+
+# Misses being computed in this process, by cache key (request coalescing)
+_inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+
+def get_client() -> aioredis.Redis:
+    global _client
+    if _client is None:
+        _client = aioredis.Redis.from_url(settings.redis_url)
+    return _client
+
+
+def get_sync_client() -> redis.Redis:
+    # For the workers, which aren't async
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.redis_url)
+    return _sync_client
+
+
+def cache_key(endpoint: str, params: Dict[str, Any], version: str) -> str:
+    """Key of a query result: unset filters are dropped and text is lower-cased
+    (every match mode is case-insensitive), so equivalent requests share it."""
+    normalized = {
+        k: v.lower() if isinstance(v, str) else v
+        for k, v in sorted(params.items())
+        if v not in (None, "")
+    }
+    digest = hashlib.sha1(json.dumps(normalized).encode()).hexdigest()
+    return f"{KEY_PREFIX}:{endpoint}:v{version}:{digest}"
+
+
+async def _compute_once(key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Run `compute` for `key` unless it's already running in this process.
+
+    If the request running it is cancelled (e.g. its client went away), the
+    requests waiting on it don't fail: one of them runs its own `compute`.
+    """
+    pending = _inflight.get(key)
+    if pending is not None:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise  # this request was cancelled, not the computation
+            return await _compute_once(key, compute)
+
+    future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        value = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as exc:
+        future.set_exception(exc)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        _inflight.pop(key, None)
+
+
+async def cached(
+    endpoint: str, params: Dict[str, Any], compute: Callable[[], Awaitable[Any]]
+) -> Any:
+    """Result of `compute` for these params, from Redis when fresh.
+
+    Misses are coalesced: concurrent identical requests in this process await
+    a single computation. If Redis is unavailable the query just runs.
+    """
+    ttl = settings.analytics_cache_ttl
+    if ttl <= 0:
+        return await compute()
+
+    client = get_client()
+    version = await get_data_version()
+    if version is None:
+        return await compute()
+    key = cache_key(endpoint, params, version)
+    try:
+        hit = await client.get(key)
+    except redis.RedisError:
+        return await compute()
+    if hit is not None:
+        return json.loads(hit)
+
+    async def _compute_and_store() -> Any:
+        value = await compute()
+        try:
+            await client.set(key, json.dumps(value), ex=ttl)
+        except redis.RedisError:
+            pass
+        return value
+
+    return await _compute_once(key, _compute_and_store)
+
+
+async def get_data_version() -> Optional[str]:
+    """Current data version, or None when Redis can't be reached."""
+    try:
+        return (await get_client().get(DATA_VERSION_KEY) or b"0").decode()
+    except redis.RedisError:
+        return None
+
+
+async def get_reset_version() -> Optional[str]:
+    """Current reset version, or None when Redis can't be reached."""
+    try:
+        return (await get_client().get(RESET_VERSION_KEY) or b"0").decode()
+    except redis.RedisError:
+        return None
+
+
+def bump_data_version(reset: bool = False) -> None:
+    """Invalidate every cached analytics result (called by the workers).
+
+    `reset` also tells in-process snapshots to reload from scratch.
+    """
+    client = get_sync_client()
+    if reset:
+        client.incr(RESET_VERSION_KEY)
+    client.incr(DATA_VERSION_KEY)
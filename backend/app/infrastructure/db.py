@@ -4,13 +4,20 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
+from app.infrastructure.instrumentation import TimedAsyncQueuePool, instrument_engine
 
 # Base class for all models:
 Base = declarative_base()
 
 # Create the async engine
 DATABASE_URL = settings.database_url
-engine = create_async_engine(DATABASE_URL, echo=settings.debug)
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.db_echo,
+    poolclass=TimedAsyncQueuePool,
+    pool_logging_name="api",
+)
+instrument_engine(engine.sync_engine, "api")
 
 async_session = async_sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
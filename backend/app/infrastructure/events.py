@@ -0,0 +1,46 @@
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import redis
+from redis.asyncio.client import PubSub
+
+from app.infrastructure.cache import get_client, get_sync_client
+
+# One pub/sub channel per task id
+CHANNEL_PREFIX = "skillora:tasks"
+
+
+def channel(task_id: str) -> str:
+    return f"{CHANNEL_PREFIX}:{task_id}"
+
+
+def publish(task_id: str, event: Dict[str, Any]) -> None:
+    """Send a task event to its listeners (called by the workers).
+
+    Best effort: nobody may be listening, and a Redis hiccup must not fail
+    the task; clients fall back to polling the task status.
+    """
+    try:
+        get_sync_client().publish(channel(task_id), json.dumps(event, default=str))
+    except redis.RedisError:
+        pass
+
+
+@asynccontextmanager
+async def subscription(task_id: str) -> AsyncIterator[PubSub]:
+    """Listen to the events of a task; subscribed once entered, so nothing
+    published afterwards is missed."""
+    pubsub = get_client().pubsub()
+    await pubsub.subscribe(channel(task_id))
+    try:
+        yield pubsub
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+
+
+async def next_event(pubsub: PubSub, timeout: float) -> Optional[Dict[str, Any]]:
+    """The next event of a subscription, or None after `timeout` seconds."""
+    msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+    return json.loads(msg["data"]) if msg else None
@@ -0,0 +1,147 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Union
+
+from prometheus_client import start_http_server
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CONNECTIONS,
+    DB_POOL_WAIT_SECONDS,
+    DB_QUERY_SECONDS,
+    DB_SLOW_QUERIES,
+    HTTP_REQUEST_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# What the current statements run for: the name of a Celery task, or the
+# scope of an HTTP request (its route is only known once routing has run)
+current_route: ContextVar[Union[str, Scope]] = ContextVar("current_route", default="-")
+
+
+def _route_name(scope: Scope) -> str:
+    # Route names (endpoint function names) are unique here and, unlike raw
+    # paths, bounded in number
+    return getattr(scope.get("route"), "name", None) or "unmatched"
+
+
+def route_label() -> str:
+    route = current_route.get()
+    return route if isinstance(route, str) else _route_name(route)
+
+
+class _TimedCheckout:
+    """Pool mixin timing how long a checkout waits for a connection.
+
+    SQLAlchemy has no event before a checkout starts, hence the override. The
+    engine label is the pool's `pool_logging_name`.
+    """
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        finally:
+            engine = getattr(self, "logging_name", None) or "-"
+            DB_POOL_WAIT_SECONDS.labels(engine).observe(time.perf_counter() - start)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if words else "-"
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Time every statement of `engine` and export its pool occupancy.
+
+    Pass `engine.sync_engine` for an async engine.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._skillora_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - context._skillora_start
+        route = route_label()
+        DB_QUERY_SECONDS.labels(name, route, _operation(statement)).observe(elapsed)
+
+        threshold = settings.db_slow_query_ms
+        if threshold > 0 and elapsed * 1000 >= threshold:
+            DB_SLOW_QUERIES.labels(name, route).inc()
+            logger.warning(
+                "slow query (%.0f ms, %s, %s): %s",
+                elapsed * 1000,
+                name,
+                route,
+                " ".join(statement.split())[:1000],
+            )
+
+    # Read at scrape time, from engine.pool each time since dispose() replaces it
+    def _gauge(state: str, read) -> None:
+        DB_POOL_CONNECTIONS.labels(name, state).set_function(lambda: read(engine.pool))
+
+    _gauge("checked_out", lambda pool: pool.checkedout())
+    _gauge("checked_in", lambda pool: pool.checkedin())
+    _gauge("overflow", lambda pool: max(pool.overflow(), 0))
+
+
+class MetricsMiddleware:
+    """Sets `current_route` for the request and records its latency.
+
+    Latency stops at the start of the response, so streamed exports and event
+    streams count their setup, not how long the client kept reading.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_route.set(scope)
+        start = time.perf_counter()
+        started = False
+
+        def observe(status: int) -> None:
+            labels = (scope["method"], _route_name(scope), str(status))
+            HTTP_REQUEST_SECONDS.labels(*labels).observe(time.perf_counter() - start)
+
+        async def send_timed(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        except Exception:
+            # The error middleware outside this one answers the 500
+            if not started:
+                observe(500)
+            raise
+        finally:
+            current_route.reset(token)
+
+
+def serve_worker_metrics(index: int = 0) -> None:
+    """Serve this worker process's metrics on WORKER_METRICS_PORT + `index`."""
+    if settings.worker_metrics_port > 0:
+        start_http_server(settings.worker_metrics_port + index)
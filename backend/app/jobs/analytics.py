@@ -0,0 +1,554 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Sequence
+
+from sqlalchemy import (
+    BigInteger,
+    Float,
+    Select,
+    String,
+    and_,
+    case,
+    cast,
+    func,
+    literal,
+    null,
+    or_,
+    select,
+    true,
+    tuple_,
+    union_all,
+)
+
+from app.core.config import settings
+from app.jobs.models import IngestBatch, Job, JobSalaryRollup, JobSalarySketch
+from app.jobs.schemas import AnalyticsSpecIn
+from app.jobs.sketches import SKETCH_ALPHA, SKETCH_GAMMA, ZERO_BUCKET
+
+SUMMARY_PERCENTILES = {"p50": 0.5, "p75": 0.75, "p90": 0.9}
+
+# "contains" is served by the pg_trgm GIN indexes, "exact" and "prefix" by the
+# b-tree indexes on the lower()-ed <col>_key columns
+MatchMode = Literal["contains", "exact", "prefix"]
+
+# stack_compare groups by the raw stack string or by each technology in it
+CompareGroup = Literal["stack", "technology"]
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _text_filter(source: Any, col: str, value: str, match: MatchMode) -> Any:
+    if match == "contains":
+        return getattr(source, col).ilike(f"%{_escape_like(value)}%", escape="\\")
+
+    key = getattr(source, f"{col}_key")
+    folded = value.strip().lower()
+    if match == "exact":
+        return key == folded
+    return key.like(f"{_escape_like(folded)}%", escape="\\")
+
+
+def _text_filters(
+    source: Any, match: MatchMode = "contains", **patterns: Optional[str]
+) -> List[Any]:
+    """Case-insensitive filters on the columns given a value."""
+    return [
+        _text_filter(source, col, value, match)
+        for col, value in patterns.items()
+        if value
+    ]
+
+
+def _technology_filters(source: Any, technology: Optional[str]) -> List[Any]:
+    """Jobs whose tokenized stack holds exactly this technology (GIN, @>)."""
+    if not technology or not technology.strip():
+        return []
+    return [source.technologies.contains([technology.strip().lower()])]
+
+
+def _filters(
+    source: Any,
+    match: MatchMode,
+    technology: Optional[str],
+    **patterns: Optional[str],
+) -> List[Any]:
+    return [
+        *_text_filters(source, match, **patterns),
+        *_technology_filters(source, technology),
+    ]
+
+
+def _period_filters(since: Optional[datetime], until: Optional[datetime]) -> List[Any]:
+    """Jobs created within [since, until].
+
+    The bounds are also turned into a batch_id range from `ingest_batches`, so
+    only the partitions of batches that may hold such rows are scanned: a batch
+    can't hold rows created after it finished nor before it was created.
+    """
+    B = IngestBatch
+    conds = []
+    if since is not None:
+        live = or_(B.finished_at.is_(None), B.finished_at >= since)
+        first = select(func.min(B.id)).where(live).scalar_subquery()
+        conds += [Job.batch_id >= first, Job.created_at >= since]
+    if until is not None:
+        last = select(func.max(B.id)).where(B.created_at <= until).scalar_subquery()
+        conds += [Job.batch_id <= last, Job.created_at <= until]
+    return conds
+
+
+def job_filters(
+    match: MatchMode = "contains",
+    technology: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    **patterns: Optional[str],
+) -> List[Any]:
+    """Every filter of the analytics endpoints, applied to `jobs` rows."""
+    return [
+        *_filters(Job, match, technology, **patterns),
+        *_period_filters(since, until),
+    ]
+
+
+def _dimension(source: Any, col: str) -> Any:
+    # One row per technology of the job (or rollup/sketch group)
+    if col == "technology":
+        return func.unnest(source.technologies).label("technology")
+    return getattr(source, col).label(col)
+
+
+def _use_rollups(
+    since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> bool:
+    # The rollup keeps every dimension the endpoints filter on, so any text or
+    # technology filter can be answered from it. It has no time dimension:
+    # time-bounded queries read jobs.
+    return settings.analytics_rollups and since is None and until is None
+
+
+def _ranked(model: Any, value: str, where: Sequence[Any], group: Sequence[str]):
+    """(group, value, cum, total) rows: counts merged across the matching rows
+    of `model`, with the running count in `value` order within each group."""
+    rows = (
+        select(*[_dimension(model, c) for c in group], getattr(model, value), model.n)
+        .where(*where)
+        .subquery()
+    )
+    dims = [rows.c[c] for c in group]
+    freq = (
+        select(*dims, rows.c[value], func.sum(rows.c.n).label("n"))
+        .group_by(*dims, rows.c[value])
+        .subquery()
+    )
+    fdims = [freq.c[c] for c in group]
+    return select(
+        *fdims,
+        freq.c[value],
+        func.sum(freq.c.n)
+        .over(partition_by=fdims or None, order_by=freq.c[value])
+        .label("cum"),
+        func.sum(freq.c.n).over(partition_by=fdims or None).label("total"),
+    ).subquery()
+
+
+def _grouped(ranked: Any, group: Sequence[str], cols: List[Any], *extra: Any):
+    c = ranked.c
+    # Missing dimensions are stored as "" and reported as such, like a scan
+    rdims = [c[col] for col in group]
+    n = func.coalesce(cast(func.max(c.total), BigInteger), 0).label("n")
+    return select(*rdims, *cols, n, *extra).group_by(*rdims)
+
+
+def _rollup_percentiles(
+    where: Sequence[Any], group: Sequence[str], percentiles: dict
+) -> Select:
+    """percentile_cont over the salary frequencies of the rollup.
+
+    For N jobs sorted by salary, percentile p sits at (0-based) position
+    h = p * (N - 1) and interpolates between the values at floor(h) and
+    ceil(h), exactly like percentile_cont. The value at position k is the
+    smallest salary whose running count exceeds k.
+    """
+    ranked = _ranked(JobSalaryRollup, "salary", where, group)
+    c = ranked.c
+    cols = []
+    for label, p in percentiles.items():
+        lo, hi, frac = _positions(c, p)
+        lo_value = func.min(c.salary).filter(lo)
+        hi_value = func.min(c.salary).filter(hi)
+        cols.append((lo_value + frac * (hi_value - lo_value)).label(label))
+    return _grouped(ranked, group, cols)
+
+
+def _positions(c: Any, p: float):
+    """Filters selecting the values at floor(h) and ceil(h), h = p * (N - 1),
+    and the fraction of the way from the first to the second."""
+    h = p * (c.total - 1)
+    n = func.max(c.total)
+    frac = p * (n - 1) - func.floor(p * (n - 1))
+    return c.cum > func.floor(h), c.cum > func.ceil(h), frac
+
+
+def _bucket_estimate(bucket: Any) -> Any:
+    estimate = 2 * func.power(SKETCH_GAMMA, bucket) / (SKETCH_GAMMA + 1)
+    return case((bucket == ZERO_BUCKET, 0.0), else_=estimate)
+
+
+def _sketch_percentiles(
+    where: Sequence[Any], group: Sequence[str], percentiles: dict
+) -> Select:
+    """Approximate percentiles from the merged bucket counts of the sketches.
+
+    The jobs at positions floor(h) and ceil(h) are located by running count and
+    their bucket estimates interpolated, like percentile_cont and
+    _rollup_percentiles do with exact values. Each estimate is within
+    SKETCH_ALPHA (relative) of the salary at its position, so for non-negative
+    salaries their interpolation is within it of the exact percentile too.
+    """
+    ranked = _ranked(JobSalarySketch, "bucket", where, group)
+    c = ranked.c
+    cols = []
+    for label, p in percentiles.items():
+        lo, hi, frac = _positions(c, p)
+        lo_value = _bucket_estimate(func.min(c.bucket).filter(lo))
+        hi_value = _bucket_estimate(func.min(c.bucket).filter(hi))
+        cols.append((lo_value + frac * (hi_value - lo_value)).label(label))
+    error = literal(SKETCH_ALPHA).label("relative_error")
+    return _grouped(ranked, group, cols, error)
+
+
+def salary_summary_query(
+    title: Optional[str],
+    country: Optional[str],
+    stack: Optional[str],
+    match: MatchMode = "contains",
+    approximate: bool = False,
+    technology: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Select:
+    """p50/p75/p90 and count of the jobs matching the filters.
+
+    With `approximate`, percentiles come from the sketches and the row carries
+    their `relative_error`. `technology` keeps jobs whose stack lists it;
+    `since`/`until` bound their creation time.
+    """
+    patterns = {"title": title, "country": country, "stack": stack}
+    rollups = _use_rollups(since, until)
+    if approximate and rollups:
+        where = _filters(JobSalarySketch, match, technology, **patterns)
+        return _sketch_percentiles(where, [], SUMMARY_PERCENTILES)
+    if rollups:
+        where = _filters(JobSalaryRollup, match, technology, **patterns)
+        return _rollup_percentiles(where, [], SUMMARY_PERCENTILES)
+
+    q = select(
+        *[
+            func.percentile_cont(p).within_group(Job.salary).label(label)
+            for label, p in SUMMARY_PERCENTILES.items()
+        ],
+        func.count().label("n"),
+    )
+    where = job_filters(match, technology, since, until, **patterns)
+    return q.where(Job.salary.isnot(None), *where)
+
+
+def stack_compare_query(
+    title: Optional[str],
+    country: Optional[str],
+    match: MatchMode = "contains",
+    approximate: bool = False,
+    technology: Optional[str] = None,
+    group: CompareGroup = "stack",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Select:
+    """Median salary and count per stack of the jobs matching the filters.
+
+    With group="technology" a job counts once for every technology of its
+    stack, so "Node,React" contributes to both "node" and "react".
+    """
+    patterns = {"title": title, "country": country}
+    rollups = _use_rollups(since, until)
+    if approximate and rollups:
+        where = _filters(JobSalarySketch, match, technology, **patterns)
+        q = _sketch_percentiles(where, [group], {"p50": 0.5})
+        return q.order_by(q.selected_columns.p50.desc())
+    if rollups:
+        where = _filters(JobSalaryRollup, match, technology, **patterns)
+        q = _rollup_percentiles(where, [group], {"p50": 0.5})
+        return q.order_by(q.selected_columns.p50.desc())
+
+    where = job_filters(match, technology, since, until, **patterns)
+    rows = (
+        select(_dimension(Job, group), Job.salary)
+        .where(Job.salary.isnot(None), *where)
+        .subquery()
+    )
+    p50 = func.percentile_cont(0.5).within_group(rows.c.salary)
+    return (
+        select(rows.c[group], p50.label("p50"), func.count().label("n"))
+        .group_by(rows.c[group])
+        .order_by(p50.desc())
+    )
+
+
+# ---- Batch: many filter/grouping specs answered by one scan of jobs ----
+
+GROUP_COLUMNS = ["title", "country", "stack", "seniority"]
+
+
+def percentile_label(p: float) -> str:
+    return f"p{p * 100:g}"
+
+
+def _batch_groups(specs: Sequence[AnalyticsSpecIn]) -> List[str]:
+    used = {s.group_by for s in specs}
+    return [g for g in GROUP_COLUMNS if g in used]
+
+
+def batch_query(specs: Sequence[AnalyticsSpecIn]) -> Select:
+    """One statement answering every spec of a batch.
+
+    Each spec contributes aggregates restricted to its own rows with FILTER
+    (WHERE ...); the groupings asked for become GROUPING SETS, and the
+    `grouping_id` column tells which set a result row belongs to. The WHERE
+    clause keeps the union of all the specs' rows, so jobs is scanned once.
+    """
+    groups = _batch_groups(specs)
+    gcols = [getattr(Job, g) for g in groups]
+
+    conds = []
+    cols = []
+    for i, spec in enumerate(specs):
+        filters = spec.filters.model_dump()
+        technology = filters.pop("technology")
+        cond = and_(true(), *_filters(Job, spec.match, technology, **filters))
+        conds.append(cond)
+        for p in spec.percentiles:
+            agg = func.percentile_cont(p).within_group(Job.salary).filter(cond)
+            cols.append(agg.label(f"q{i}_{percentile_label(p)}"))
+        cols.append(func.count().filter(cond).label(f"q{i}_n"))
+
+    q = select(*gcols, *cols).where(Job.salary.isnot(None), or_(*conds))
+    if not gcols:
+        return q.add_columns(literal(0).label("grouping_id"))
+
+    sets = [tuple_(*([getattr(Job, s.group_by)] if s.group_by else [])) for s in specs]
+    unique_sets = list({str(s): s for s in sets}.values())
+    return q.add_columns(func.grouping(*gcols).label("grouping_id")).group_by(
+        func.grouping_sets(*unique_sets)
+    )
+
+
+def batch_results(
+    specs: Sequence[AnalyticsSpecIn], rows: Sequence[Any]
+) -> List[Dict[str, Any]]:
+    """Split the rows of `batch_query` back into one result per spec."""
+    groups = _batch_groups(specs)
+    results = []
+    for i, spec in enumerate(specs):
+        # GROUPING() sets the bit of every column the set does *not* group by
+        mask = sum(
+            1 << (len(groups) - 1 - j)
+            for j, g in enumerate(groups)
+            if g != spec.group_by
+        )
+        labels = [percentile_label(p) for p in spec.percentiles]
+        out = []
+        for row in rows:
+            if row["grouping_id"] != mask:
+                continue
+            if spec.group_by and not row[f"q{i}_n"]:
+                continue
+            item = {spec.group_by: row[spec.group_by]} if spec.group_by else {}
+            item.update({label: row[f"q{i}_{label}"] for label in labels})
+            item["n"] = row[f"q{i}_n"]
+            out.append(item)
+        results.append(spec_result(spec, i, out))
+    return results
+
+
+def spec_result(
+    spec: AnalyticsSpecIn, index: int, rows: Sequence[Any]
+) -> Dict[str, Any]:
+    """Result of one batch spec, whichever source answered it.
+
+    Grouped rows are ordered like stack_compare: by the first percentile,
+    highest first.
+    """
+    out = [dict(r) for r in rows]
+    if spec.group_by:
+        first = percentile_label(spec.percentiles[0])
+        out.sort(key=lambda r: (r[first] is not None, r[first]), reverse=True)
+    return {"id": spec.id or str(index), "rows": out}
+
+
+def spec_percentiles(spec: AnalyticsSpecIn) -> Dict[str, float]:
+    return {percentile_label(p): p for p in spec.percentiles}
+
+
+def batch_rollup_query(specs: Sequence[AnalyticsSpecIn]) -> Any:
+    """Every spec of a batch from the rollups, in one statement (UNION ALL).
+
+    Each spec is a _rollup_percentiles query reshaped to common columns: its
+    index, its group label as `key`, its percentiles as v0, v1, ... (NULL past
+    its own) and n. `batch_rollup_results` splits the rows back.
+    """
+    width = max(len(spec.percentiles) for spec in specs)
+    parts = []
+    for i, spec in enumerate(specs):
+        filters = spec.filters.model_dump()
+        technology = filters.pop("technology")
+        where = _filters(JobSalaryRollup, spec.match, technology, **filters)
+        group = [spec.group_by] if spec.group_by else []
+        values = {f"v{j}": p for j, p in enumerate(spec.percentiles)}
+        q = _rollup_percentiles(where, group, values).subquery()
+        key = q.c[spec.group_by] if spec.group_by else null()
+        parts.append(
+            select(
+                literal(i).label("spec"),
+                cast(key, String).label("key"),
+                *[
+                    cast(q.c[f"v{j}"] if j < len(values) else null(), Float).label(
+                        f"v{j}"
+                    )
+                    for j in range(width)
+                ],
+                q.c.n,
+            )
+        )
+    return union_all(*parts)
+
+
+def batch_rollup_results(
+    specs: Sequence[AnalyticsSpecIn], rows: Sequence[Any]
+) -> List[Dict[str, Any]]:
+    """Split the rows of `batch_rollup_query` back into one result per spec."""
+    items: List[List[Dict[str, Any]]] = [[] for _ in specs]
+    for row in rows:
+        spec = specs[row["spec"]]
+        item = {spec.group_by: row["key"]} if spec.group_by else {}
+        for j, p in enumerate(spec.percentiles):
+            item[percentile_label(p)] = row[f"v{j}"]
+        item["n"] = row["n"]
+        items[row["spec"]].append(item)
+    return [spec_result(spec, i, items[i]) for i, spec in enumerate(specs)]
+
+
+# ---- Histogram: bucket counts computed in the database ----
+
+HistogramScale = Literal["linear", "log"]
+
+
+def _salary_source(
+    where_for: Any, approximate: bool, period: List[Any], rollups: bool
+) -> Any:
+    """(salary, n) rows to bin: sketch estimates, rollup frequencies or jobs."""
+    if approximate and rollups:
+        S = JobSalarySketch
+        estimate = 2 * func.power(SKETCH_GAMMA, S.bucket) / (SKETCH_GAMMA + 1)
+        value = case((S.bucket == ZERO_BUCKET, 0.0), else_=estimate)
+        return select(value.label("salary"), S.n).where(*where_for(S))
+    if rollups:
+        R = JobSalaryRollup
+        return select(R.salary, R.n).where(*where_for(R))
+    return select(Job.salary, literal(1).label("n")).where(
+        Job.salary.isnot(None), *where_for(Job), *period
+    )
+
+
+def histogram_query(
+    title: Optional[str],
+    country: Optional[str],
+    stack: Optional[str],
+    match: MatchMode = "contains",
+    technology: Optional[str] = None,
+    bins: int = 20,
+    scale: HistogramScale = "linear",
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+    approximate: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Select:
+    """(bucket, n, low, high) rows of the salaries matching the filters.
+
+    Buckets come from width_bucket over [low, high] (the salary range of the
+    matching rows unless given), on ln(salary) for the log scale, which drops
+    salaries <= 0. Values outside an explicit range are left out; the maximum
+    lands in the last bucket. Counts are summed from the rollups (exact) or
+    the sketches (`approximate`) when enabled, so no scan of jobs is needed.
+    """
+    patterns = {"title": title, "country": country, "stack": stack}
+
+    def where_for(source: Any) -> List[Any]:
+        return _filters(source, match, technology, **patterns)
+
+    period = _period_filters(since, until)
+    rollups = _use_rollups(since, until)
+    src = _salary_source(where_for, approximate, period, rollups).subquery()
+    x = src.c.salary
+    conds = [x > 0] if scale == "log" else []
+    if low is not None:
+        conds.append(x >= low)
+    if high is not None:
+        conds.append(x <= high)
+
+    # CTE: scanned once, then read for both the bounds and the counts
+    rows = select(src).where(*conds).cte("histogram_rows")
+    bounds = select(
+        (literal(low) if low is not None else func.min(rows.c.salary)).label("low"),
+        (literal(high) if high is not None else func.max(rows.c.salary)).label("high"),
+    ).subquery()
+
+    def t(v: Any) -> Any:
+        return func.ln(v) if scale == "log" else v
+
+    lo, hi = bounds.c.low, bounds.c.high
+    bucket = case(
+        (hi <= lo, 1),
+        else_=func.least(func.width_bucket(t(rows.c.salary), t(lo), t(hi), bins), bins),
+    )
+    binned = (
+        select(bucket.label("bucket"), rows.c.n, lo, hi)
+        .select_from(rows.join(bounds, true()))
+        .subquery()
+    )
+    b = binned.c
+    return select(b.bucket, func.sum(b.n).label("n"), b.low, b.high).group_by(
+        b.bucket, b.low, b.high
+    )
+
+
+def histogram_result(
+    rows: Sequence[Any], bins: int, scale: HistogramScale
+) -> Dict[str, Any]:
+    """Bucket edges and counts (zeros included) from the rows of histogram_query."""
+    if not rows or rows[0]["low"] is None:
+        return {"scale": scale, "n": 0, "bins": []}
+
+    low, high = float(rows[0]["low"]), float(rows[0]["high"])
+    if scale == "log":
+        ln_low, ln_high = math.log(low), math.log(high)
+        edges = [
+            math.exp(ln_low + i * (ln_high - ln_low) / bins) for i in range(bins + 1)
+        ]
+    else:
+        edges = [low + i * (high - low) / bins for i in range(bins + 1)]
+    edges[0], edges[-1] = low, high
+
+    counts = [0] * bins
+    for row in rows:
+        counts[int(row["bucket"]) - 1] += int(row["n"])
+    return {
+        "scale": scale,
+        "n": sum(counts),
+        "bins": [
+            {"lower": edges[i], "upper": edges[i + 1], "count": counts[i]}
+            for i in range(bins)
+        ],
+    }
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Sequence
+
+from sqlalchemy import Select, select
+
+from app.infrastructure.db import async_session
+from app.jobs.analytics import MatchMode, job_filters
+from app.jobs.models import Job
+
+# Columns returned by the listing and the exports, in this order
+LIST_COLUMNS = [
+    Job.id,
+    Job.title,
+    Job.country,
+    Job.stack,
+    Job.seniority,
+    Job.salary,
+    Job.currency,
+    Job.source,
+    Job.file_id,
+    Job.created_at,
+]
+COLUMN_NAMES = [c.key for c in LIST_COLUMNS]
+
+ExportFormat = Literal["ndjson", "csv"]
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Rows fetched per round trip from the server-side cursor (and per sent chunk)
+EXPORT_BATCH_ROWS = 5_000
+
+
+def jobs_query(
+    title: Optional[str] = None,
+    country: Optional[str] = None,
+    stack: Optional[str] = None,
+    match: MatchMode = "contains",
+    technology: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[int] = None,
+) -> Select:
+    """Jobs matching the analytics filters, in id order from after `after`.
+
+    Keyset pagination: the next page starts after the last id returned, which
+    the id index (one per partition, merged) serves without an OFFSET scan.
+    """
+    where = job_filters(
+        match, technology, since, until, title=title, country=country, stack=stack
+    )
+    if after is not None:
+        where.append(Job.id > after)
+    return select(*LIST_COLUMNS).where(*where).order_by(Job.id)
+
+
+def page_result(rows: Sequence[Any], limit: int) -> Dict[str, Any]:
+    """Items of a page fetched with `limit + 1` rows, and the cursor of the next."""
+    items = [dict(r) for r in rows[:limit]]
+    more = len(rows) > limit
+    return {"items": items, "next_after": items[-1]["id"] if more else None}
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def ndjson_chunk(rows: Sequence[Any]) -> bytes:
+    return "".join(
+        json.dumps({k: _json_value(v) for k, v in r.items()}) + "\n" for r in rows
+    ).encode()
+
+
+def csv_chunk(rows: Sequence[Any], header: bool = False) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(COLUMN_NAMES)
+    writer.writerows([[_json_value(r[c]) for c in COLUMN_NAMES] for r in rows])
+    return buf.getvalue().encode()
+
+
+async def export_rows(query: Select, fmt: ExportFormat) -> AsyncIterator[bytes]:
+    """Encoded chunks of the rows of `query`, read through a server-side cursor.
+
+    The session is owned by the generator (it outlives the request handler),
+    and only one batch of rows is held at a time. The CSV header goes out
+    before the query runs, so the client gets bytes right away.
+    """
+    if fmt == "csv":
+        yield csv_chunk([], header=True)
+
+    async with async_session() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_ROWS)
+        )
+        async for rows in result.mappings().partitions():
+            batch: List[Any] = list(rows)
+            yield ndjson_chunk(batch) if fmt == "ndjson" else csv_chunk(batch)
@@ -1,13 +1,48 @@
-from sqlalchemy import Column, DateTime, Float, Index, Integer, String
+from typing import Any, Sequence
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    Computed,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 
 from app.infrastructure.db import Base
 
+# Stack string -> normalized technology list: "Node, Express/React" becomes
+# {node,express,react}. Separators: , ; / |
+TECHNOLOGIES_SQL = (
+    "array_remove(regexp_split_to_array("
+    r"lower(btrim(coalesce(stack, ''))), '\s*[,;/|]\s*'), '')"
+)
+
+
+def _technologies() -> Column:
+    return Column(ARRAY(Text), Computed(TECHNOLOGIES_SQL, persisted=True))
+
 
 class Job(Base):
+    """A normalized job row.
+
+    Partitioned by ingestion batch: every upload loads into its own partition
+    (see workers/partitions.py), so purging it is a DROP TABLE. Rows loaded
+    before partitioning live in batch 0 with no file_id.
+    """
+
     __tablename__ = "jobs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (batch_id)"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    batch_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    file_id = Column(String(64))
     title = Column(String(128), nullable=False, index=True)
     stack = Column(String(128), index=True)
     seniority = Column(String(64), index=True)
@@ -17,5 +52,122 @@ class Job(Base):
     source = Column(String(64), default="upload")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Case-folded copies for exact/prefix filters (see analytics.py)
+    title_key = Column(String(128), Computed("lower(title)", persisted=True))
+    country_key = Column(String(64), Computed("lower(country)", persisted=True))
+    stack_key = Column(String(128), Computed("lower(stack)", persisted=True))
+    technologies = _technologies()
+
 
 Index("ix_jobs_title_stack_seniority_country", Job.title, Job.stack, Job.country)
+
+
+def _search_indexes(model: Any, columns: Sequence[str]) -> None:
+    """pg_trgm GIN index per column (ILIKE '%x%'), a pattern_ops b-tree on
+    its lower()-ed key (= and LIKE 'x%') and a GIN index on the technologies."""
+    table = model.__tablename__
+    Index(f"ix_{table}_technologies", model.technologies, postgresql_using="gin")
+    for col in columns:
+        Index(
+            f"ix_{table}_{col}_trgm",
+            getattr(model, col),
+            postgresql_using="gin",
+            postgresql_ops={col: "gin_trgm_ops"},
+        )
+        Index(
+            f"ix_{table}_{col}_key",
+            getattr(model, f"{col}_key"),
+            postgresql_ops={f"{col}_key": "varchar_pattern_ops"},
+        )
+
+
+_search_indexes(Job, ["title", "country", "stack"])
+
+
+class IngestBatch(Base):
+    """One per upload loaded into `jobs`; its id is the key of the upload's
+    partition. Ids grow with `created_at`, which lets time-bounded queries
+    prune partitions (see analytics.py)."""
+
+    __tablename__ = "ingest_batches"
+
+    id = Column(BigInteger, primary_key=True)
+    file_id = Column(String(64), nullable=False, unique=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set when the load ends; NULL while rows may still be added
+    finished_at = Column(DateTime(timezone=True))
+
+
+class JobFingerprint(Base):
+    """One row per distinct canonical job row ever loaded (see dedup.py)."""
+
+    __tablename__ = "job_fingerprints"
+
+    row_hash = Column(BigInteger, primary_key=True)
+    file_id = Column(String(64), nullable=True, index=True)
+
+
+class IngestedFile(Base):
+    """Result of every upload ingested, keyed by the SHA-256 of its bytes."""
+
+    __tablename__ = "ingested_files"
+
+    sha256 = Column(String(64), primary_key=True)
+    file_id = Column(String(64), nullable=False)
+    result = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class JobSalaryRollup(Base):
+    """Salary frequencies per (title, country, stack, seniority).
+
+    One row per distinct salary of a group with the number of jobs earning it,
+    so percentiles can be computed exactly from far fewer rows than `jobs` as
+    long as salaries repeat. Continuous salaries (e.g. converted currencies)
+    make it grow toward the size of `jobs`; the sketches stay bounded.
+    Missing dimensions are stored as "" to keep them in the primary key.
+    Maintained by the ingestion tasks (see workers/rollups.py).
+    """
+
+    __tablename__ = "job_salary_rollups"
+
+    title = Column(String(128), primary_key=True)
+    country = Column(String(64), primary_key=True)
+    stack = Column(String(128), primary_key=True)
+    seniority = Column(String(64), primary_key=True)
+    salary = Column(Float, primary_key=True)
+    n = Column(BigInteger, nullable=False)
+
+    title_key = Column(String(128), Computed("lower(title)", persisted=True))
+    country_key = Column(String(64), Computed("lower(country)", persisted=True))
+    stack_key = Column(String(128), Computed("lower(stack)", persisted=True))
+    technologies = _technologies()
+
+
+_search_indexes(JobSalaryRollup, ["title", "country", "stack"])
+
+
+class JobSalarySketch(Base):
+    """Salary quantile sketches per (title, country, stack, seniority).
+
+    One row per non-empty log bucket of a group (see sketches.py): a group holds
+    a few hundred rows at most, whatever the number of jobs, and any set of
+    groups merges by adding counts per bucket. Maintained with the rollups.
+    """
+
+    __tablename__ = "job_salary_sketches"
+
+    title = Column(String(128), primary_key=True)
+    country = Column(String(64), primary_key=True)
+    stack = Column(String(128), primary_key=True)
+    seniority = Column(String(64), primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    n = Column(BigInteger, nullable=False)
+
+    title_key = Column(String(128), Computed("lower(title)", persisted=True))
+    country_key = Column(String(64), Computed("lower(country)", persisted=True))
+    stack_key = Column(String(128), Computed("lower(stack)", persisted=True))
+    technologies = _technologies()
+
+
+_search_indexes(JobSalarySketch, ["title", "country", "stack"])
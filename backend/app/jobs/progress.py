@@ -0,0 +1,37 @@
+import json
+from typing import Any, AsyncIterator, Dict
+
+from starlette.concurrency import run_in_threadpool
+
+from app.infrastructure.events import next_event, subscription
+from app.workers.sharding import task_status
+
+# Idle connections get a comment line this often, so proxies keep them open
+HEARTBEAT_SECONDS = 15.0
+
+
+def _sse(status: Dict[str, Any]) -> bytes:
+    return f"event: status\ndata: {json.dumps(status, default=str)}\n\n".encode()
+
+
+async def task_events(task_id: str) -> AsyncIterator[bytes]:
+    """Server-Sent Events carrying the status of a task until it's ready.
+
+    The current status is read once, after subscribing (so no update can fall
+    in between), then every status the worker publishes is forwarded as is.
+    Shards only announce that they progressed: the combined status of a
+    sharded task is then read again, like GET /ingest/tasks/{task_id} does.
+    """
+    async with subscription(task_id) as pubsub:
+        status = await run_in_threadpool(task_status, task_id)
+        yield _sse(status)
+
+        while not status["ready"]:
+            event = await next_event(pubsub, HEARTBEAT_SECONDS)
+            if event is None:
+                yield b": keep-alive\n\n"
+                continue
+            if event.get("refresh"):
+                event = await run_in_threadpool(task_status, task_id)
+            status = event
+            yield _sse(status)
@@ -1,124 +1,350 @@
-from pathlib import Path
+from datetime import datetime
 from typing import Any, Dict, List, Optional
-from uuid import uuid4
 
-from celery.result import AsyncResult
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy import func, select
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.infrastructure.cache import cached
 from app.infrastructure.db import get_db
-from app.jobs.models import Job
-from app.workers.celery_app import celery
-from app.workers.tasks import process_file
+from app.jobs.analytics import (
+    CompareGroup,
+    HistogramScale,
+    MatchMode,
+    batch_query,
+    batch_results,
+    batch_rollup_query,
+    batch_rollup_results,
+    histogram_query,
+    histogram_result,
+    salary_summary_query,
+    spec_percentiles,
+    spec_result,
+    stack_compare_query,
+)
+from app.jobs.listing import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    export_rows,
+    jobs_query,
+    page_result,
+)
+from app.jobs.progress import task_events
+from app.jobs.snapshot import snapshot
+from app.workers.readers import preview
+from app.workers.sharding import bulk_task_status, dispatch_ingest, task_status
+from app.workers.tasks import purge_upload
 
-from .schemas import MappingIn
+from .schemas import (
+    AnalyticsBatchIn,
+    MappingIn,
+    TaskStatusBatchIn,
+    UploadCompleteIn,
+    UploadInitIn,
+)
+from .uploads import (
+    check_extension,
+    complete_upload,
+    earlier_result,
+    init_upload,
+    resolve_upload,
+    save_upload,
+    upload_status,
+    write_chunk,
+)
 
 router = APIRouter()
 
 
 @router.post("/ingest/upload")
 async def upload_job_file(file: UploadFile = File(...)):
-    ext = Path(file.filename).suffix.lower()
-    if ext not in {".csv", ".xls", ".xlsx"}:
-        raise HTTPException(
-            status.HTTP_400_BAD_REQUEST, "Unsupported file type. Use CSV/XLSX/XLS."
-        )
+    # Streamed to disk in chunks; never held in memory as a whole
+    return await save_upload(file)
+
+
+@router.post("/ingest/uploads", status_code=status.HTTP_201_CREATED)
+def init_resumable_upload(payload: UploadInitIn):
+    return init_upload(payload.filename, payload.size)
+
+
+@router.get("/ingest/uploads/{upload_id}")
+def get_resumable_upload(upload_id: str):
+    # Clients resume from the returned offset after a dropped connection
+    return upload_status(upload_id)
+
 
-    uploads = Path(settings.upload_dir)
-    uploads.mkdir(parents=True, exist_ok=True)
+@router.put("/ingest/uploads/{upload_id}")
+async def put_upload_chunk(
+    upload_id: str, request: Request, offset: int = Query(..., ge=0)
+):
+    return await write_chunk(upload_id, offset, request.stream())
 
-    file_id = f"{uuid4()}{ext}"
-    dest = uploads / file_id
-    content = await file.read()
-    dest.write_bytes(content)
 
-    return {"file_id": file_id}
+@router.post("/ingest/uploads/{upload_id}/complete")
+async def complete_resumable_upload(
+    upload_id: str, payload: Optional[UploadCompleteIn] = None
+):
+    return await complete_upload(upload_id, payload.sha256 if payload else None)
+
+
+@router.get("/ingest/preview/{file_id}")
+def preview_job_file(file_id: str, rows: int = Query(20, ge=0, le=200)):
+    # Header + first rows only; answered inline, no Celery task involved
+    path = resolve_upload(file_id)
+    check_extension(file_id)
+    return {"file_id": file_id, **preview(path, rows)}
 
 
 @router.post("/ingest/map")
-def map_job_columns(payload: MappingIn):
-    # Queue async task
-    task = process_file.apply_async(
-        kwargs={
-            "file_id": payload.file_id,
-            "column_map": dict(payload.column_map),
-        }
+async def map_job_columns(payload: MappingIn, db: AsyncSession = Depends(get_db)):
+    # Queue async task (or a chord of shard tasks, unless the same bytes were
+    # ingested before: process_file checks that itself, in the worker)
+    previous = await earlier_result(db, payload.file_id) if payload.sharded else None
+    task_id = await run_in_threadpool(
+        dispatch_ingest,
+        payload.file_id,
+        dict(payload.column_map),
+        payload.sharded,
+        previous,
     )
+    return {"task_id": task_id, "status": "queued"}
+
+
+@router.delete("/ingest/files/{file_id}", status_code=status.HTTP_202_ACCEPTED)
+def purge_job_file(file_id: str):
+    # Drops the rows loaded from this upload (one partition of jobs)
+    task = purge_upload.apply_async(kwargs={"file_id": file_id})
     return {"task_id": task.id, "status": "queued"}
 
 
+def _period(since: Optional[datetime], until: Optional[datetime]) -> Dict[str, Any]:
+    # JSON-friendly for the cache key
+    return {
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+    }
+
+
+@router.get("")
+async def list_jobs(
+    title: Optional[str] = None,
+    country: Optional[str] = None,
+    stack: Optional[str] = None,
+    match: MatchMode = "contains",
+    technology: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
+    # Keyset pagination: pass the returned next_after as `after` for the next page
+    query = jobs_query(title, country, stack, match, technology, since, until, after)
+    res = await db.execute(query.limit(limit + 1))
+    return page_result(res.mappings().all(), limit)
+
+
+@router.get("/export")
+async def export_jobs(
+    format: ExportFormat = "ndjson",
+    title: Optional[str] = None,
+    country: Optional[str] = None,
+    stack: Optional[str] = None,
+    match: MatchMode = "contains",
+    technology: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> StreamingResponse:
+    # Streamed from a server-side cursor: memory doesn't grow with the row count
+    query = jobs_query(title, country, stack, match, technology, since, until)
+    return StreamingResponse(
+        export_rows(query, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="jobs.{format}"'},
+    )
+
+
 @router.get("/analytics/salary/summary")
 async def salary_summary(
     title: Optional[str] = None,
     country: Optional[str] = None,
     stack: Optional[str] = None,
+    match: MatchMode = "contains",
+    approximate: bool = False,
+    technology: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db),
 ) -> Dict[str, Any]:
-    q = select(
-        func.percentile_cont(0.5).within_group(Job.salary).label("p50"),
-        func.percentile_cont(0.75).within_group(Job.salary).label("p75"),
-        func.percentile_cont(0.9).within_group(Job.salary).label("p90"),
-        func.count().label("n"),
-    )
+    sql_only = approximate or technology or since or until
+    if settings.analytics_engine == "numpy" and not sql_only:
+        await snapshot.refresh()
+        return snapshot.salary_summary(match, title=title, country=country, stack=stack)
 
-    q = q.where(Job.salary.isnot(None))
+    params = {"title": title, "country": country, "stack": stack}
+    params.update(match=match, approximate=approximate, technology=technology)
+    params.update(_period(since, until))
 
-    if title:
-        q = q.where(Job.title.ilike(f"%{title}%"))
-    if country:
-        q = q.where(Job.country.ilike(f"%{country}%"))
-    if stack:
-        q = q.where(Job.stack.ilike(f"%{stack}%"))
+    async def run() -> Dict[str, Any]:
+        query = salary_summary_query(
+            title, country, stack, match, approximate, technology, since, until
+        )
+        res = await db.execute(query)
+        row = res.mappings().first()
+        return dict(row) if row else {"p50": None, "p75": None, "p90": None, "n": 0}
 
-    res = await db.execute(q)
-    row = res.mappings().first()
-    return dict(row) if row else {"p50": None, "p75": None, "p90": None, "n": 0}
+    return await cached("salary_summary", params, run)
 
 
 @router.get("/analytics/stack/compare")
 async def stack_compare(
     title: Optional[str] = None,
     country: Optional[str] = None,
+    match: MatchMode = "contains",
+    approximate: bool = False,
+    technology: Optional[str] = None,
+    group: CompareGroup = "stack",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db),
 ) -> List[Dict[str, Any]]:
-    q = (
-        select(
-            Job.stack.label("stack"),
-            func.percentile_cont(0.5).within_group(Job.salary).label("p50"),
-            func.count().label("n"),
-        )
-        .group_by(Job.stack)
-        .order_by(func.percentile_cont(0.5).within_group(Job.salary).desc())
+    sql_only = approximate or technology or group != "stack" or since or until
+    if settings.analytics_engine == "numpy" and not sql_only:
+        await snapshot.refresh()
+        return snapshot.stack_compare(match, title=title, country=country)
+
+    params = {"title": title, "country": country}
+    params.update(
+        match=match, approximate=approximate, technology=technology, group=group
     )
+    params.update(_period(since, until))
 
-    q = q.where(Job.salary.isnot(None))
+    async def run() -> List[Dict[str, Any]]:
+        query = stack_compare_query(
+            title, country, match, approximate, technology, group, since, until
+        )
+        res = await db.execute(query)
+        return [dict(r) for r in res.mappings().all()]
 
-    if title:
-        q = q.where(Job.title.ilike(f"%{title}%"))
-    if country:
-        q = q.where(Job.country.ilike(f"%{country}%"))
+    return await cached("stack_compare", params, run)
 
-    res = await db.execute(q)
-    return [dict(r) for r in res.mappings().all()]
 
+@router.get("/analytics/salary/histogram")
+async def salary_histogram(
+    title: Optional[str] = None,
+    country: Optional[str] = None,
+    stack: Optional[str] = None,
+    match: MatchMode = "contains",
+    technology: Optional[str] = None,
+    bins: int = Query(20, ge=1, le=200),
+    scale: HistogramScale = "linear",
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+    approximate: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
+    # Bucket counts only: binned in the database, from rollups/sketches if enabled
+    if scale == "log" and any(v is not None and v <= 0 for v in (low, high)):
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            "low and high must be positive with scale=log",
+        )
+    params = {"title": title, "country": country, "stack": stack}
+    params.update(match=match, technology=technology, bins=bins, scale=scale)
+    params.update(low=low, high=high, approximate=approximate)
+    params.update(_period(since, until))
 
-@router.get("/ingest/tasks/{task_id}")
-def get_task_status(task_id: str):
-    r = AsyncResult(task_id, app=celery)
+    async def run() -> Dict[str, Any]:
+        query = histogram_query(
+            title,
+            country,
+            stack,
+            match,
+            technology,
+            bins=bins,
+            scale=scale,
+            low=low,
+            high=high,
+            approximate=approximate,
+            since=since,
+            until=until,
+        )
+        res = await db.execute(query)
+        return histogram_result(res.mappings().all(), bins, scale)
 
-    meta = r.info if isinstance(r.info, dict) else None
+    return await cached("salary_histogram", params, run)
 
-    payload = {
-        "id": task_id,
-        "state": r.state,  # PENDING | STARTED | PROGRESS | RETRY | FAILURE | SUCCESS
-        "meta": meta,
-        "ready": r.ready(),
-        "successful": r.ready() and r.successful(),
-    }
 
-    if r.ready():
-        payload["result"] = r.result
+@router.get("/analytics/engine")
+async def analytics_engine() -> Dict[str, Any]:
+    # Which engine answers summary/compare; the numpy one reports its footprint
+    if settings.analytics_engine != "numpy":
+        return {"engine": settings.analytics_engine}
+    await snapshot.refresh()
+    return snapshot.stats()
+
+
+@router.post("/analytics/batch")
+async def analytics_batch(
+    payload: AnalyticsBatchIn, db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    # Same sources as summary/compare: the numpy snapshot, else the rollups,
+    # else jobs. Either way every spec is answered by one SQL statement: a
+    # UNION ALL over the rollups, or GROUPING SETS + FILTER over one scan of jobs
+    specs = payload.queries
+    if settings.analytics_engine == "numpy" and not any(
+        s.filters.technology for s in specs
+    ):
+        await snapshot.refresh()
+        results = []
+        for i, spec in enumerate(specs):
+            patterns = spec.filters.model_dump(exclude={"technology"})
+            rows = snapshot.percentiles(
+                spec_percentiles(spec), spec.group_by, spec.match, **patterns
+            )
+            results.append(spec_result(spec, i, rows))
+        return {"results": results}
+
+    async def run() -> List[Dict[str, Any]]:
+        if settings.analytics_rollups:
+            res = await db.execute(batch_rollup_query(specs))
+            return batch_rollup_results(specs, res.mappings().all())
+        res = await db.execute(batch_query(specs))
+        return batch_results(specs, res.mappings().all())
+
+    params = {"queries": [s.model_dump() for s in specs]}
+    return {"results": await cached("batch", params, run)}
+
 
-    return payload
+@router.post("/ingest/tasks/status")
+def get_task_statuses(payload: TaskStatusBatchIn) -> Dict[str, Any]:
+    # Many tasks at once: their result-backend keys are read with one MGET
+    return {"tasks": bulk_task_status(payload.task_ids, payload.include_result)}
+
+
+@router.get("/ingest/tasks/{task_id}")
+def get_task_status(task_id: str):
+    return task_status(task_id)
+
+
+@router.get("/ingest/tasks/{task_id}/events")
+async def stream_task_status(task_id: str) -> StreamingResponse:
+    # Pushed updates over one connection (SSE) instead of polling the route above
+    return StreamingResponse(
+        task_events(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,6 +1,6 @@
-from typing import Dict
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class MappingIn(BaseModel):
@@ -16,3 +16,52 @@ class MappingIn(BaseModel):
             "stack": "stack",
         },
     )
+    # Split large CSVs into byte ranges ingested in parallel by several workers
+    sharded: bool = False
+
+
+class UploadInitIn(BaseModel):
+    filename: str
+    # Total size in bytes, when known; enables completeness checks
+    size: Optional[int] = Field(default=None, ge=0)
+
+
+class UploadCompleteIn(BaseModel):
+    # Hex SHA-256 of the whole file, verified before the upload is published
+    sha256: Optional[str] = None
+
+
+class TaskStatusBatchIn(BaseModel):
+    task_ids: List[str] = Field(..., min_length=1, max_length=500)
+    # Full result payloads of finished tasks (large); omitted by default
+    include_result: bool = False
+
+
+class AnalyticsFiltersIn(BaseModel):
+    title: Optional[str] = None
+    country: Optional[str] = None
+    stack: Optional[str] = None
+    # Exact technology within the stack list (e.g. "react", not "reactnative")
+    technology: Optional[str] = None
+
+
+class AnalyticsSpecIn(BaseModel):
+    # Echoed back with the result; defaults to the position in the batch
+    id: Optional[str] = None
+    filters: AnalyticsFiltersIn = Field(default_factory=AnalyticsFiltersIn)
+    match: Literal["contains", "exact", "prefix"] = "contains"
+    group_by: Optional[Literal["title", "country", "stack", "seniority"]] = None
+    percentiles: List[float] = Field(
+        default=[0.5, 0.75, 0.9], min_length=1, max_length=5
+    )
+
+    @field_validator("percentiles")
+    @classmethod
+    def _check_percentiles(cls, values: List[float]) -> List[float]:
+        if any(not 0 <= p <= 1 for p in values):
+            raise ValueError("percentiles must be between 0 and 1")
+        return values
+
+
+class AnalyticsBatchIn(BaseModel):
+    queries: List[AnalyticsSpecIn] = Field(..., min_length=1, max_length=20)
@@ -0,0 +1,32 @@
+"""DDSketch-style log buckets for approximate salary quantiles.
+
+A positive value x falls in bucket i = ceil(log_gamma(x)), with
+gamma = (1 + alpha) / (1 - alpha), and is estimated by 2 * gamma^i / (gamma + 1).
+Every value of a bucket is then within a relative error of `alpha` of that
+estimate, so any quantile read from merged bucket counts is too. Bucket counts
+of different groups merge by simple addition.
+"""
+
+import math
+
+import numpy as np
+
+# Relative accuracy of every quantile answered from the sketches (1%)
+SKETCH_ALPHA = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+
+# Values <= 0 share this bucket and are estimated as 0
+ZERO_BUCKET = -(2**31)
+
+
+def bucket_index(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype="float64")
+    positive = values > 0
+    logs = np.log(np.where(positive, values, 1.0)) / math.log(SKETCH_GAMMA)
+    return np.where(positive, np.ceil(logs), ZERO_BUCKET).astype(np.int64)
+
+
+def bucket_value(index: np.ndarray) -> np.ndarray:
+    index = np.asarray(index, dtype=np.int64)
+    estimate = 2 * np.power(SKETCH_GAMMA, index.astype("float64")) / (SKETCH_GAMMA + 1)
+    return np.where(index == ZERO_BUCKET, 0.0, estimate)
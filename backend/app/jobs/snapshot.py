@@ -0,0 +1,259 @@
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.infrastructure.cache import get_data_version, get_reset_version
+from app.infrastructure.db import async_session
+from app.jobs.analytics import SUMMARY_PERCENTILES, MatchMode
+from app.jobs.models import IngestBatch, Job
+
+SNAPSHOT_DIMENSIONS = ["title", "country", "stack", "seniority"]
+
+# Rows fetched per round trip while (re)loading
+_FETCH_ROWS = 100_000
+
+
+class _Dictionary:
+    """Label <-> integer code mapping of one dimension; codes only grow."""
+
+    def __init__(self) -> None:
+        self.labels: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self.folded = np.empty(0, dtype=object)  # lower-cased labels, by code
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        local, uniques = pd.factorize(values.fillna(""))
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, label in enumerate(uniques):
+            code = self.codes.get(label)
+            if code is None:
+                code = self.codes[label] = len(self.labels)
+                self.labels.append(label)
+            mapping[i] = code
+        if len(self.folded) < len(self.labels):
+            self.folded = np.array([s.lower() for s in self.labels], dtype=object)
+        return mapping[local]
+
+    def matching(self, value: str, match: MatchMode) -> np.ndarray:
+        """Boolean lookup by code: which labels the filter accepts."""
+        if match == "contains":
+            needle = value.lower()
+            hits = [needle in label for label in self.folded]
+        else:
+            needle = value.strip().lower()
+            if match == "exact":
+                hits = [label == needle for label in self.folded]
+            else:
+                hits = [label.startswith(needle) for label in self.folded]
+        return np.array(hits, dtype=bool)
+
+    def nbytes(self) -> int:
+        strings = sum(sys.getsizeof(s) for s in self.labels)
+        return strings + sys.getsizeof(self.codes) + self.folded.nbytes
+
+
+class JobsSnapshot:
+    """Columnar in-memory copy of `jobs` for the numpy analytics engine.
+
+    Salaries are a float64 array and every dimension an int32 array of codes
+    into a per-dimension dictionary. Filters become boolean masks (the label
+    test runs once per distinct label, then is broadcast through the codes),
+    and percentiles use numpy's linear interpolation, i.e. percentile_cont.
+
+    Postgres stays the source of truth: whenever the ingestion data version
+    changes, the snapshot appends the rows of the batches finished since it last
+    looked. Rows are tracked by batch rather than by id because concurrent
+    uploads draw from one id sequence and commit in any order: a lower id can
+    become visible after a higher one. It is rebuilt when the reset version
+    changes (a partition purged) or a batch it holds was reopened or is gone.
+    """
+
+    def __init__(self) -> None:
+        # Batches loaded, with the finished_at they had then
+        self.batches: Dict[int, Any] = {}
+        self.version: Optional[str] = None
+        self.reset_version: Optional[str] = None
+        self.checked_at = 0.0
+        self.salary = np.empty(0, dtype=np.float64)
+        self.codes = {d: np.empty(0, dtype=np.int32) for d in SNAPSHOT_DIMENSIONS}
+        self.dictionaries = {d: _Dictionary() for d in SNAPSHOT_DIMENSIONS}
+        self._lock = asyncio.Lock()
+
+    @property
+    def rows(self) -> int:
+        return len(self.salary)
+
+    def append(self, df: pd.DataFrame) -> None:
+        """Add a frame of jobs (id, salary and dimension columns)."""
+        if df.empty:
+            return
+        codes = {
+            d: np.concatenate([self.codes[d], self.dictionaries[d].encode(df[d])])
+            for d in SNAPSHOT_DIMENSIONS
+        }
+        salary = np.concatenate([self.salary, df["salary"].to_numpy(np.float64)])
+        # No await in between: requests never see arrays of different lengths
+        self.codes, self.salary = codes, salary
+
+    async def _finished_batches(self, session: Any) -> Dict[int, Any]:
+        B = IngestBatch
+        res = await session.execute(
+            select(B.id, B.finished_at).where(B.finished_at.isnot(None))
+        )
+        return dict(res.all())
+
+    async def _fetch(
+        self, session: Any, batch_ids: List[int], after_id: int
+    ) -> pd.DataFrame:
+        columns = [Job.id, Job.salary, *[getattr(Job, d) for d in SNAPSHOT_DIMENSIONS]]
+        res = await session.execute(
+            select(*columns)
+            .where(
+                Job.batch_id.in_(batch_ids),
+                Job.id > after_id,
+                Job.salary.isnot(None),
+            )
+            .order_by(Job.id)
+            .limit(_FETCH_ROWS)
+        )
+        return pd.DataFrame(res.all(), columns=[c.key for c in columns])
+
+    async def _load_finished_batches(self) -> bool:
+        """Append the rows of the batches finished since the last call.
+
+        Finished batches get no more rows, so paging through them by id is
+        safe. Returns False, loading nothing, when a batch already loaded was
+        reopened (loaded again) or purged since: the snapshot must be rebuilt.
+        """
+        async with async_session() as session:
+            finished = await self._finished_batches(session)
+            if any(finished.get(b) != at for b, at in self.batches.items()):
+                return False
+            new = [b for b in finished if b not in self.batches]
+            after_id = 0
+            while new:
+                df = await self._fetch(session, new, after_id)
+                if df.empty:
+                    break
+                self.append(df)
+                after_id = int(df["id"].max())
+            self.batches.update((b, finished[b]) for b in new)
+        return True
+
+    async def _reload(self) -> None:
+        # Built aside and swapped in, so requests keep reading the old copy
+        fresh = JobsSnapshot()
+        await fresh._load_finished_batches()
+        self.codes, self.salary = fresh.codes, fresh.salary
+        self.dictionaries, self.batches = fresh.dictionaries, fresh.batches
+
+    async def refresh(self) -> None:
+        """Pull the rows ingested since the last refresh, if any.
+
+        The data version is checked at most every
+        ANALYTICS_SNAPSHOT_CHECK_SECONDS; without Redis, finished batches are
+        polled.
+        """
+        interval = settings.analytics_snapshot_check_seconds
+        if time.monotonic() - self.checked_at < interval:
+            return
+        async with self._lock:
+            if time.monotonic() - self.checked_at < interval:
+                return
+            version = await get_data_version()
+            if version is None or version != self.version:
+                reset = await get_reset_version()
+                if reset is not None and reset != self.reset_version:
+                    await self._reload()
+                    self.reset_version = reset
+                elif not await self._load_finished_batches():
+                    await self._reload()
+                self.version = version or ""
+            self.checked_at = time.monotonic()
+
+    def _mask(self, match: MatchMode, **patterns: Optional[str]) -> np.ndarray:
+        mask = np.ones(self.rows, dtype=bool)
+        for dim, value in patterns.items():
+            if value:
+                lookup = self.dictionaries[dim].matching(value, match)
+                mask &= lookup[self.codes[dim]]
+        return mask
+
+    def percentiles(
+        self,
+        percentiles: Dict[str, float],
+        group: Optional[str] = None,
+        match: MatchMode = "contains",
+        **patterns: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """Percentiles (by label) and count of the matching rows, as one row or,
+        with `group`, one row per label of that dimension."""
+        mask = self._mask(match, **patterns)
+        salary = self.salary[mask]
+        if group is None:
+            if not len(salary):
+                return [{**{label: None for label in percentiles}, "n": 0}]
+            values = np.quantile(salary, list(percentiles.values()))
+            return [
+                {
+                    **{label: float(v) for label, v in zip(percentiles, values)},
+                    "n": int(len(salary)),
+                }
+            ]
+
+        codes = self.codes[group][mask]
+        if not len(salary):
+            return []
+        # Sort by (group, salary): each group becomes a sorted run
+        order = np.lexsort((salary, codes))
+        salary, codes = salary[order], codes[order]
+        groups, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+
+        labels = self.dictionaries[group].labels
+        # Missing labels are stored as "" and reported as such, like a scan
+        rows: List[Dict[str, Any]] = [{group: labels[g]} for g in groups]
+        for label, p in percentiles.items():
+            h = p * (counts - 1)
+            lo, hi = np.floor(h).astype(np.int64), np.ceil(h).astype(np.int64)
+            low, high = salary[starts + lo], salary[starts + hi]
+            for row, v in zip(rows, low + (h - lo) * (high - low)):
+                row[label] = float(v)
+        for row, n in zip(rows, counts):
+            row["n"] = int(n)
+        return rows
+
+    def salary_summary(
+        self, match: MatchMode = "contains", **patterns: Optional[str]
+    ) -> Dict[str, Any]:
+        return self.percentiles(SUMMARY_PERCENTILES, None, match, **patterns)[0]
+
+    def stack_compare(
+        self, match: MatchMode = "contains", **patterns: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Median and count per stack, highest median first."""
+        rows = self.percentiles({"p50": 0.5}, "stack", match, **patterns)
+        return sorted(rows, key=lambda r: r["p50"], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        arrays = self.salary.nbytes + sum(c.nbytes for c in self.codes.values())
+        labels = sum(d.nbytes() for d in self.dictionaries.values())
+        return {
+            "engine": "numpy",
+            "rows": self.rows,
+            "batches": len(self.batches),
+            "data_version": self.version,
+            "distinct": {
+                d: len(self.dictionaries[d].labels) for d in SNAPSHOT_DIMENSIONS
+            },
+            "memory_bytes": arrays + labels,
+        }
+
+
+# Shared by every request of this API process
+snapshot = JobsSnapshot()
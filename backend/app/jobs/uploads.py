@@ -0,0 +1,300 @@
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.jobs.models import IngestedFile
+from app.workers.dedup import duplicate_result
+
+ALLOWED_EXTENSIONS = {".csv", ".xls", ".xlsx"}
+
+# Resumable uploads live here until they're completed
+PARTIAL_DIR = ".partial"
+
+# Sidecar holding the hex SHA-256 of a completed upload
+CHECKSUM_SUFFIX = ".sha256"
+
+# Serializes chunk writes (and completion) per upload within this process
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def check_extension(filename: str) -> str:
+    ext = Path(filename).suffix.lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "Unsupported file type. Use CSV/XLSX/XLS."
+        )
+    return ext
+
+
+def resolve_upload(file_id: str) -> Path:
+    """Path of a completed upload; 404 for unknown ids or anything but a bare name."""
+    path = Path(settings.upload_dir) / file_id
+    if Path(file_id).name != file_id or not path.is_file():
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "File not found")
+    return path
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        f"File exceeds the {settings.upload_max_bytes} bytes limit.",
+    )
+
+
+def _uploads_dir() -> Path:
+    uploads = Path(settings.upload_dir)
+    uploads.mkdir(parents=True, exist_ok=True)
+    return uploads
+
+
+async def _write_stream(
+    chunks: AsyncIterator[bytes], dest: Path, offset: int, mode: str
+) -> Dict[str, Any]:
+    """Write chunks to `dest` off the event loop, hashing them on the fly.
+
+    Raises 413 once `offset` plus the bytes written exceed the upload limit.
+    """
+    digest = hashlib.sha256()
+    written = 0
+    fh = await run_in_threadpool(dest.open, mode)
+    try:
+        async for chunk in chunks:
+            if offset + written + len(chunk) > settings.upload_max_bytes:
+                raise _too_large()
+            digest.update(chunk)
+            await run_in_threadpool(fh.write, chunk)
+            written += len(chunk)
+    finally:
+        await run_in_threadpool(fh.close)
+    return {"size": written, "sha256": digest.hexdigest()}
+
+
+async def _iter_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(settings.upload_chunk_bytes):
+        yield chunk
+
+
+async def save_upload(file: UploadFile) -> Dict[str, Any]:
+    """Stream a multipart upload to disk; returns file_id, size and sha256."""
+    ext = check_extension(file.filename or "")
+    file_id = f"{uuid4()}{ext}"
+    dest = _uploads_dir() / file_id
+
+    try:
+        info = await _write_stream(_iter_upload(file), dest, 0, "wb")
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+
+    await run_in_threadpool(_write_checksum, dest, info["sha256"])
+    return {"file_id": file_id, **info}
+
+
+# ---- Resumable protocol: init -> PUT chunk at offset (repeat) -> complete ----
+
+
+def _partial_paths(upload_id: str) -> tuple[Path, Path]:
+    try:
+        UUID(upload_id)
+    except ValueError:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Upload not found") from None
+
+    base = _uploads_dir() / PARTIAL_DIR
+    part, meta = base / f"{upload_id}.part", base / f"{upload_id}.json"
+    # Expiry deletes the part first
+    if not meta.exists() or not part.exists():
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Upload not found")
+    return part, meta
+
+
+def _state(upload_id: str, part: Path, meta: Path) -> Dict[str, Any]:
+    info = json.loads(meta.read_text())
+    return {"upload_id": upload_id, "offset": part.stat().st_size, **info}
+
+
+def _last_activity(meta: Path) -> float:
+    part = meta.with_suffix(".part")
+    return max(meta.stat().st_mtime, part.stat().st_mtime if part.exists() else 0)
+
+
+def expire_partial_uploads(now: Optional[float] = None) -> int:
+    """Delete resumable uploads idle for over `upload_partial_ttl_seconds`.
+
+    Runs on each init, so abandoned uploads don't pile up on disk. Uploads
+    with a chunk being written are left alone; locks of uploads that are gone
+    are dropped too. Returns the number of uploads deleted.
+    """
+    now = time.time() if now is None else now
+    base = _uploads_dir() / PARTIAL_DIR
+    expired = 0
+    for meta in base.glob("*.json") if base.is_dir() else ():
+        lock = _locks.get(meta.stem)
+        if lock is not None and lock.locked():
+            continue
+        try:
+            if now - _last_activity(meta) <= settings.upload_partial_ttl_seconds:
+                continue
+            meta.with_suffix(".part").unlink(missing_ok=True)
+            meta.unlink()
+            expired += 1
+        except FileNotFoundError:
+            pass  # completed or expired concurrently
+
+    for upload_id in list(_locks):
+        if not _locks[upload_id].locked() and not (base / f"{upload_id}.json").exists():
+            _locks.pop(upload_id, None)
+    return expired
+
+
+def init_upload(filename: str, size: Optional[int]) -> Dict[str, Any]:
+    ext = check_extension(filename)
+    if size is not None and size > settings.upload_max_bytes:
+        raise _too_large()
+
+    expire_partial_uploads()
+    upload_id = str(uuid4())
+    base = _uploads_dir() / PARTIAL_DIR
+    base.mkdir(exist_ok=True)
+    (base / f"{upload_id}.part").touch()
+    (base / f"{upload_id}.json").write_text(
+        json.dumps({"filename": filename, "ext": ext, "size": size})
+    )
+    return {
+        "upload_id": upload_id,
+        "offset": 0,
+        "chunk_size": settings.upload_chunk_bytes,
+    }
+
+
+def upload_status(upload_id: str) -> Dict[str, Any]:
+    return _state(upload_id, *_partial_paths(upload_id))
+
+
+async def write_chunk(
+    upload_id: str, offset: int, chunks: AsyncIterator[bytes]
+) -> Dict[str, Any]:
+    """Append a chunk at `offset`, which must match the bytes received so far.
+
+    A mismatch answers 409 with the current offset so the client can resume.
+    """
+    _partial_paths(upload_id)
+    lock = _locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        # Checked again under the lock: a concurrent complete may have won
+        part, meta = _partial_paths(upload_id)
+        current = part.stat().st_size
+        if offset != current:
+            raise HTTPException(
+                status.HTTP_409_CONFLICT,
+                {"message": "Offset mismatch", "offset": current},
+            )
+
+        declared = json.loads(meta.read_text()).get("size")
+        try:
+            info = await _write_stream(chunks, part, offset, "ab")
+        except BaseException:
+            # Drop the partial chunk so the upload resumes from a clean offset
+            await run_in_threadpool(_truncate, part, offset)
+            raise
+
+        new_offset = offset + info["size"]
+        if declared is not None and new_offset > declared:
+            await run_in_threadpool(_truncate, part, offset)
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST, "Chunk goes past the declared size."
+            )
+
+    return {
+        "upload_id": upload_id,
+        "offset": new_offset,
+        "chunk_sha256": info["sha256"],
+    }
+
+
+def _truncate(path: Path, size: int) -> None:
+    with path.open("r+b") as fh:
+        fh.truncate(size)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        while chunk := fh.read(settings.upload_chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _checksum_path(path: Path) -> Path:
+    return path.with_name(path.name + CHECKSUM_SUFFIX)
+
+
+def _write_checksum(path: Path, digest: str) -> None:
+    _checksum_path(path).write_text(digest)
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a completed upload, from its sidecar when the API wrote one."""
+    sidecar = _checksum_path(path)
+    if sidecar.exists():
+        return sidecar.read_text().strip()
+    return _hash_file(path)
+
+
+async def earlier_result(db: AsyncSession, file_id: str) -> Optional[dict]:
+    """With INGEST_DEDUP, the result of an earlier ingestion of the same bytes,
+    answered for this file_id (see tasks.earlier_result, its worker twin)."""
+    path = Path(settings.upload_dir) / file_id
+    if not settings.ingest_dedup or not path.is_file():
+        return None
+    sha256 = await run_in_threadpool(file_sha256, path)
+    res = await db.execute(select(IngestedFile).where(IngestedFile.sha256 == sha256))
+    previous = res.scalar_one_or_none()
+    return duplicate_result(previous, file_id) if previous is not None else None
+
+
+async def complete_upload(upload_id: str, sha256: Optional[str]) -> Dict[str, Any]:
+    """Verify size/checksum and publish the upload under a regular file_id.
+
+    Holds the upload's lock, so it never finalizes while a chunk is written.
+    """
+    _partial_paths(upload_id)
+    lock = _locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        # Checked again under the lock: a concurrent complete may have won
+        part, meta = _partial_paths(upload_id)
+        result = await _publish(upload_id, part, meta, sha256)
+    _locks.pop(upload_id, None)
+    return result
+
+
+async def _publish(
+    upload_id: str, part: Path, meta: Path, sha256: Optional[str]
+) -> Dict[str, Any]:
+    state = _state(upload_id, part, meta)
+
+    if state["size"] is not None and state["offset"] != state["size"]:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            {"message": "Upload is incomplete", "offset": state["offset"]},
+        )
+
+    digest = await run_in_threadpool(_hash_file, part)
+    if sha256 is not None and sha256.lower() != digest:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Checksum mismatch")
+
+    file_id = f"{uuid4()}{state['ext']}"
+    dest = _uploads_dir() / file_id
+    part.rename(dest)
+    _write_checksum(dest, digest)
+    meta.unlink()
+    return {"file_id": file_id, "size": state["offset"], "sha256": digest}
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, FastAPI
+from fastapi import APIRouter, Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.infrastructure.db import get_db
+from app.infrastructure.instrumentation import MetricsMiddleware
 from app.jobs.router import router as jobs_router
 from app.users.router import router as users_router
 
@@ -19,6 +21,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 api_router = APIRouter(prefix="/api")
 api_router.include_router(users_router, prefix="/users")
@@ -40,6 +43,12 @@ async def config():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Prometheus scrape target: requests, DB statements and pool, bcrypt queue
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health(db: Session = Depends(get_db)):
     try:
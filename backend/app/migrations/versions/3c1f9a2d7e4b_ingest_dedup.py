@@ -0,0 +1,54 @@
+"""ingest dedup: job fingerprints and ingested files
+
+Revision ID: 3c1f9a2d7e4b
+Revises: a950c753efbf
+Create Date: 2026-10-18 10:12:41.208114
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1f9a2d7e4b"
+down_revision: Union[str, Sequence[str], None] = "a950c753efbf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "job_fingerprints",
+        sa.Column("row_hash", sa.BigInteger(), nullable=False),
+        sa.Column("file_id", sa.String(length=64), nullable=True),
+        sa.PrimaryKeyConstraint("row_hash"),
+    )
+    op.create_index(
+        op.f("ix_job_fingerprints_file_id"),
+        "job_fingerprints",
+        ["file_id"],
+        unique=False,
+    )
+    op.create_table(
+        "ingested_files",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("file_id", sa.String(length=64), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("ingested_files")
+    op.drop_index(op.f("ix_job_fingerprints_file_id"), table_name="job_fingerprints")
+    op.drop_table("job_fingerprints")
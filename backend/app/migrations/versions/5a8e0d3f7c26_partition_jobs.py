@@ -0,0 +1,175 @@
+"""partition jobs: one range partition per ingestion batch
+
+Revision ID: 5a8e0d3f7c26
+Revises: f3b9d2a64c81
+Create Date: 2026-10-18 15:06:52.417308
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "5a8e0d3f7c26"
+down_revision: Union[str, Sequence[str], None] = "f3b9d2a64c81"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same expression as app.jobs.models.TECHNOLOGIES_SQL
+TECHNOLOGIES_SQL = (
+    "array_remove(regexp_split_to_array("
+    r"lower(btrim(coalesce(stack, ''))), '\s*[,;/|]\s*'), '')"
+)
+
+SEARCH_COLUMNS = ["title", "country", "stack"]
+DATA_COLUMNS = (
+    "id, title, stack, seniority, country, salary, currency, source, created_at"
+)
+
+# Batch holding the rows loaded before partitioning
+LEGACY_BATCH = 0
+
+
+def _columns(partitioned: bool) -> list:
+    keys = [
+        sa.Column(
+            f"{col}_key",
+            sa.String(length=length),
+            sa.Computed(f"lower({col})", persisted=True),
+        )
+        for col, length in (("title", 128), ("country", 64), ("stack", 128))
+    ]
+    batch = (
+        [
+            sa.Column("batch_id", sa.BigInteger(), nullable=False),
+            sa.Column("file_id", sa.String(length=64), nullable=True),
+        ]
+        if partitioned
+        else []
+    )
+    pk = ["id", "batch_id"] if partitioned else ["id"]
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('jobs_id_seq')"),
+            nullable=False,
+        ),
+        *batch,
+        sa.Column("title", sa.String(length=128), nullable=False),
+        sa.Column("stack", sa.String(length=128), nullable=True),
+        sa.Column("seniority", sa.String(length=64), nullable=True),
+        sa.Column("country", sa.String(length=64), nullable=True),
+        sa.Column("salary", sa.Float(), nullable=False),
+        sa.Column("currency", sa.String(length=8), nullable=True),
+        sa.Column("source", sa.String(length=64), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        *keys,
+        sa.Column(
+            "technologies",
+            postgresql.ARRAY(sa.Text()),
+            sa.Computed(TECHNOLOGIES_SQL, persisted=True),
+        ),
+        sa.PrimaryKeyConstraint(*pk, name="jobs_pkey"),
+    ]
+
+
+def _create_indexes() -> None:
+    for col in ["country", "id", "seniority", "stack", "title"]:
+        op.create_index(op.f(f"ix_jobs_{col}"), "jobs", [col], unique=False)
+    op.create_index(
+        "ix_jobs_title_stack_seniority_country",
+        "jobs",
+        ["title", "stack", "country"],
+        unique=False,
+    )
+    for col in SEARCH_COLUMNS:
+        op.create_index(
+            f"ix_jobs_{col}_trgm",
+            "jobs",
+            [col],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={col: "gin_trgm_ops"},
+        )
+        op.create_index(
+            f"ix_jobs_{col}_key",
+            "jobs",
+            [f"{col}_key"],
+            unique=False,
+            postgresql_ops={f"{col}_key": "varchar_pattern_ops"},
+        )
+    op.create_index(
+        "ix_jobs_technologies",
+        "jobs",
+        ["technologies"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def _set_aside(name: str) -> None:
+    """Rename the current jobs table out of the way, keeping its id sequence."""
+    op.execute("ALTER SEQUENCE jobs_id_seq OWNED BY NONE")
+    op.execute(f"ALTER TABLE jobs RENAME TO {name}")
+    op.execute(f"ALTER TABLE {name} RENAME CONSTRAINT jobs_pkey TO {name}_pkey")
+    for index in sa.inspect(op.get_bind()).get_indexes(name):
+        op.drop_index(index["name"], table_name=name)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ingest_batches",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("file_id", sa.String(length=64), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("file_id"),
+    )
+    op.execute(
+        "INSERT INTO ingest_batches (id, file_id, finished_at) "
+        f"VALUES ({LEGACY_BATCH}, '', now())"
+    )
+
+    _set_aside("jobs_unpartitioned")
+    op.create_table("jobs", *_columns(True), postgresql_partition_by="RANGE (batch_id)")
+    op.execute("ALTER SEQUENCE jobs_id_seq OWNED BY jobs.id")
+    op.execute(
+        f"CREATE TABLE jobs_b{LEGACY_BATCH} PARTITION OF jobs "
+        f"FOR VALUES FROM ({LEGACY_BATCH}) TO ({LEGACY_BATCH + 1})"
+    )
+    # Copy first, index after: one bulk build instead of per-row maintenance
+    op.execute(
+        f"INSERT INTO jobs ({DATA_COLUMNS}, batch_id) "
+        f"SELECT {DATA_COLUMNS}, {LEGACY_BATCH} FROM jobs_unpartitioned"
+    )
+    _create_indexes()
+    op.drop_table("jobs_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_aside("jobs_partitioned")
+    op.create_table("jobs", *_columns(False))
+    op.execute("ALTER SEQUENCE jobs_id_seq OWNED BY jobs.id")
+    op.execute(
+        f"INSERT INTO jobs ({DATA_COLUMNS}) SELECT {DATA_COLUMNS} FROM jobs_partitioned"
+    )
+    _create_indexes()
+    op.drop_table("jobs_partitioned")
+    op.drop_table("ingest_batches")
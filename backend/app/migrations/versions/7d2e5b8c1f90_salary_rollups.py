@@ -0,0 +1,45 @@
+"""salary rollups
+
+Revision ID: 7d2e5b8c1f90
+Revises: 3c1f9a2d7e4b
+Create Date: 2026-10-18 11:03:27.514902
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2e5b8c1f90"
+down_revision: Union[str, Sequence[str], None] = "3c1f9a2d7e4b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "job_salary_rollups",
+        sa.Column("title", sa.String(length=128), nullable=False),
+        sa.Column("country", sa.String(length=64), nullable=False),
+        sa.Column("stack", sa.String(length=128), nullable=False),
+        sa.Column("seniority", sa.String(length=64), nullable=False),
+        sa.Column("salary", sa.Float(), nullable=False),
+        sa.Column("n", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("title", "country", "stack", "seniority", "salary"),
+    )
+    # Backfill from the jobs already loaded
+    op.execute(
+        "INSERT INTO job_salary_rollups "
+        "(title, country, stack, seniority, salary, n) "
+        "SELECT coalesce(title, ''), coalesce(country, ''), coalesce(stack, ''), "
+        "coalesce(seniority, ''), salary, count(*) "
+        "FROM jobs WHERE salary IS NOT NULL GROUP BY 1, 2, 3, 4, 5"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("job_salary_rollups")
@@ -0,0 +1,60 @@
+"""search indexes: pg_trgm and case-folded keys
+
+Revision ID: b84f0c6e2a17
+Revises: 7d2e5b8c1f90
+Create Date: 2026-10-18 11:48:09.331527
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b84f0c6e2a17"
+down_revision: Union[str, Sequence[str], None] = "7d2e5b8c1f90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = {"title": 128, "country": 64, "stack": 128}
+TABLES = ["jobs", "job_salary_rollups"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in TABLES:
+        for col, length in SEARCH_COLUMNS.items():
+            op.add_column(
+                table,
+                sa.Column(
+                    f"{col}_key",
+                    sa.String(length=length),
+                    sa.Computed(f"lower({col})", persisted=True),
+                ),
+            )
+            op.create_index(
+                f"ix_{table}_{col}_trgm",
+                table,
+                [col],
+                unique=False,
+                postgresql_using="gin",
+                postgresql_ops={col: "gin_trgm_ops"},
+            )
+            op.create_index(
+                f"ix_{table}_{col}_key",
+                table,
+                [f"{col}_key"],
+                unique=False,
+                postgresql_ops={f"{col}_key": "varchar_pattern_ops"},
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        for col in SEARCH_COLUMNS:
+            op.drop_index(f"ix_{table}_{col}_key", table_name=table)
+            op.drop_index(f"ix_{table}_{col}_trgm", table_name=table)
+            op.drop_column(table, f"{col}_key")
@@ -0,0 +1,78 @@
+"""salary sketches
+
+Revision ID: e1a7c3d95b42
+Revises: b84f0c6e2a17
+Create Date: 2026-10-18 12:30:51.870214
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1a7c3d95b42"
+down_revision: Union[str, Sequence[str], None] = "b84f0c6e2a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = {"title": 128, "country": 64, "stack": 128}
+
+# gamma = (1 + 0.01) / (1 - 0.01), see app/jobs/sketches.py
+GAMMA = (1 + 0.01) / (1 - 0.01)
+ZERO_BUCKET = -(2**31)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "job_salary_sketches",
+        sa.Column("title", sa.String(length=128), nullable=False),
+        sa.Column("country", sa.String(length=64), nullable=False),
+        sa.Column("stack", sa.String(length=128), nullable=False),
+        sa.Column("seniority", sa.String(length=64), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("n", sa.BigInteger(), nullable=False),
+        *[
+            sa.Column(
+                f"{col}_key",
+                sa.String(length=length),
+                sa.Computed(f"lower({col})", persisted=True),
+            )
+            for col, length in SEARCH_COLUMNS.items()
+        ],
+        sa.PrimaryKeyConstraint("title", "country", "stack", "seniority", "bucket"),
+    )
+    for col in SEARCH_COLUMNS:
+        op.create_index(
+            f"ix_job_salary_sketches_{col}_trgm",
+            "job_salary_sketches",
+            [col],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={col: "gin_trgm_ops"},
+        )
+        op.create_index(
+            f"ix_job_salary_sketches_{col}_key",
+            "job_salary_sketches",
+            [f"{col}_key"],
+            unique=False,
+            postgresql_ops={f"{col}_key": "varchar_pattern_ops"},
+        )
+
+    # Backfill from the jobs already loaded
+    op.execute(
+        "INSERT INTO job_salary_sketches "
+        "(title, country, stack, seniority, bucket, n) "
+        "SELECT coalesce(title, ''), coalesce(country, ''), coalesce(stack, ''), "
+        "coalesce(seniority, ''), "
+        f"CASE WHEN salary > 0 THEN ceil(ln(salary) / ln({GAMMA!r}))::int "
+        f"ELSE {ZERO_BUCKET} END, count(*) "
+        "FROM jobs WHERE salary IS NOT NULL GROUP BY 1, 2, 3, 4, 5"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("job_salary_sketches")
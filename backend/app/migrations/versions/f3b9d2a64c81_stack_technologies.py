@@ -0,0 +1,54 @@
+"""stack technologies: tokenized stack arrays with GIN indexes
+
+Revision ID: f3b9d2a64c81
+Revises: e1a7c3d95b42
+Create Date: 2026-10-18 13:42:16.092741
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b9d2a64c81"
+down_revision: Union[str, Sequence[str], None] = "e1a7c3d95b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["jobs", "job_salary_rollups", "job_salary_sketches"]
+
+# Same expression as app.jobs.models.TECHNOLOGIES_SQL
+TECHNOLOGIES_SQL = (
+    "array_remove(regexp_split_to_array("
+    r"lower(btrim(coalesce(stack, ''))), '\s*[,;/|]\s*'), '')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "technologies",
+                postgresql.ARRAY(sa.Text()),
+                sa.Computed(TECHNOLOGIES_SQL, persisted=True),
+            ),
+        )
+        op.create_index(
+            f"ix_{table}_technologies",
+            table,
+            ["technologies"],
+            unique=False,
+            postgresql_using="gin",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_technologies", table_name=table)
+        op.drop_column(table, "technologies")
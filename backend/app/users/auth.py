@@ -1,25 +1,67 @@
 # JWT functions, hashing, validation
 
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Callable, TypeVar, Union
 
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_REJECTED, PASSWORD_HASH_WAIT
+
+T = TypeVar("T")
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt costs 100-300ms of CPU per call: it runs on these threads, never on
+# the event loop, so a burst of logins doesn't stall every other request
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.auth_hash_workers, thread_name_prefix="bcrypt"
+)
+# Calls in flight (running or queued on the executor). Bounding them keeps the
+# queue, and so the wait of each login, from growing without limit
+_hash_slots = asyncio.Semaphore(settings.auth_hash_workers + settings.auth_hash_queue)
+
 SECRET_KEY = os.getenv("SECRET_KEY", "my_secret_key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def _offload(operation: str, fn: Callable[..., T], *args) -> T:
+    """Run `fn` on the bcrypt pool, or raise 503 if no slot frees up in time."""
+    queued = time.perf_counter()
+
+    def run() -> T:
+        PASSWORD_HASH_WAIT.labels(operation).observe(time.perf_counter() - queued)
+        return fn(*args)
+
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), settings.auth_hash_wait_seconds)
+    except asyncio.TimeoutError:
+        PASSWORD_HASH_REJECTED.labels(operation).inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent sign-ins, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, run)
+    finally:
+        _hash_slots.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _offload("hash", pwd_context.hash, password)
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _offload("verify", pwd_context.verify, plain_password, hashed_password)
 
 
 async def create_access_token(data: dict, expires_delta: Union[int, None] = None):
@@ -0,0 +1,87 @@
+# In-process cache of verified tokens -> snapshot of their user
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+
+from app.core.config import settings
+
+from .models import User
+from .schemas import UserOut
+
+
+class TokenCache:
+    """LRU of verified bearer tokens and the user they authenticate.
+
+    Entries live `auth_user_cache_ttl` seconds at most, never past the `exp` of
+    their token. The TTL also bounds how long another API process may keep
+    serving a user after `invalidate_user` ran here.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, Tuple[float, UserOut]]" = OrderedDict()
+        self._by_email: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[UserOut]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires, user = entry
+        if time.time() >= expires:
+            self._drop(token)
+            return None
+        self._entries.move_to_end(token)
+        return user
+
+    def put(self, token: str, user: UserOut, exp: Optional[float] = None) -> None:
+        expires = time.time() + settings.auth_user_cache_ttl
+        if exp is not None:
+            expires = min(expires, float(exp))
+        if settings.auth_user_cache_size <= 0 or expires <= time.time():
+            return
+
+        self._drop(token)
+        self._entries[token] = (expires, user)
+        self._by_email.setdefault(user.email, set()).add(token)
+        while len(self._entries) > settings.auth_user_cache_size:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, email: str) -> None:
+        """Forget every token of a user (deactivated, deleted, new password...)."""
+        for token in list(self._by_email.get(email, ())):
+            self._drop(token)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_email.clear()
+
+    def _drop(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_email.get(entry[1].email)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_email[entry[1].email]
+
+
+user_cache = TokenCache()
+
+
+def invalidate_user(email: str) -> None:
+    user_cache.invalidate_user(email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _forget_changed_user(mapper, connection, target: User) -> None:
+    # Any write to a user through the ORM drops its cached tokens, under the
+    # old email too when that is what changed
+    for email in {target.email, *inspect(target).attrs.email.history.deleted}:
+        if email:
+            invalidate_user(email)
@@ -5,7 +5,6 @@ from sqlalchemy.orm import Session
 from app.infrastructure.db import get_db
 
 from . import schemas, services
-from .models import User
 
 router = APIRouter(tags=["Users"])
 
@@ -23,8 +22,10 @@ async def login(
 
 
 @router.get("/me", response_model=schemas.UserOut)
-async def get_me(current_user: User = Depends(services.get_current_user)):
-    return await current_user
+async def get_me(
+    current_user: schemas.UserOut = Depends(services.get_current_user),
+):
+    return current_user
 
 
 # @router.post("/login")
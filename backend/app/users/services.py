@@ -11,15 +11,21 @@ from app.core.config import settings
 from app.infrastructure.db import get_db
 
 from .auth import create_access_token, hash_password, verify_password
+from .cache import user_cache
 from .models import User
-from .schemas import UserCreate
+from .schemas import UserCreate, UserOut
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+) -> UserOut:
+    # Tokens seen recently skip both the signature check and the users lookup
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -38,9 +44,12 @@ async def get_current_user(
 
     user_result = await db.execute(select(User).where(User.email == email))
     user = user_result.scalars().first()
-    if user is None:
+    if user is None or user.is_active is False:
         raise credentials_exception
-    return user
+
+    snapshot = UserOut.model_validate(user, from_attributes=True)
+    user_cache.put(token, snapshot, payload.get("exp"))
+    return snapshot
 
 
 async def create_user(db: AsyncSession, user_data: UserCreate):
@@ -52,7 +61,7 @@ async def create_user(db: AsyncSession, user_data: UserCreate):
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    hashed_pw = hash_password(user_data.password)
+    hashed_pw = await hash_password(user_data.password)
     user = User(
         email=user_data.email, hashed_password=hashed_pw, full_name=user_data.full_name
     )
@@ -65,7 +74,7 @@ async def create_user(db: AsyncSession, user_data: UserCreate):
 async def authenticate_user(db: AsyncSession, email: str, password: str):
     user_result = await db.execute(select(User).where(User.email == email))
     user = user_result.scalars().first()
-    if not user or not verify_password(password, cast(str, user.hashed_password)):
+    if not user or not await verify_password(password, cast(str, user.hashed_password)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
@@ -0,0 +1,93 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.jobs.models import IngestedFile, JobFingerprint
+
+# Canonical row layout the fingerprint is computed over (same order as CANON)
+FINGERPRINT_COLUMNS = ["title", "salary", "currency", "country", "seniority", "stack"]
+FINGERPRINT_DEFAULTS = {"currency": "USD"}
+
+_CLAIM = text(
+    f"INSERT INTO {JobFingerprint.__tablename__} (row_hash, file_id) "
+    "SELECT h, :file_id FROM unnest(CAST(:hashes AS bigint[])) AS h ORDER BY h "
+    "ON CONFLICT DO NOTHING RETURNING row_hash"
+)
+
+
+def row_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """Stable 64-bit fingerprint of each normalized row over the canonical columns.
+
+    Columns missing from the frame take the value the loaders would store, and
+    salary is hashed as float64, so the same job hashes the same whichever file
+    (and mapping) it came from.
+    """
+    canon = pd.DataFrame(index=df.index)
+    for col in FINGERPRINT_COLUMNS:
+        if col == "salary":
+            canon[col] = df[col].astype("float64") if col in df else np.nan
+        else:
+            default = FINGERPRINT_DEFAULTS.get(col, "")
+            canon[col] = df[col].astype(object) if col in df else default
+    hashes = pd.util.hash_pandas_object(canon, index=False).to_numpy()
+    return hashes.view(np.int64)
+
+
+def claim_new_rows(session: Session, df: pd.DataFrame, file_id: str) -> pd.DataFrame:
+    """Keep only rows never loaded before, registering their fingerprints.
+
+    Fingerprints are claimed with a conflict-ignoring insert in the caller's
+    transaction: rows whose fingerprint already exists (from any file, or
+    earlier in this frame) are dropped, and a rollback releases the claims.
+    Identical rows within one file are therefore loaded once, even when they
+    are distinct postings that happen to match on every canonical column.
+
+    Hashes are claimed in sorted order, so concurrent loads (e.g. shards)
+    claiming the same ones wait on each other instead of deadlocking.
+    """
+    hashes = row_fingerprints(df)
+    unique = ~pd.Series(hashes).duplicated().to_numpy()
+    df, hashes = df[unique], hashes[unique]
+    if df.empty:
+        return df
+
+    claimed = session.execute(
+        _CLAIM, {"hashes": np.sort(hashes).tolist(), "file_id": file_id}
+    ).scalars()
+    return df[np.isin(hashes, np.fromiter(claimed, dtype=np.int64))]
+
+
+def find_ingested(session: Session, sha256: str) -> Optional[IngestedFile]:
+    return session.execute(
+        select(IngestedFile).where(IngestedFile.sha256 == sha256)
+    ).scalar_one_or_none()
+
+
+def duplicate_result(previous: IngestedFile, file_id: str) -> Dict[str, Any]:
+    """The result of an earlier ingestion of the same bytes, for `file_id`."""
+    return {**previous.result, "file_id": file_id, "duplicate_of": previous.file_id}
+
+
+def record_ingested(
+    session: Session, sha256: str, file_id: str, result: Dict[str, Any]
+) -> None:
+    """Remember the result of an ingested file; the first one recorded wins."""
+    stmt = insert(IngestedFile).values(sha256=sha256, file_id=file_id, result=result)
+    session.execute(stmt.on_conflict_do_nothing(index_elements=["sha256"]))
+    session.commit()
+
+
+def forget_upload(session: Session, file_id: str) -> None:
+    """Release the fingerprints and result of a purged upload, in the caller's
+    transaction, so its rows (or the same file) can be ingested again.
+
+    Rows of later uploads that were skipped as duplicates of this upload's
+    rows were never stored, so they leave `jobs` with it. Purging and
+    re-ingesting such a later upload loads them again.
+    """
+    session.execute(delete(JobFingerprint).where(JobFingerprint.file_id == file_id))
+    session.execute(delete(IngestedFile).where(IngestedFile.file_id == file_id))
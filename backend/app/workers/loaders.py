@@ -0,0 +1,59 @@
+import io
+from typing import Callable, Dict
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.jobs.models import Job
+
+# Writes a normalized frame into `jobs` (or one of its partitions) inside the
+# session's transaction and returns how many rows were written. The caller owns
+# commit/rollback.
+Loader = Callable[[Session, pd.DataFrame, str], int]
+
+# Python-side column defaults of `Job`; COPY bypasses the ORM so they're filled here.
+COPY_DEFAULTS: Dict[str, str] = {"currency": "USD", "source": "upload"}
+
+
+def orm_loader(session: Session, df: pd.DataFrame, table: str = "") -> int:
+    """Portable fallback: one `Job` object per row, saved in bulk.
+
+    Rows always go through `jobs`, so `table` is ignored: the partition of the
+    rows' batch must be attached.
+    """
+    records = df.to_dict(orient="records")
+    session.bulk_save_objects([Job(**row) for row in records])
+    return len(records)
+
+
+def copy_loader(
+    session: Session, df: pd.DataFrame, table: str = Job.__tablename__
+) -> int:
+    """PostgreSQL fast path: stream the frame as CSV through `COPY ... FROM STDIN`.
+
+    The frame is serialized by pandas in one call and handed to psycopg 3 as a
+    single buffer, so no per-row Python objects are created.
+    """
+    frame = df.assign(**{k: v for k, v in COPY_DEFAULTS.items() if k not in df})
+
+    buf = io.StringIO()
+    frame.to_csv(buf, header=False, index=False, na_rep="\\N")
+
+    cols = ", ".join(frame.columns)
+    sql = f"COPY {table} ({cols}) FROM STDIN (FORMAT csv, NULL '\\N')"
+
+    dbapi_conn = session.connection().connection.driver_connection
+    with dbapi_conn.cursor() as cur:
+        with cur.copy(sql) as copy:
+            copy.write(buf.getvalue())
+    return len(frame)
+
+
+LOADERS: Dict[str, Loader] = {"copy": copy_loader, "orm": orm_loader}
+
+
+def get_loader(name: str) -> Loader:
+    try:
+        return LOADERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown ingest loader: {name}") from None
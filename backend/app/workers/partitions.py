@@ -0,0 +1,156 @@
+from typing import Optional, Tuple
+
+from sqlalchemy import Engine, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.jobs.models import IngestBatch, Job
+from app.workers.rollups import add_rollups
+
+_JOBS = Job.__tablename__
+_BATCHES = IngestBatch.__tablename__
+
+# Registers the batch of an upload, or reopens it when the upload is loaded
+# again. The row stays locked until commit, which serializes concurrent
+# shards of the same upload while they create its partition.
+_OPEN_BATCH = text(
+    f"INSERT INTO {_BATCHES} (file_id) VALUES (:file_id) "
+    "ON CONFLICT (file_id) DO UPDATE SET finished_at = NULL RETURNING id"
+)
+
+_FINISH_BATCH = text(
+    f"UPDATE {_BATCHES} SET finished_at = now() WHERE file_id = :file_id"
+)
+
+# None: no such table; otherwise whether it is attached to jobs
+_PARTITION_STATE = text(
+    "SELECT i.inhparent IS NOT NULL FROM pg_class c "
+    "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid "
+    "WHERE c.oid = to_regclass(:table)"
+)
+
+# None: not attached; otherwise whether a DETACH ... CONCURRENTLY was
+# interrupted halfway (it then has to be finalized)
+_DETACH_PENDING = text(
+    "SELECT inhdetachpending FROM pg_inherits WHERE inhrelid = to_regclass(:table)"
+)
+
+
+def partition_name(batch_id: int) -> str:
+    return f"{_JOBS}_b{int(batch_id)}"
+
+
+def _bounds(batch_id: int) -> str:
+    return f"FROM ({int(batch_id)}) TO ({int(batch_id) + 1})"
+
+
+def _is_attached(session: Session, table: str) -> Optional[bool]:
+    return session.execute(_PARTITION_STATE, {"table": table}).scalar_one_or_none()
+
+
+def open_partition(
+    session: Session, file_id: str, attached: bool = True
+) -> Tuple[int, str, bool]:
+    """Batch id and partition table of an upload, created on first use, and
+    whether that table is attached to `jobs`.
+
+    A new partition always starts as a standalone table with no indexes:
+    `CREATE TABLE ... PARTITION OF` would take an ACCESS EXCLUSIVE lock on
+    `jobs` and stall every query on it, while ATTACH only takes SHARE UPDATE
+    EXCLUSIVE. With `attached` it is attached right away (e.g. for shards,
+    which write through `jobs`), as is a partition left detached by an
+    interrupted load. Otherwise rows are loaded into it directly and
+    `attach_partition` builds every index in one pass at the end, instead of
+    maintaining them per row. A partition already attached (e.g. an upload
+    loaded again, or sharded before) stays attached either way: rows loaded
+    into it are live at once.
+    """
+    batch_id = session.execute(_OPEN_BATCH, {"file_id": file_id}).scalar_one()
+    table = partition_name(batch_id)
+
+    state = _is_attached(session, table)
+    if state is None:
+        session.execute(
+            text(
+                f"CREATE TABLE {table} "
+                f"(LIKE {_JOBS} INCLUDING DEFAULTS INCLUDING GENERATED)"
+            )
+        )
+        # Lets ATTACH skip the scan that validates the partition bounds
+        session.execute(
+            text(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_batch_id_check "
+                f"CHECK (batch_id = {int(batch_id)})"
+            )
+        )
+    if attached and not state:
+        attach_partition(session, batch_id)
+        state = True
+
+    session.commit()
+    return batch_id, table, bool(state)
+
+
+def attach_partition(session: Session, batch_id: int) -> None:
+    """Attach the partition of a batch to `jobs` (indexes are built here).
+
+    Its rows are added to the rollups in the caller's transaction: a detached
+    partition is not counted there, so they are counted exactly when they
+    become visible in `jobs`, and not at all if the load fails before.
+    """
+    table = partition_name(batch_id)
+    if _is_attached(session, table) is False:
+        session.execute(
+            text(
+                f"ALTER TABLE {_JOBS} ATTACH PARTITION {table} "
+                f"FOR VALUES {_bounds(batch_id)}"
+            )
+        )
+        if settings.analytics_rollups:
+            add_rollups(session, table)
+
+
+def is_attached(session: Session, batch_id: int) -> bool:
+    return bool(_is_attached(session, partition_name(batch_id)))
+
+
+def detach_partition(engine: Engine, batch_id: int) -> None:
+    """Take the partition of a batch out of `jobs` without blocking its readers.
+
+    DETACH ... CONCURRENTLY only takes SHARE UPDATE EXCLUSIVE on `jobs` but
+    runs as several transactions of its own, so it needs an autocommit
+    connection rather than the caller's session. A detach interrupted halfway
+    is finalized.
+    """
+    table = partition_name(batch_id)
+    autocommit = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    with autocommit as conn:
+        pending = conn.execute(_DETACH_PENDING, {"table": table}).scalar_one_or_none()
+        if pending is None:
+            return
+        mode = "FINALIZE" if pending else "CONCURRENTLY"
+        conn.execute(text(f"ALTER TABLE {_JOBS} DETACH PARTITION {table} {mode}"))
+
+
+def finish_batch(session: Session, file_id: str) -> None:
+    """Mark the load of an upload as over (see analytics._period_filters)."""
+    session.execute(_FINISH_BATCH, {"file_id": file_id})
+    session.commit()
+
+
+def find_batch(session: Session, file_id: str) -> Optional[IngestBatch]:
+    return session.execute(
+        select(IngestBatch).where(IngestBatch.file_id == file_id)
+    ).scalar_one_or_none()
+
+
+def drop_partition(session: Session, batch_id: int) -> None:
+    """Drop the rows of a batch with its partition, in the caller's transaction.
+
+    The partition should be detached first (see `detach_partition`): dropping
+    an attached one locks `jobs` ACCESS EXCLUSIVE.
+    """
+    session.execute(text(f"DROP TABLE IF EXISTS {partition_name(batch_id)}"))
+    session.execute(
+        text(f"DELETE FROM {_BATCHES} WHERE id = :id"), {"id": int(batch_id)}
+    )
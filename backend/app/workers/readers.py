@@ -0,0 +1,209 @@
+import io
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# (frame, offset reached in the source: bytes for raw files, rows for staged ones)
+Chunk = Tuple[pd.DataFrame, int]
+
+# Half-open [start, end) byte range of a CSV file holding whole rows
+ByteRange = Tuple[int, int]
+
+
+class _RangeReader(io.RawIOBase):
+    """Raw stream over a byte range of an open file."""
+
+    def __init__(self, fh: BinaryIO, start: int, end: int):
+        fh.seek(start)
+        self._fh = fh
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        n = min(len(buf), self._remaining)
+        if n <= 0:
+            return 0
+        data = self._fh.read(n)
+        buf[: len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _header_names(header: Sequence[Any]) -> List[str]:
+    # Same naming as pd.read_excel for blank header cells
+    return [
+        f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)
+    ]
+
+
+def _iter_xlsx(
+    path: Path, chunk_rows: int, usecols: Optional[Sequence[str]] = None
+) -> Iterator[Chunk]:
+    """Stream the active sheet of an .xlsx file in DataFrames of `chunk_rows` rows.
+
+    openpyxl's read-only mode parses the sheet XML as it goes instead of
+    building the workbook DOM, so memory is bounded by the chunk size. The file
+    is compressed, so offsets are the byte size scaled by the fraction of rows
+    read (from the sheet's declared dimension) and the last chunk reports the
+    whole file. Blank rows are skipped, like pd.read_excel does.
+    """
+    size = path.stat().st_size
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        it = ws.iter_rows(values_only=True)
+        names = _header_names(next(it, ()))
+        keep = [names.index(c) for c in usecols] if usecols is not None else None
+        columns = [names[i] for i in keep] if keep is not None else names
+        data_rows = max((ws.max_row or 0) - 1, 1)
+
+        rows: List[Sequence[Any]] = []
+        read = 0
+
+        def _frame() -> pd.DataFrame:
+            if keep is not None:
+                picked = [
+                    [row[i] if i < len(row) else None for i in keep] for row in rows
+                ]
+            else:
+                picked = [list(row[: len(names)]) for row in rows]
+            return pd.DataFrame(picked, columns=columns).infer_objects()
+
+        for row in it:
+            if all(v is None for v in row):
+                continue
+            rows.append(row)
+            if len(rows) == chunk_rows:
+                read += len(rows)
+                yield _frame(), min(size * read // data_rows, size - 1)
+                rows = []
+
+        if rows or not read:
+            yield _frame(), size
+    finally:
+        wb.close()
+
+
+def _read_head(path: Path, rows: int) -> pd.DataFrame:
+    """Header plus the first `rows` rows, without parsing the rest of the file."""
+    suf = path.suffix.lower()
+    if suf == ".csv":
+        return pd.read_csv(path, nrows=rows)
+    if suf == ".xlsx":
+        # read-only mode streams the sheet instead of loading the workbook DOM
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            it = wb.active.iter_rows(max_row=rows + 1, values_only=True)
+            header = _header_names(next(it, ()))
+            return pd.DataFrame(list(it), columns=header).infer_objects()
+        finally:
+            wb.close()
+    if suf == ".xls":
+        return pd.read_excel(path, nrows=rows)
+    raise ValueError(f"Unsupported file type: {path.suffix}")
+
+
+def read_columns(path: Path) -> list[str]:
+    """Return the header of an upload without parsing its rows."""
+    return list(_read_head(path, 0).columns)
+
+
+def preview(path: Path, rows: int) -> Dict[str, Any]:
+    """Column names, inferred dtypes and the first `rows` rows of an upload."""
+    df = _read_head(path, rows)
+    return {
+        "columns": [str(c) for c in df.columns],
+        "dtypes": {
+            str(c): pd.api.types.infer_dtype(df[c], skipna=True) for c in df.columns
+        },
+        # JSON-friendly: python scalars, missing values as None
+        "rows": df.astype(object).where(df.notna(), None).to_dict(orient="records"),
+    }
+
+
+def plan_shards(path: Path, shards: int) -> List[ByteRange]:
+    """Split the rows of a CSV file into up to `shards` row-aligned byte ranges.
+
+    Boundaries are moved forward to the next newline, so every range starts at
+    the beginning of a row. Quoted fields spanning several lines are not
+    supported: a boundary may fall inside them.
+    """
+    size = path.stat().st_size
+    with path.open("rb") as fh:
+        fh.readline()  # header
+        bounds = [fh.tell()]
+        data_size = size - bounds[0]
+
+        for i in range(1, shards):
+            target = bounds[0] + data_size * i // shards
+            if target <= bounds[-1]:
+                continue
+            fh.seek(target - 1)
+            fh.readline()  # finish the row the target byte belongs to
+            if bounds[-1] < fh.tell() < size:
+                bounds.append(fh.tell())
+
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def iter_chunks(
+    path: Path,
+    chunk_rows: int,
+    usecols: Optional[Sequence[str]] = None,
+    byte_range: Optional[ByteRange] = None,
+) -> Iterator[Chunk]:
+    """Yield the upload as DataFrames of at most `chunk_rows` rows.
+
+    CSV files are streamed, so memory stays bounded by the chunk size. The byte
+    offset reported with each chunk is read from the underlying handle and lets
+    callers estimate the total row count before reaching the end of the file.
+    With `byte_range` only the rows of that shard are read (see `plan_shards`)
+    and offsets are relative to its start.
+    .xlsx files are streamed too (see `_iter_xlsx`); legacy .xls files are read
+    in one go and reported as fully consumed.
+    """
+    suf = path.suffix.lower()
+    cols = list(usecols) if usecols is not None else None
+
+    if suf == ".csv" and byte_range is not None:
+        names = read_columns(path)
+        start, end = byte_range
+        with path.open("rb") as fh:
+            stream = io.BufferedReader(_RangeReader(fh, start, end))
+            reader = pd.read_csv(
+                stream, header=None, names=names, chunksize=chunk_rows, usecols=cols
+            )
+            for chunk in reader:
+                yield chunk, fh.tell() - start
+        return
+
+    if suf == ".csv":
+        with path.open("rb") as fh:
+            for chunk in pd.read_csv(fh, chunksize=chunk_rows, usecols=cols):
+                yield chunk, fh.tell()
+        return
+
+    if byte_range is not None:
+        raise ValueError(f"Byte ranges are only supported for CSV: {path.suffix}")
+
+    if suf == ".xlsx":
+        yield from _iter_xlsx(path, chunk_rows, cols)
+        return
+
+    if suf == ".xls":
+        yield pd.read_excel(path, usecols=cols), path.stat().st_size
+        return
+
+    raise ValueError(f"Unsupported file type: {path.suffix}")
+
+
+def estimate_total_rows(rows_read: int, bytes_read: int, size: int) -> int:
+    """Extrapolate the row count of a file from the fraction already read."""
+    if bytes_read >= size or bytes_read <= 0:
+        return rows_read
+    return max(rows_read, int(rows_read * size / bytes_read))
@@ -0,0 +1,120 @@
+from contextvars import Token
+from typing import Any, Dict, Optional
+
+from billiard.process import current_process
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from sqlalchemy import Engine, create_engine, event
+
+from app.core.config import settings
+from app.infrastructure.instrumentation import (
+    TimedQueuePool,
+    current_route,
+    instrument_engine,
+    serve_worker_metrics,
+)
+
+# One sync engine per worker process, shared by every task it runs.
+_engine: Optional[Engine] = None
+
+# current_route of each running task, restored when it ends
+_route_tokens: Dict[str, Token] = {}
+
+# Cumulative pool events since the engine was created
+_pool_events: Dict[str, int] = {
+    "connects": 0,
+    "checkouts": 0,
+    "checkins": 0,
+    "invalidations": 0,
+}
+
+
+def _count(name: str):
+    def _listener(*_: Any) -> None:
+        _pool_events[name] += 1
+
+    return _listener
+
+
+def _create_engine() -> Engine:
+    engine = create_engine(
+        settings.alembic_database_url,
+        pool_size=settings.worker_db_pool_size,
+        max_overflow=settings.worker_db_max_overflow,
+        pool_recycle=settings.worker_db_pool_recycle,
+        pool_timeout=settings.worker_db_pool_timeout,
+        pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        pool_logging_name="worker",
+        future=True,
+    )
+    instrument_engine(engine, "worker")
+    event.listen(engine, "connect", _count("connects"))
+    event.listen(engine, "checkout", _count("checkouts"))
+    event.listen(engine, "checkin", _count("checkins"))
+    event.listen(engine, "invalidate", _count("invalidations"))
+    return engine
+
+
+def get_engine() -> Engine:
+    """Return the worker's engine, creating it on first use (eager/solo runs)."""
+    global _engine
+    if _engine is None:
+        _engine = _create_engine()
+        for k in _pool_events:
+            _pool_events[k] = 0
+    return _engine
+
+
+def dispose_engine(close: bool = True) -> None:
+    """Drop the engine; `close=False` leaves sockets inherited across fork alone."""
+    global _engine
+    if _engine is not None:
+        _engine.dispose(close=close)
+        _engine = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Snapshot of the worker pool: current occupancy plus cumulative events."""
+    if _engine is None:
+        return {"initialized": False, **_pool_events}
+
+    pool: Any = _engine.pool
+    return {
+        "initialized": True,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        **_pool_events,
+    }
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**_: Any) -> None:
+    # A pool created before fork belongs to the parent; never reuse its sockets.
+    dispose_engine(close=False)
+    get_engine()
+    serve_worker_metrics(getattr(current_process(), "index", 0))
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**_: Any) -> None:
+    dispose_engine()
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id: str = "", task: Any = None, **_: Any) -> None:
+    # Statement metrics of the task are labelled with its name
+    _route_tokens[task_id] = current_route.set(getattr(task, "name", None) or "-")
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id: str = "", **_: Any) -> None:
+    token = _route_tokens.pop(task_id, None)
+    if token is not None:
+        current_route.reset(token)
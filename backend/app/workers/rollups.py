@@ -0,0 +1,144 @@
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.jobs.models import JobSalaryRollup, JobSalarySketch
+from app.jobs.sketches import SKETCH_GAMMA, ZERO_BUCKET, bucket_index
+
+# Group columns of the rollups, in primary-key order
+ROLLUP_DIMENSIONS = ["title", "country", "stack", "seniority"]
+
+_DIMS = ", ".join(ROLLUP_DIMENSIONS)
+_DIM_ARRAYS = ", ".join(f"CAST(:{c} AS text[])" for c in ROLLUP_DIMENSIONS)
+_DIMS_FROM_JOBS = ", ".join(f"coalesce({c}, '') AS {c}" for c in ROLLUP_DIMENSIONS)
+
+
+def _upsert(table: str, col: str, sql_type: str):
+    key = f"{_DIMS}, {col}"
+    return text(
+        f"INSERT INTO {table} ({key}, n) "
+        f"SELECT * FROM unnest({_DIM_ARRAYS}, "
+        f"CAST(:{col} AS {sql_type}[]), CAST(:n AS bigint[])) "
+        f"ON CONFLICT ({key}) DO UPDATE SET n = {table}.n + EXCLUDED.n"
+    )
+
+
+def _rebuild(table: str, col: str, expr: str):
+    return [
+        text(f"DELETE FROM {table}"),
+        text(
+            f"INSERT INTO {table} ({_DIMS}, {col}, n) "
+            f"SELECT {_DIMS_FROM_JOBS}, {expr}, count(*) "
+            "FROM jobs WHERE salary IS NOT NULL GROUP BY 1, 2, 3, 4, 5"
+        ),
+    ]
+
+
+def _add(table: str, col: str, expr: str, source: str):
+    key = f"{_DIMS}, {col}"
+    # Sorted by key, like rollup_rows, so concurrent upserts don't deadlock
+    return text(
+        f"INSERT INTO {table} ({key}, n) "
+        f"SELECT {_DIMS_FROM_JOBS}, {expr}, count(*) "
+        f"FROM {source} WHERE salary IS NOT NULL "
+        "GROUP BY 1, 2, 3, 4, 5 ORDER BY 1, 2, 3, 4, 5 "
+        f"ON CONFLICT ({key}) DO UPDATE SET n = {table}.n + EXCLUDED.n"
+    )
+
+
+def _subtract(table: str, col: str, expr: str, source: str):
+    key = [*ROLLUP_DIMENSIONS, col]
+    match = " AND ".join(f"r.{c} = d.{c}" for c in key)
+    return [
+        text(
+            f"UPDATE {table} AS r SET n = r.n - d.n FROM ("
+            f"SELECT {_DIMS_FROM_JOBS}, {expr} AS {col}, count(*) AS n "
+            f"FROM {source} WHERE salary IS NOT NULL GROUP BY 1, 2, 3, 4, 5"
+            f") AS d WHERE {match}"
+        ),
+        text(f"DELETE FROM {table} WHERE n <= 0"),
+    ]
+
+
+_ROLLUPS = JobSalaryRollup.__tablename__
+_SKETCHES = JobSalarySketch.__tablename__
+
+_UPSERT_ROLLUPS = _upsert(_ROLLUPS, "salary", "float8")
+_UPSERT_SKETCHES = _upsert(_SKETCHES, "bucket", "int4")
+
+# Same bucketing as sketches.bucket_index, in SQL
+_BUCKET_SQL = (
+    f"CASE WHEN salary > 0 THEN ceil(ln(salary) / ln({SKETCH_GAMMA!r}))::int "
+    f"ELSE {ZERO_BUCKET} END"
+)
+
+_REBUILD = [
+    *_rebuild(_ROLLUPS, "salary", "salary"),
+    *_rebuild(_SKETCHES, "bucket", _BUCKET_SQL),
+]
+
+
+def _counts(keys: pd.DataFrame, col: str) -> pd.DataFrame:
+    counts = keys.groupby([*ROLLUP_DIMENSIONS, col], sort=True).size()
+    return counts.rename("n").reset_index()
+
+
+def _dimension_keys(df: pd.DataFrame) -> pd.DataFrame:
+    keys = pd.DataFrame(
+        {c: df[c] if c in df else "" for c in ROLLUP_DIMENSIONS}, index=df.index
+    )
+    keys["salary"] = df["salary"].astype("float64")
+    return keys.dropna(subset=["salary"])
+
+
+def rollup_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Salary frequencies of a normalized chunk, sorted by the rollup key.
+
+    Sorting makes every task lock rollup rows in the same order, so concurrent
+    upserts (e.g. sharded ingestion) wait on each other instead of deadlocking.
+    """
+    return _counts(_dimension_keys(df), "salary")
+
+
+def sketch_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Sketch bucket counts of a normalized chunk, sorted by key (see above)."""
+    keys = _dimension_keys(df)
+    keys["bucket"] = bucket_index(keys.pop("salary").to_numpy())
+    return _counts(keys, "bucket")
+
+
+def refresh_rollups(session: Session, df: pd.DataFrame) -> None:
+    """Add a loaded chunk to the rollups and sketches, in the caller's transaction."""
+    for stmt, rows in (
+        (_UPSERT_ROLLUPS, rollup_rows(df)),
+        (_UPSERT_SKETCHES, sketch_rows(df)),
+    ):
+        if not rows.empty:
+            session.execute(stmt, {c: rows[c].tolist() for c in rows.columns})
+
+
+def add_rollups(session: Session, source: str) -> None:
+    """Add the rows of `source` (a jobs partition being attached) to the rollups
+    and sketches, in the caller's transaction."""
+    for stmt in [
+        _add(_ROLLUPS, "salary", "salary", source),
+        _add(_SKETCHES, "bucket", _BUCKET_SQL, source),
+    ]:
+        session.execute(stmt)
+
+
+def subtract_rollups(session: Session, source: str) -> None:
+    """Take the rows of `source` (a jobs partition about to be dropped) out of
+    the rollups and sketches, in the caller's transaction."""
+    for stmt in [
+        *_subtract(_ROLLUPS, "salary", "salary", source),
+        *_subtract(_SKETCHES, "bucket", _BUCKET_SQL, source),
+    ]:
+        session.execute(stmt)
+
+
+def rebuild_rollups(session: Session) -> None:
+    """Recompute rollups and sketches from `jobs` (backfill, or after enabling)."""
+    for stmt in _REBUILD:
+        session.execute(stmt)
+    session.commit()
@@ -0,0 +1,219 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from celery import chord
+
+from app.core.config import settings
+from app.workers.celery_app import celery
+from app.workers.readers import ByteRange, plan_shards
+from app.workers.tasks import finalize_shards, process_file, process_shard
+
+
+def _shards_for(path: Path) -> List[ByteRange]:
+    if path.suffix.lower() != ".csv" or not path.exists():
+        return []
+    if path.stat().st_size < settings.ingest_shard_min_bytes:
+        return []
+    return plan_shards(path, settings.ingest_shards)
+
+
+def dispatch_ingest(
+    file_id: str,
+    column_map: dict,
+    sharded: bool = False,
+    previous: Optional[dict] = None,
+) -> str:
+    """Queue the ingestion of an upload and return the task id to poll.
+
+    In sharded mode a large CSV is split into row-aligned byte ranges that are
+    ingested in parallel by a chord of `process_shard` tasks. The returned id
+    belongs to the `finalize_shards` callback: until it runs, its PROGRESS meta
+    lists the shard task ids so `sharded_progress` can combine their progress,
+    and the shards announce theirs on its event channel (see tasks.py).
+    Small files, Excel files and missing files go through `process_file`.
+
+    A file whose bytes were already ingested is answered with `previous`, the
+    earlier result looked up by the caller (see uploads.earlier_result), as
+    `process_file` does: it is stored as the returned task's result and no
+    shard is queued.
+    """
+    path = Path(settings.upload_dir) / file_id
+    shards = _shards_for(path) if sharded else []
+
+    if len(shards) < 2:
+        task = process_file.apply_async(
+            kwargs={"file_id": file_id, "column_map": column_map}
+        )
+        return task.id
+
+    parent_id = str(uuid4())
+    if previous is not None:
+        celery.backend.store_result(parent_id, previous, "SUCCESS")
+        return parent_id
+
+    header = [
+        process_shard.si(
+            file_id=file_id,
+            column_map=column_map,
+            start=a,
+            end=b,
+            progress_id=parent_id,
+        )
+        for a, b in shards
+    ]
+    meta = {
+        "stage": "sharded",
+        "shards": [
+            {"id": sig.freeze().id, "bytes": b - a}
+            for sig, (a, b) in zip(header, shards)
+        ],
+    }
+
+    celery.backend.store_result(parent_id, meta, "PROGRESS")
+    chord(header)(finalize_shards.s(file_id=file_id).set(task_id=parent_id))
+    return parent_id
+
+
+def _read_metas(task_ids: Sequence[str]) -> List[Dict[str, Any]]:
+    """Stored state of many tasks with one MGET on the result backend.
+
+    Values are only deserialized, so failures keep their JSON form. Unknown
+    ids read as PENDING, like AsyncResult does.
+    """
+    backend = celery.backend
+    values = backend.mget([backend.get_key_for_task(t) for t in task_ids])
+    return [
+        backend.decode(v) if v is not None else {"status": "PENDING", "result": None}
+        for v in values
+    ]
+
+
+def _state(meta: Dict[str, Any]) -> Tuple[bool, Any]:
+    # (ready, result or progress meta) of a stored task state
+    return meta["status"] in celery.backend.READY_STATES, meta["result"]
+
+
+def _combine_shards(
+    shards: List[Dict[str, Any]], states: List[Tuple[bool, Any]]
+) -> Dict[str, Any]:
+    """Combined progress of shards given (ready, result-or-meta) for each.
+
+    The total of shards that haven't reported yet is extrapolated from their
+    byte sizes.
+    """
+    processed = 0
+    known_total = 0
+    known_bytes = 0
+    done = 0
+    for shard, (ready, info) in zip(shards, states):
+        if not isinstance(info, dict) or "total" not in info:
+            continue
+
+        rows = info["total"] if ready else info.get("processed", 0)
+        processed += rows
+        known_total += info["total"]
+        known_bytes += shard["bytes"]
+        done += int(ready)
+
+    all_bytes = sum(shard["bytes"] for shard in shards)
+    total = int(known_total * all_bytes / known_bytes) if known_bytes else 0
+    total = max(total, processed)
+    return {
+        "stage": "sharded",
+        "processed": processed,
+        "total": total,
+        "percent": int(processed * 100 / max(total, 1)),
+        "shards": len(shards),
+        "shards_done": done,
+    }
+
+
+def _shard_list(meta: Any) -> Optional[List[Dict[str, Any]]]:
+    shards = meta.get("shards") if isinstance(meta, dict) else None
+    return shards if isinstance(shards, list) else None
+
+
+def sharded_progress(meta: Any) -> Optional[Dict[str, Any]]:
+    """Combine the progress of the shards listed in a parent's meta.
+
+    Returns None when `meta` doesn't describe a sharded ingestion.
+    """
+    shards = _shard_list(meta)
+    if shards is None:
+        return None
+
+    metas = _read_metas([shard["id"] for shard in shards])
+    return _combine_shards(shards, [_state(m) for m in metas])
+
+
+def task_status(task_id: str) -> Dict[str, Any]:
+    """State, progress and (once ready) result of an ingestion task.
+
+    One read of the result backend, plus one for the shards of a sharded task.
+    """
+    (meta,) = _read_metas([task_id])
+    state = meta["status"]
+    ready, info = _state(meta)
+
+    # Sharded ingestion: report the combined progress of all shards
+    if state == "PROGRESS":
+        info = sharded_progress(info) or info
+
+    payload = {
+        "id": task_id,
+        "state": state,  # PENDING | STARTED | PROGRESS | RETRY | FAILURE | SUCCESS
+        "meta": info if isinstance(info, dict) else None,
+        "ready": ready,
+        "successful": state == "SUCCESS",
+    }
+
+    if ready:
+        payload["result"] = info
+
+    return payload
+
+
+def bulk_task_status(
+    task_ids: Sequence[str], include_result: bool = False
+) -> List[Dict[str, Any]]:
+    """Compact state/progress records of many tasks, in `task_ids` order.
+
+    Every task is read with a single MGET, plus one more for the shards of
+    sharded ingestions, whatever the number of ids. The result payload of
+    finished tasks is only included with `include_result`.
+    """
+    metas = _read_metas(task_ids)
+
+    shards_of = {
+        i: shards
+        for i, m in enumerate(metas)
+        if m["status"] == "PROGRESS" and (shards := _shard_list(m["result"]))
+    }
+    shard_ids = [shard["id"] for shards in shards_of.values() for shard in shards]
+    shard_metas = dict(zip(shard_ids, _read_metas(shard_ids))) if shard_ids else {}
+
+    records = []
+    for i, (task_id, meta) in enumerate(zip(task_ids, metas)):
+        state = meta["status"]
+        ready, info = _state(meta)
+        if i in shards_of:
+            states = [_state(shard_metas[shard["id"]]) for shard in shards_of[i]]
+            info = _combine_shards(shards_of[i], states)
+
+        progress = info if not ready and isinstance(info, dict) else {}
+        record = {
+            "id": task_id,
+            "state": state,
+            "ready": ready,
+            "successful": state == "SUCCESS",
+            **{
+                k: progress[k]
+                for k in ("processed", "total", "percent")
+                if k in progress
+            },
+        }
+        if ready and include_result:
+            record["result"] = info
+        records.append(record)
+    return records
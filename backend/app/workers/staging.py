@@ -0,0 +1,143 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.workers.readers import Chunk, iter_chunks
+
+# Columnar copy of an upload, written next to it on first read
+STAGED_SUFFIX = ".arrow"
+
+# Only spreadsheets are staged: re-reading the stage is far faster than parsing
+# them again, while CSV parses faster than it can be staged (or read back)
+STAGED_EXTENSIONS = {".xlsx", ".xls"}
+
+# Batch metadata key holding the pandas dtypes the raw read gave that chunk
+DTYPES_KEY = b"pandas_dtypes"
+
+
+def staged_path(path: Path) -> Path:
+    return path.with_name(path.name + STAGED_SUFFIX)
+
+
+def _is_fresh(staged: Path, path: Path) -> bool:
+    return staged.exists() and staged.stat().st_mtime >= path.stat().st_mtime
+
+
+def _to_batch(df: pd.DataFrame, schema: pa.Schema) -> pa.RecordBatch:
+    # Values are staged as nullable text, so every chunk shares one schema
+    # whatever pandas inferred for it; the inferred dtypes go in the batch
+    # metadata and are restored on read (see _restore).
+    frame = df.astype("string")
+    frame.columns = schema.names
+    return pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+def _dtypes(df: pd.DataFrame) -> Dict[bytes, bytes]:
+    dtypes = {str(c): str(t) for c, t in df.dtypes.items()}
+    return {DTYPES_KEY: json.dumps(dtypes).encode()}
+
+
+def _restore(values: pd.Series, dtype: str) -> pd.Series:
+    """Staged text back to the dtype the raw read inferred for its chunk.
+
+    Object columns keep the text form of their values (mixed-type Excel
+    cells come back as str) with NaN for missing, as read_csv gives them.
+    """
+    if dtype == "object":
+        return values.astype(object).where(values.notna(), np.nan)
+    if dtype == "bool":
+        return values == "True"
+    try:
+        return values.astype(dtype)
+    except (TypeError, ValueError):
+        return values
+
+
+def _to_frame(
+    batch: pa.RecordBatch, meta: Optional[pa.KeyValueMetadata]
+) -> pd.DataFrame:
+    df = batch.to_pandas()
+    if meta is None or DTYPES_KEY not in meta:
+        return df  # staged before dtypes were recorded
+    dtypes = json.loads(meta[DTYPES_KEY])
+    for col in df.columns:
+        if col in dtypes:
+            df[col] = _restore(df[col], dtypes[col])
+    return df
+
+
+def _read_staged(
+    staged: Path, usecols: Optional[Sequence[str]]
+) -> Tuple[Iterator[Chunk], int]:
+    source = pa.memory_map(str(staged))
+    reader = pa.ipc.open_file(source)
+    total = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+    def _chunks() -> Iterator[Chunk]:
+        rows = 0
+        try:
+            for i in range(reader.num_record_batches):
+                batch, meta = reader.get_batch_with_custom_metadata(i)
+                if usecols is not None:
+                    batch = batch.select(list(usecols))
+                rows += batch.num_rows
+                yield _to_frame(batch, meta), rows
+        finally:
+            source.close()
+
+    return _chunks(), total
+
+
+def _stage_while_reading(
+    path: Path, staged: Path, chunk_rows: int, usecols: Optional[Sequence[str]]
+) -> Iterator[Chunk]:
+    """Read the raw upload, writing every chunk to the staging file as it goes.
+
+    All columns are staged so that a later run with another mapping can reuse
+    the file. It only becomes visible once the whole upload has been read.
+    """
+    tmp = staged.with_name(f"{staged.name}.{uuid4().hex}.tmp")
+    writer: Optional[pa.ipc.RecordBatchFileWriter] = None
+    schema = pa.schema([])
+    try:
+        for df, offset in iter_chunks(path, chunk_rows):
+            if writer is None:
+                schema = pa.schema([(str(c), pa.string()) for c in df.columns])
+                writer = pa.ipc.new_file(str(tmp), schema)
+            writer.write_batch(_to_batch(df, schema), custom_metadata=_dtypes(df))
+            yield (df if usecols is None else df[list(usecols)]), offset
+
+        if writer is not None:
+            writer.close()
+            writer = None
+            tmp.replace(staged)
+    finally:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+
+
+def stage_chunks(
+    path: Path, chunk_rows: int, usecols: Optional[Sequence[str]] = None
+) -> Tuple[Iterator[Chunk], int]:
+    """Chunks of an upload plus the extent their offsets are measured against.
+
+    When a fresh staging file exists it is memory-mapped and only the
+    `usecols` columns are materialized; offsets then count rows and the extent
+    is the exact row count. Otherwise the raw file is parsed (offsets in bytes,
+    extent = file size) and, for spreadsheets, staged on the way, so retries
+    and re-submissions with a corrected mapping skip Excel parsing. CSVs are
+    always read directly.
+    """
+    if path.suffix.lower() not in STAGED_EXTENSIONS:
+        return iter_chunks(path, chunk_rows, usecols=usecols), path.stat().st_size
+    staged = staged_path(path)
+    if _is_fresh(staged, path):
+        return _read_staged(staged, usecols)
+    chunks = _stage_while_reading(path, staged, chunk_rows, usecols)
+    return chunks, path.stat().st_size
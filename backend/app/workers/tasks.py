@@ -1,54 +1,330 @@
+import logging
 from pathlib import Path
-from typing import Any, Dict, List, cast
+from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+import redis
+from celery.signals import task_postrun
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.jobs.models import Job
+from app.infrastructure.cache import bump_data_version
+from app.infrastructure.events import publish
+from app.jobs.uploads import file_sha256
 from app.workers.celery_app import celery
+from app.workers.dedup import (
+    claim_new_rows,
+    duplicate_result,
+    find_ingested,
+    forget_upload,
+    record_ingested,
+)
+from app.workers.loaders import get_loader
+from app.workers.partitions import (
+    attach_partition,
+    detach_partition,
+    drop_partition,
+    find_batch,
+    finish_batch,
+    is_attached,
+    open_partition,
+    partition_name,
+)
+from app.workers.readers import (
+    Chunk,
+    estimate_total_rows,
+    iter_chunks,
+    read_columns,
+)
+from app.workers.resources import get_engine, pool_stats
+from app.workers.rollups import rebuild_rollups, refresh_rollups, subtract_rollups
+from app.workers.staging import stage_chunks
+
+logger = logging.getLogger(__name__)
 
 CANON: list[str] = ["title", "salary", "currency", "country", "seniority", "stack"]
 
 
-def _load_dataframe(path: Path) -> pd.DataFrame:
-    suf = path.suffix.lower()
-    if suf == ".csv":
-        return pd.read_csv(path)
-    if suf in {".xlsx", ".xls"}:
-        return pd.read_excel(path)
-    raise ValueError(f"Unsupported file type: {path.suffix}")
+def _open_chunks(
+    path: Path, usecols: Optional[List[str]] = None
+) -> Tuple[Iterable[Chunk], int]:
+    """Chunks of an upload and their extent, staged if INGEST_STAGING is on."""
+    if settings.ingest_staging:
+        return stage_chunks(path, settings.ingest_chunk_rows, usecols)
+    chunks = iter_chunks(path, settings.ingest_chunk_rows, usecols=usecols)
+    return chunks, path.stat().st_size
+
+
+def _load_dataframe(path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a whole upload through the same reader as process_file.
+
+    `columns` projects the read: with a staged file only those are loaded.
+    """
+    chunks, _ = _open_chunks(path, columns)
+    frames = [df for df, _ in chunks]
+    if not frames:
+        return pd.DataFrame(columns=columns or read_columns(path))
+    return pd.concat(frames, ignore_index=True)
+
+
+TEXT_COLUMNS: tuple[str, ...] = ("title", "country", "seniority", "stack", "currency")
+TEXT_DEFAULTS: Dict[str, str] = {"currency": "USD"}
+
+
+def _mixed_types(values: pd.Series) -> bool:
+    return pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty")
+
+
+def _clean_text(values: pd.Series, default: str = "") -> np.ndarray:
+    """fillna("") + astype(str) + str.strip(), evaluated once per distinct value.
+
+    The column is dictionary-encoded first, so the string work only touches the
+    (usually few) distinct labels and is then broadcast back through the codes.
+    Missing and blank values become `default`.
+    """
+    if values.dtype == object and _mixed_types(values):
+        # factorize hashes 1, 1.0 and True as one value, str() tells them apart
+        values = values.astype(str).mask(values.isna())
+    codes, uniques = pd.factorize(values)
+    labels = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.strip()
+    if default:
+        labels = labels.mask(labels == "", default)
+
+    # code -1 (missing) picks the trailing default
+    lookup = np.append(labels.to_numpy(dtype=object), default)
+    return lookup[codes]
+
+
+def _to_numeric(values: pd.Series) -> pd.Series:
+    """pd.to_numeric(errors="coerce"); text is parsed once per distinct value."""
+    if values.dtype != object:
+        return pd.to_numeric(values, errors="coerce")
+
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_numeric(pd.Series(uniques, dtype=object), errors="coerce")
+    missing = codes == -1
+    if parsed.dtype.kind in "iu" and not missing.any():
+        result = parsed.to_numpy().take(codes)
+    else:
+        result = parsed.to_numpy(dtype="float64").take(codes)
+        result[missing] = np.nan
+    return pd.Series(result, index=values.index, name=values.name)
 
 
 def _normalize(df: pd.DataFrame) -> pd.DataFrame:
     # keep only known columns
     cols: list[str] = [c for c in CANON if c in df.columns]
-    df = cast(pd.DataFrame, df.loc[:, cols].copy())
+    index = df.index
+    keep: np.ndarray | None = None
+    out: Dict[str, Any] = {}
+
+    # basic cleaning: rows without a numeric salary are dropped
+    if "salary" in cols:
+        salary = _to_numeric(df["salary"])
+        mask = salary.notna().to_numpy()
+        if not mask.all():
+            keep = mask
+            index = index[keep]
+        out["salary"] = salary.to_numpy()[keep] if keep is not None else salary
 
-    # basic cleaning
-    if "salary" in df.columns:
-        df["salary"] = pd.to_numeric(df["salary"], errors="coerce")
-        df = cast(pd.DataFrame, df.loc[df["salary"].notna()].copy())
+    for col in cols:
+        if col in TEXT_COLUMNS:
+            values = df[col] if keep is None else df[col][keep]
+            out[col] = _clean_text(values, TEXT_DEFAULTS.get(col, ""))
+
+    # single allocation for the result, columns in canonical order
+    return pd.DataFrame(
+        {c: np.asarray(out[c]) for c in cols}, index=index, columns=cols
+    )
 
-    for col in ("title", "country", "seniority", "stack", "currency"):
-        if col in df.columns:
-            df[col] = df[col].fillna("").astype(str).str.strip()
 
-    if "currency" in df.columns:
-        df["currency"] = df["currency"].replace({None: "USD", "": "USD"}).fillna("USD")
+# Tasks whose status clients follow over the events endpoint
+STREAMED_TASKS = ("process_file", "finalize_shards")
 
-    return df
 
+def _update_state(
+    self: Any | None, *, state: str, meta: dict, progress_id: Optional[str] = None
+) -> None:
+    """Update state when running via Celery; tests (self=None) don't do anything.
 
-def _update_state(self: Any | None, *, state: str, meta: dict) -> None:
-    """Update state when running via Celery; tests (self=None) don't do anything."""
+    The new state is also published on the task's event channel. Shards
+    publish on the channel of `progress_id` (their parent) instead, only to
+    say that the combined progress changed.
+    """
     if self is not None and hasattr(self, "update_state"):
         try:
             self.update_state(state=state, meta=meta)
         except Exception:
             pass
 
+    task_id = getattr(getattr(self, "request", None), "id", None)
+    if progress_id:
+        publish(progress_id, {"refresh": True})
+    elif task_id:
+        publish(task_id, _status_event(task_id, state, meta))
+
+
+def _status_event(task_id: str, state: str, meta: Any, **extra: Any) -> dict:
+    # Same shape as GET /ingest/tasks/{task_id}
+    return {
+        "id": task_id,
+        "state": state,
+        "meta": meta,
+        "ready": False,
+        "successful": False,
+        **extra,
+    }
+
+
+@task_postrun.connect
+def _publish_result(
+    task_id: str = "", task: Any = None, retval: Any = None, state: str = "", **_
+) -> None:
+    """Final event of a streamed task, sent once its result is stored."""
+    if getattr(task, "name", None) not in STREAMED_TASKS:
+        return
+    result = retval if isinstance(retval, dict) else str(retval)
+    event = _status_event(
+        task_id,
+        state,
+        None,
+        ready=True,
+        successful=state == "SUCCESS",
+        result=result,
+    )
+    publish(task_id, event)
+
+
+def _rename_map(columns: List[str], column_map: dict) -> Dict[str, str]:
+    """Map source columns to canonical names, ignoring unknown entries."""
+    return {
+        src: canon
+        for canon, src in column_map.items()
+        if canon in CANON and src in columns
+    }
+
+
+def _ingest(
+    self: Any | None,
+    chunks: Iterable[Chunk],
+    renames: Dict[str, str],
+    size: int,
+    file_id: str,
+    deferred: bool = False,
+    progress_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Rename, normalize and load every chunk, reporting PROGRESS as it goes.
+
+    `size` is the extent chunk offsets are measured against (bytes of the raw
+    file, or rows of a staged one); it is used to extrapolate the total row
+    count before the last chunk is reached. With INGEST_DEDUP, rows already in
+    `jobs` (from any file) are skipped and counted as duplicates. The salary
+    rollups are updated in the same transaction as each chunk.
+
+    Rows go to the upload's partition of `jobs` (see partitions.py). With
+    `deferred` it stays detached and unindexed during the load and is attached,
+    building its indexes, once every chunk is in; its rows are then added to
+    the rollups on attach, so a failed load leaves them untouched. Rows loaded
+    into a partition that is attached already are counted per chunk.
+    """
+    load = get_loader(settings.ingest_loader)
+    rows_read = 0
+    inserted = 0
+    duplicates = 0
+    sample: List[Dict[str, Any]] = []
+
+    # Every chunk is processed on its own, so peak memory depends on
+    # INGEST_CHUNK_ROWS rather than on the file size.
+    with Session(get_engine()) as session:
+        batch_id, table, live = open_partition(session, file_id, attached=not deferred)
+        batch = {"batch_id": batch_id, "file_id": file_id}
+
+        for raw, bytes_read in chunks:
+            rows_read += len(raw)
+            df = _normalize(raw.rename(columns=renames))
+
+            if not df.empty and settings.ingest_dedup:
+                valid = len(df)
+                df = claim_new_rows(session, df, file_id)
+                duplicates += valid - len(df)
+
+            if not df.empty:
+                inserted += load(session, df.assign(**batch), table)
+                # A detached partition is counted when attached, below
+                if settings.analytics_rollups and live:
+                    refresh_rollups(session, df)
+                session.commit()
+
+                if len(sample) < 3:
+                    head = df.head(3 - len(sample)).to_dict(orient="records")
+                    sample.extend(cast(List[Dict[str, Any]], head))
+
+            # Emit PROGRESS after each chunk; total is extrapolated from the
+            # bytes consumed so far and becomes exact on the last chunk.
+            total = estimate_total_rows(rows_read, bytes_read, size)
+            percent = int(rows_read * 100 / max(total, 1))
+            _update_state(
+                self,
+                state="PROGRESS",
+                meta={"processed": rows_read, "total": total, "percent": percent},
+                progress_id=progress_id,
+            )
+
+        if not live:
+            attach_partition(session, batch_id)
+            session.commit()
+
+    return {
+        "inserted": inserted,
+        "total": rows_read,
+        "duplicates": duplicates,
+        "sample": sample,
+    }
+
+
+def _invalidate_analytics(reset: bool = False) -> None:
+    # New data: cached results are stale and API snapshots must reload
+    if settings.analytics_cache_ttl > 0 or settings.analytics_engine == "numpy":
+        try:
+            bump_data_version(reset)
+        except redis.RedisError:
+            # The rows are committed already: don't fail the task over it.
+            # Cached results then expire by TTL instead.
+            logger.exception("could not bump the analytics data version")
+
+
+def _result(file_id: str, stats: Dict[str, Any]) -> dict:
+    if stats["inserted"] == 0 and stats.get("duplicates"):
+        return {
+            "file_id": file_id,
+            "inserted": 0,
+            "duplicates": stats["duplicates"],
+            "note": "all rows were already ingested",
+        }
+    if stats["inserted"] == 0:
+        return {
+            "file_id": file_id,
+            "inserted": 0,
+            "note": "no valid rows after normalization",
+        }
+
+    # Final payload (SUCCESS will be inferred by Celery)
+    return {"file_id": file_id, **stats}
+
+
+def earlier_result(path: Path, file_id: str) -> Tuple[Optional[str], Optional[dict]]:
+    """SHA-256 of an upload (None with dedup off) and, when the same bytes were
+    ingested before, the result of that ingestion answered for this file_id."""
+    if not settings.ingest_dedup:
+        return None, None
+    sha256 = file_sha256(path)
+    with Session(get_engine()) as session:
+        previous = find_ingested(session, sha256)
+    if previous is None:
+        return sha256, None
+    return sha256, duplicate_result(previous, file_id)
+
 
 @celery.task(name="process_file", bind=True)
 def process_file(
@@ -59,79 +335,151 @@ def process_file(
     if not path.exists():
         return {"file_id": file_id, "error": "file not found"}
 
-    # Load dataframe
+    # Only the header is needed to validate the mapping
     _update_state(self, state="STARTED", meta={"stage": "loading"})
-    df = _load_dataframe(path)
+    columns = read_columns(path)
 
     if not column_map:
         return {
             "file_id": file_id,
             "error": "invalid_mapping",
-            "columns": list(df.columns),
+            "columns": columns,
         }
 
     # Validate/rename columns based on mapping
-    rename_map: Dict[str, str] = {
-        canon: src
-        for canon, src in column_map.items()
-        if canon in CANON and src in df.columns
-    }
-    if not rename_map:
+    renames = _rename_map(columns, column_map)
+    if not renames:
         return {
             "file_id": file_id,
             "error": "invalid mapping",
-            "columns": list(df.columns),
+            "columns": columns,
         }
 
-    df = df.rename(columns={v: k for k, v in rename_map.items()})
+    # Same bytes already ingested: answer with the earlier result
+    sha256, previous = earlier_result(path, file_id)
+    if previous is not None:
+        return previous
 
-    # Normalize and compute totals after cleaning
-    df = _normalize(df)
+    chunks, extent = _open_chunks(path, list(renames))
 
-    if df.empty:
-        return {
-            "file_id": file_id,
-            "inserted": 0,
-            "note": "no valid rows after normalization",
-        }
+    # Only COPY can write into a partition that isn't attached yet
+    deferred = settings.ingest_deferred_indexes and settings.ingest_loader == "copy"
+    stats = _ingest(self, chunks, renames, extent, file_id, deferred)
+    result = _result(file_id, stats)
 
-    # Prepare records for chunked insert + progress tracking
-    records: List[Dict[str, Any]] = cast(
-        List[Dict[str, Any]], df.to_dict(orient="records")
-    )
-    total = len(records)
-    processed = 0
-    inserted = 0
-    chunk_size = 1000
+    with Session(get_engine()) as session:
+        finish_batch(session, file_id)
+        # Only once rows loaded: a wrong mapping mustn't answer a corrected one
+        if sha256 is not None and stats["inserted"]:
+            record_ingested(session, sha256, file_id, result)
+    if stats["inserted"]:
+        _invalidate_analytics()
+    return result
 
-    # Using sync engine inside the worker
-    engine = create_engine(
-        settings.alembic_database_url, pool_pre_ping=True, future=True
+
+@celery.task(name="process_shard", bind=True)
+def process_shard(
+    self: Any | None = None,
+    file_id: str = "",
+    column_map: dict | None = None,
+    start: int = 0,
+    end: int = 0,
+    progress_id: str = "",
+) -> dict:
+    """Ingest the rows of one byte range of a CSV upload (see `plan_shards`).
+
+    Progress is announced on the channel of `progress_id`, the sharded task.
+    """
+    path = Path(settings.upload_dir) / file_id
+    columns = read_columns(path)
+    renames = _rename_map(columns, column_map or {})
+    if not renames:
+        return {"error": "invalid mapping", "columns": columns}
+
+    chunks = iter_chunks(
+        path,
+        settings.ingest_chunk_rows,
+        usecols=list(renames),
+        byte_range=(start, end),
     )
+    return _ingest(self, chunks, renames, end - start, file_id, False, progress_id)
+
+
+@celery.task(name="finalize_shards")
+def finalize_shards(results: List[dict], file_id: str = "") -> dict:
+    """Chord callback: merge shard results into a single process_file result."""
+    for res in results:
+        if "error" in res:
+            return {"file_id": file_id, **res}
+
+    sample = [row for res in results for row in res["sample"]][:3]
+    stats = {
+        "inserted": sum(res["inserted"] for res in results),
+        "total": sum(res["total"] for res in results),
+        "duplicates": sum(res.get("duplicates", 0) for res in results),
+        "sample": sample,
+        "shards": len(results),
+    }
+    result = _result(file_id, stats)
+
+    path = Path(settings.upload_dir) / file_id
+    with Session(get_engine()) as session:
+        finish_batch(session, file_id)
+        if settings.ingest_dedup and stats["inserted"] and path.exists():
+            record_ingested(session, file_sha256(path), file_id, result)
+    if stats["inserted"]:
+        _invalidate_analytics()
+    return result
+
+
+@celery.task(name="rebuild_rollups")
+def rebuild_salary_rollups() -> dict:
+    """Recompute the salary rollups from `jobs`, e.g. after enabling them."""
+    with Session(get_engine()) as session:
+        rebuild_rollups(session)
+    _invalidate_analytics()
+    return {"rebuilt": True}
+
+
+@celery.task(name="purge_upload")
+def purge_upload(file_id: str = "") -> dict:
+    """Remove every row an upload loaded by dropping its partition of `jobs`.
 
-    # Chunked insert with progress updates
+    The partition is detached concurrently first, so queries on `jobs` keep
+    running. Then, in one transaction, its rows are taken out of the salary
+    rollups, its fingerprints and ingested-file record are released and it is
+    dropped, so the upload can be ingested again afterwards. Rows other uploads
+    skipped as duplicates of this one's go too (see dedup.forget_upload).
+    """
+    engine = get_engine()
     with Session(engine) as session:
-        for i in range(0, total, chunk_size):
-            chunk = records[i : i + chunk_size]
-            objs = [Job(**row) for row in chunk]
-            session.bulk_save_objects(objs)
-            session.commit()
+        batch = find_batch(session, file_id)
+        if batch is None:
+            return {"file_id": file_id, "error": "not found"}
+        batch_id = batch.id
 
-            inserted += len(objs)
-            processed = min(i + len(objs), total)
-            percent = int(processed * 100 / max(total, 1))
+        # The rollups count a partition's rows from its attach on. Finishing
+        # the batch records that once detached: a detached partition of an
+        # unfinished batch is an interrupted deferred load, never counted.
+        counted = batch.finished_at is not None
+        if not counted and is_attached(session, batch_id):
+            finish_batch(session, file_id)
+            counted = True
 
-            # Emit PROGRESS after each committed batch
-            _update_state(
-                self,
-                state="PROGRESS",
-                meta={"processed": processed, "total": total, "percent": percent},
-            )
+    detach_partition(engine, batch_id)
 
-    # Final payload (SUCCESS will be inferred by Celery)
-    return {
-        "file_id": file_id,
-        "inserted": inserted,
-        "total": total,
-        "sample": records[:3],
-    }
+    with Session(engine) as session:
+        if settings.analytics_rollups and counted:
+            subtract_rollups(session, partition_name(batch_id))
+        forget_upload(session, file_id)
+        drop_partition(session, batch_id)
+        session.commit()
+
+    _invalidate_analytics(reset=True)
+    return {"file_id": file_id, "purged": True}
+
+
+@celery.task(name="worker_pool_stats")
+def worker_pool_stats() -> dict:
+    """Report the DB pool of the worker process that picks up this task."""
+    return pool_stats()
@@ -0,0 +1,88 @@
+"""Benchmark `_normalize` against the previous implementation.
+
+Usage (from backend/):
+    python -m benchmarks.bench_normalize --rows 3000000
+"""
+
+import argparse
+import time
+from typing import Callable, cast
+
+import numpy as np
+import pandas as pd
+
+from app.workers.tasks import CANON, _normalize
+
+
+def legacy_normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """`_normalize` as it was before the dictionary-encoded rewrite."""
+    cols: list[str] = [c for c in CANON if c in df.columns]
+    df = cast(pd.DataFrame, df.loc[:, cols].copy())
+
+    if "salary" in df.columns:
+        df["salary"] = pd.to_numeric(df["salary"], errors="coerce")
+        df = cast(pd.DataFrame, df.loc[df["salary"].notna()].copy())
+
+    for col in ("title", "country", "seniority", "stack", "currency"):
+        if col in df.columns:
+            df[col] = df[col].fillna("").astype(str).str.strip()
+
+    if "currency" in df.columns:
+        df["currency"] = df["currency"].replace({None: "USD", "": "USD"}).fillna("USD")
+
+    return df
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic upload: low-cardinality text, some blanks/NaN and bad salaries."""
+    rng = np.random.default_rng(seed)
+
+    def pick(labels: list, size: int) -> np.ndarray:
+        return np.asarray(labels, dtype=object)[rng.integers(0, len(labels), size)]
+
+    titles = [f" Engineer {i} " for i in range(200)] + [None, ""]
+    salary = rng.integers(20_000, 300_000, rows).astype(str).astype(object)
+    salary[rng.random(rows) < 0.02] = "n/a"
+
+    return pd.DataFrame(
+        {
+            "title": pick(titles, rows),
+            "salary": salary,
+            "currency": pick(["USD", " EUR", "", None, "BRL "], rows),
+            "country": pick([" BR", "US ", "DE", "PT", None], rows),
+            "seniority": pick(["Junior", " Mid", "Senior ", "Lead"], rows),
+            "stack": pick(["Python", "Node,Express,React", " Go ", "Java"], rows),
+            "ignored": rng.random(rows),
+        }
+    )
+
+
+def _best_of(fn: Callable[[pd.DataFrame], pd.DataFrame], df: pd.DataFrame, n: int):
+    best = float("inf")
+    out = None
+    for _ in range(n):
+        start = time.perf_counter()
+        out = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    legacy_s, expected = _best_of(legacy_normalize, df, args.repeat)
+    new_s, actual = _best_of(_normalize, df, args.repeat)
+    pd.testing.assert_frame_equal(actual, expected)
+
+    print(f"rows:    {args.rows:,}")
+    print(f"legacy:  {legacy_s:.3f}s")
+    print(f"current: {new_s:.3f}s")
+    print(f"speedup: {legacy_s / new_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
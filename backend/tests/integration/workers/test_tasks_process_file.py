@@ -9,6 +9,8 @@ from types import SimpleNamespace
 import pandas as pd
 import pytest
 
+from app.workers import loaders
+
 pytestmark = pytest.mark.integration
 
 
@@ -67,13 +69,21 @@ def setup_tasks_for_test(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
         {
             "UPLOAD_DIR": str(tmp_path),
             "ALEMBIC_DATABASE_URL": "sqlite:///:memory:",
+            "INGEST_LOADER": "orm",
+            "INGEST_DEDUP": "false",
+            "ANALYTICS_ROLLUPS": "false",
+            "ANALYTICS_CACHE_TTL": "0",
         },
     )
-    monkeypatch.setattr(tasks, "create_engine", lambda *a, **k: object(), raising=True)
+    monkeypatch.setattr(tasks, "get_engine", lambda: object(), raising=True)
     monkeypatch.setattr(
         tasks, "Session", lambda engine: FakeSession(engine), raising=True
     )
-    monkeypatch.setattr(tasks, "Job", DummyJob, raising=True)
+    monkeypatch.setattr(loaders, "Job", DummyJob, raising=True)
+    monkeypatch.setattr(
+        tasks, "open_partition", lambda session, file_id, attached: (1, "jobs_b1", True)
+    )
+    monkeypatch.setattr(tasks, "finish_batch", lambda session, file_id: None)
     return tasks
 
 
@@ -126,6 +136,29 @@ def test_process_file_normalization_empty(
     assert "no valid rows" in res["note"]
 
 
+def test_results_are_recorded_only_when_rows_were_loaded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    tasks = setup_tasks_for_test(tmp_path, monkeypatch)
+    monkeypatch.setattr(tasks.settings, "ingest_dedup", True)
+    monkeypatch.setattr(tasks, "find_ingested", lambda session, sha256: None)
+    monkeypatch.setattr(tasks, "claim_new_rows", lambda session, df, file_id: df)
+    recorded = []
+    monkeypatch.setattr(
+        tasks, "record_ingested", lambda s, sha256, fid, res: recorded.append(res)
+    )
+    pd.DataFrame({"A": ["Dev"], "B": ["10"]}).to_csv(tmp_path / "data.csv", index=False)
+
+    # wrong mapping: no salary survives, and the same bytes can be mapped again
+    wrong = tasks.process_file(file_id="data.csv", column_map={"salary": "A"})
+    assert wrong["inserted"] == 0 and recorded == []
+
+    right = tasks.process_file(
+        file_id="data.csv", column_map={"title": "A", "salary": "B"}
+    )
+    assert right["inserted"] == 1 and recorded == [right]
+
+
 def test_process_file_success(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     tasks = setup_tasks_for_test(tmp_path, monkeypatch)
     p = tmp_path / "data.csv"
@@ -149,9 +182,177 @@ def test_process_file_success(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
         "stack": "Stack",
     }
 
+    saved = []
+    monkeypatch.setattr(
+        FakeSession, "bulk_save_objects", lambda self, objs: saved.extend(objs)
+    )
+
     res = tasks.process_file(file_id="data.csv", column_map=column_map)
     assert res["file_id"] == "data.csv"
     assert res["inserted"] == 2
     assert isinstance(res["sample"], list)
     assert len(res["sample"]) <= 3
     assert res["sample"][0]["currency"] == "USD"
+    # rows are tagged with their upload's batch
+    assert {(j.batch_id, j.file_id) for j in saved} == {(1, "data.csv")}
+
+
+def test_process_file_streams_in_chunks(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("INGEST_CHUNK_ROWS", "2")
+    tasks = setup_tasks_for_test(tmp_path, monkeypatch)
+    p = tmp_path / "data.csv"
+    pd.DataFrame(
+        {
+            "JobTitle": ["Dev"] * 5,
+            "Pay": ["100", "200", "bad", "400", "500"],
+            "Extra": ["x"] * 5,
+        }
+    ).to_csv(p, index=False)
+
+    states = []
+
+    class _Task:
+        def update_state(self, state, meta):
+            states.append((state, meta))
+
+    res = tasks.process_file(
+        _Task(), file_id="data.csv", column_map={"title": "JobTitle", "salary": "Pay"}
+    )
+    assert res["inserted"] == 4
+    assert res["total"] == 5
+
+    progress = [meta for state, meta in states if state == "PROGRESS"]
+    assert [m["processed"] for m in progress] == [2, 4, 5]
+    assert progress[-1]["total"] == 5
+    assert progress[-1]["percent"] == 100
+
+
+def test_process_file_publishes_progress_events(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("INGEST_CHUNK_ROWS", "2")
+    tasks = setup_tasks_for_test(tmp_path, monkeypatch)
+    published = []
+    monkeypatch.setattr(tasks, "publish", lambda task_id, e: published.append(e))
+    p = tmp_path / "data.csv"
+    pd.DataFrame({"JobTitle": ["Dev"] * 3, "Pay": ["1", "2", "3"]}).to_csv(
+        p, index=False
+    )
+
+    class _Task:
+        request = SimpleNamespace(id="task-1")
+
+        def update_state(self, state, meta):
+            pass
+
+    column_map = {"title": "JobTitle", "salary": "Pay"}
+    tasks.process_file(_Task(), file_id="data.csv", column_map=column_map)
+    tasks.process_shard(
+        _Task(),
+        file_id="data.csv",
+        column_map=column_map,
+        start=len(b"JobTitle,Pay\n"),
+        end=p.stat().st_size,
+        progress_id="parent",
+    )
+
+    progress = [e for e in published if e.get("state") == "PROGRESS"]
+    assert [e["meta"]["processed"] for e in progress] == [2, 3]
+    assert all(e["id"] == "task-1" and not e["ready"] for e in progress)
+    # shards only tell the sharded task that its combined progress changed
+    assert published[-1] == {"refresh": True}
+
+
+def test_process_shards_match_single_task(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    tasks = setup_tasks_for_test(tmp_path, monkeypatch)
+    from app.workers.readers import plan_shards
+
+    p = tmp_path / "data.csv"
+    pd.DataFrame(
+        {"JobTitle": [f"Dev {i}" for i in range(50)], "Pay": range(50)}
+    ).to_csv(p, index=False)
+    column_map = {"title": "JobTitle", "salary": "Pay"}
+
+    results = [
+        tasks.process_shard(file_id="data.csv", column_map=column_map, start=a, end=b)
+        for a, b in plan_shards(p, 3)
+    ]
+    merged = tasks.finalize_shards(results, file_id="data.csv")
+
+    assert merged["shards"] == 3
+    assert merged["inserted"] == 50
+    assert merged["total"] == 50
+    assert merged["sample"][0]["title"] == "Dev 0"
+
+
+def test_finalize_shards_reports_mapping_error(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    tasks = setup_tasks_for_test(tmp_path, monkeypatch)
+    res = tasks.finalize_shards(
+        [{"error": "invalid mapping", "columns": ["A"]}], file_id="data.csv"
+    )
+    assert res == {"file_id": "data.csv", "error": "invalid mapping", "columns": ["A"]}
+
+
+def test_cache_invalidation_failure_does_not_fail_the_task(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    import redis
+
+    tasks = setup_tasks_for_test(tmp_path, monkeypatch)
+    monkeypatch.setattr(tasks.settings, "analytics_cache_ttl", 60)
+
+    def unreachable(reset=False):
+        raise redis.ConnectionError("redis is down")
+
+    monkeypatch.setattr(tasks, "bump_data_version", unreachable)
+    pd.DataFrame({"JobTitle": ["Dev"], "Pay": [10]}).to_csv(
+        tmp_path / "data.csv", index=False
+    )
+
+    res = tasks.process_file(
+        file_id="data.csv", column_map={"title": "JobTitle", "salary": "Pay"}
+    )
+    assert res["inserted"] == 1
+
+
+def test_deferred_rerun_into_an_attached_partition_counts_rollups(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    tasks = setup_tasks_for_test(tmp_path, monkeypatch)
+    monkeypatch.setattr(tasks.settings, "ingest_loader", "copy")
+    monkeypatch.setattr(tasks.settings, "ingest_deferred_indexes", True)
+    monkeypatch.setattr(tasks.settings, "analytics_rollups", True)
+    monkeypatch.setattr(tasks, "get_loader", lambda name: lambda s, df, t: len(df))
+
+    live = set()
+    counted = []
+
+    def attach_partition(session, batch_id):
+        live.add("data.csv")
+        counted.append("attach")
+
+    monkeypatch.setattr(
+        tasks,
+        "open_partition",
+        lambda session, file_id, attached: (1, "jobs_b1", file_id in live),
+    )
+    monkeypatch.setattr(tasks, "attach_partition", attach_partition)
+    monkeypatch.setattr(tasks, "refresh_rollups", lambda s, df: counted.append(len(df)))
+    pd.DataFrame({"JobTitle": ["Dev", "QA"], "Pay": [10, 20]}).to_csv(
+        tmp_path / "data.csv", index=False
+    )
+    column_map = {"title": "JobTitle", "salary": "Pay"}
+
+    tasks.process_file(file_id="data.csv", column_map=column_map)
+    # first run: loaded detached, counted by the attach
+    assert counted == ["attach"]
+
+    tasks.process_file(file_id="data.csv", column_map=column_map)
+    # the same file_id again: its partition is live, so rows are counted per chunk
+    assert counted == ["attach", 2]
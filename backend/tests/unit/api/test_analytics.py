@@ -0,0 +1,241 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import status
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from app.jobs import analytics
+from app.jobs.schemas import AnalyticsBatchIn
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_summary_reads_rollups_when_enabled(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", True)
+    sql = _sql(analytics.salary_summary_query("dev", None, "python"))
+
+    assert "job_salary_rollups" in sql
+    assert "percentile_cont" not in sql
+    assert "FROM jobs" not in sql
+
+
+def test_summary_scans_jobs_when_rollups_are_disabled(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", False)
+    sql = _sql(analytics.salary_summary_query("dev", None, None))
+
+    assert "percentile_cont" in sql
+    assert "job_salary_rollups" not in sql
+
+
+def test_stack_compare_groups_rollups_by_stack(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", True)
+    query = analytics.stack_compare_query(None, "br")
+
+    assert [c.name for c in query.selected_columns] == ["stack", "p50", "n"]
+    assert "job_salary_rollups" in _sql(query)
+    # the group of jobs without a stack is "", as when scanning jobs
+    assert "nullif" not in _sql(query)
+
+
+def test_exact_and_prefix_match_use_case_folded_keys(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", False)
+    exact = analytics.salary_summary_query(" Dev ", None, None, "exact")
+    prefix = analytics.stack_compare_query("Dev_", None, "prefix")
+
+    assert "jobs.title_key = " in _sql(exact)
+    assert exact.compile().params["title_key_1"] == "dev"
+    assert "jobs.title_key LIKE" in _sql(prefix)
+    # LIKE wildcards typed by the user are matched literally
+    assert prefix.compile().params["title_key_1"] == "dev\\_%"
+
+
+def test_contains_match_escapes_wildcards(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", True)
+    query = analytics.salary_summary_query("100%", None, None)
+
+    assert "job_salary_rollups.title ILIKE" in _sql(query)
+    assert query.compile().params["title_1"] == "%100\\%%"
+
+
+def test_approximate_mode_reads_sketches_and_reports_error(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", True)
+    summary = analytics.salary_summary_query("dev", None, None, approximate=True)
+    compare = analytics.stack_compare_query(None, None, approximate=True)
+
+    assert "job_salary_sketches" in _sql(summary)
+    # interpolates between the buckets at floor(h) and ceil(h), like the exact
+    # percentile_cont: {100, 200} gives ~150 for p50, not ~100
+    assert "ceil(" in _sql(summary) and "floor(" in _sql(summary)
+    assert [c.name for c in summary.selected_columns] == [
+        "p50",
+        "p75",
+        "p90",
+        "n",
+        "relative_error",
+    ]
+    assert [c.name for c in compare.selected_columns] == [
+        "stack",
+        "p50",
+        "n",
+        "relative_error",
+    ]
+
+
+def _batch(*queries):
+    return AnalyticsBatchIn(queries=list(queries)).queries
+
+
+def test_batch_compiles_to_one_grouping_sets_statement():
+    specs = _batch(
+        {"filters": {"title": "dev"}},
+        {"group_by": "stack", "percentiles": [0.5]},
+        {"group_by": "country", "filters": {"stack": "py"}, "match": "exact"},
+    )
+    sql = _sql(analytics.batch_query(specs))
+
+    assert sql.count("FROM jobs") == 1
+    assert "GROUPING SETS((), (jobs.stack), (jobs.country))" in sql
+    assert "FILTER (WHERE jobs.stack_key = " in sql
+
+
+def test_batch_results_split_rows_by_grouping_set():
+    specs = _batch(
+        {"id": "all"},
+        {"id": "by_stack", "group_by": "stack", "percentiles": [0.5]},
+    )
+    # groups are [stack]: () has grouping_id 1, (stack) has 0
+    rows = [
+        {"stack": None, "grouping_id": 1, "q0_p50": 10.0, "q0_p75": 12.0,
+         "q0_p90": 15.0, "q0_n": 3, "q1_p50": 10.0, "q1_n": 3},
+        {"stack": "go", "grouping_id": 0, "q0_p50": 9.0, "q0_p75": 9.0,
+         "q0_p90": 9.0, "q0_n": 1, "q1_p50": 9.0, "q1_n": 1},
+        {"stack": "py", "grouping_id": 0, "q0_p50": 11.0, "q0_p75": 12.0,
+         "q0_p90": 12.0, "q0_n": 2, "q1_p50": 11.0, "q1_n": 2},
+    ]  # fmt: skip
+
+    results = analytics.batch_results(specs, rows)
+
+    assert results[0] == {
+        "id": "all",
+        "rows": [{"p50": 10.0, "p75": 12.0, "p90": 15.0, "n": 3}],
+    }
+    assert results[1]["rows"] == [
+        {"stack": "py", "p50": 11.0, "n": 2},
+        {"stack": "go", "p50": 9.0, "n": 1},
+    ]
+
+
+def test_batch_specs_read_rollups_in_one_statement(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", True)
+    specs = _batch(
+        {"filters": {"title": "dev"}},
+        {
+            "group_by": "seniority",
+            "filters": {"technology": "go"},
+            "percentiles": [0.9],
+        },
+    )
+    query = analytics.batch_rollup_query(specs)
+    sql = _sql(query)
+
+    assert [c.name for c in query.selected_columns] == [
+        "spec", "key", "v0", "v1", "v2", "n"
+    ]  # fmt: skip
+    assert sql.count("UNION ALL") == 1
+    assert "job_salary_rollups.technologies @> " in sql
+    assert "FROM jobs" not in sql
+
+
+def test_batch_rollup_results_split_rows_by_spec():
+    specs = _batch(
+        {"id": "all", "percentiles": [0.5, 0.9]},
+        {"id": "by_stack", "group_by": "stack", "percentiles": [0.5]},
+    )
+    rows = [
+        {"spec": 1, "key": "go", "v0": 9.0, "v1": None, "n": 1},
+        {"spec": 0, "key": None, "v0": 10.0, "v1": 15.0, "n": 3},
+        {"spec": 1, "key": "py", "v0": 11.0, "v1": None, "n": 2},
+    ]
+
+    results = analytics.batch_rollup_results(specs, rows)
+
+    assert results[0] == {"id": "all", "rows": [{"p50": 10.0, "p90": 15.0, "n": 3}]}
+    assert results[1]["rows"] == [
+        {"stack": "py", "p50": 11.0, "n": 2},
+        {"stack": "go", "p50": 9.0, "n": 1},
+    ]
+
+
+def test_batch_rejects_invalid_percentiles():
+    with pytest.raises(ValidationError):
+        _batch({"percentiles": [1.5]})
+
+
+def test_technology_filter_is_an_exact_array_lookup(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", False)
+    query = analytics.salary_summary_query(None, None, None, technology=" React ")
+    sql = _sql(query)
+
+    assert "jobs.technologies @> " in sql
+    assert "ILIKE" not in sql
+    assert query.compile().params["technologies_1"] == ["react"]
+
+
+@pytest.mark.parametrize("rollups", [True, False])
+def test_compare_by_technology_unnests_stacks(monkeypatch, rollups):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", rollups)
+    query = analytics.stack_compare_query(None, None, group="technology")
+
+    assert [c.name for c in query.selected_columns] == ["technology", "p50", "n"]
+    assert "unnest(" in _sql(query) and "technologies" in _sql(query)
+
+
+@pytest.mark.parametrize(
+    "rollups,approximate,table",
+    [(True, False, "job_salary_rollups"), (True, True, "job_salary_sketches"),
+     (False, False, "FROM jobs")],
+)  # fmt: skip
+def test_histogram_bins_in_the_database(monkeypatch, rollups, approximate, table):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", rollups)
+    sql = _sql(analytics.histogram_query("dev", None, None, approximate=approximate))
+
+    assert table in sql
+    assert "width_bucket(" in sql
+    # the filtered rows are read once, for both the bounds and the counts
+    assert sql.startswith("WITH histogram_rows AS")
+
+
+@pytest.mark.parametrize("bound", ["low=0", "high=-5", "low=-1&high=100"])
+def test_log_histogram_rejects_non_positive_bounds(client, bound):
+    # ln() of such a bound would fail in the database
+    resp = client.get(f"/api/jobs/analytics/salary/histogram?scale=log&{bound}")
+
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_time_bounds_scan_jobs_with_a_batch_range(monkeypatch):
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", True)
+    since = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    sql = _sql(analytics.salary_summary_query("dev", None, None, since=since))
+
+    # no time dimension in the rollups; batch ids let partitions be pruned
+    assert "job_salary_rollups" not in sql
+    assert "jobs.batch_id >= (SELECT min(ingest_batches.id)" in sql
+    assert "jobs.created_at >= " in sql
+
+
+def test_histogram_result_fills_empty_bins_and_edges():
+    rows = [
+        {"bucket": 1, "n": 3, "low": 100.0, "high": 10_000.0},
+        {"bucket": 2, "n": 1, "low": 100.0, "high": 10_000.0},
+    ]
+
+    res = analytics.histogram_result(rows, 2, "log")
+
+    assert res["n"] == 4
+    assert [b["count"] for b in res["bins"]] == [3, 1]
+    assert [b["lower"] for b in res["bins"]] == [100.0, pytest.approx(1000.0)]
+    assert analytics.histogram_result([], 2, "linear")["bins"] == []
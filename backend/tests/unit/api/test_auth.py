@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.users import auth, services
+from app.users.models import User
+
+
+class FakeContext:
+    def hash(self, password):
+        return f"hashed:{password}:{threading.current_thread().name}"
+
+    def verify(self, plain, hashed):
+        return hashed.startswith(f"hashed:{plain}:")
+
+
+class FakeResult:
+    def __init__(self, user):
+        self.user = user
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self.user
+
+
+class FakeDB:
+    def __init__(self, user):
+        self.user = user
+
+    async def execute(self, query):
+        return FakeResult(self.user)
+
+
+@pytest.fixture
+def fake_bcrypt(monkeypatch):
+    monkeypatch.setattr(auth, "pwd_context", FakeContext())
+
+
+def test_hashing_runs_on_the_bcrypt_pool(fake_bcrypt):
+    hashed = asyncio.run(auth.hash_password("s3cret"))
+
+    assert hashed.startswith("hashed:s3cret:bcrypt")
+    assert asyncio.run(auth.verify_password("s3cret", hashed)) is True
+    assert asyncio.run(auth.verify_password("wrong", hashed)) is False
+
+
+def test_authenticate_rejects_a_wrong_password(fake_bcrypt):
+    user = User(email="a@b.io", hashed_password="hashed:s3cret:bcrypt_0")
+    db = FakeDB(user)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(services.authenticate_user(db, "a@b.io", "wrong"))
+    assert exc.value.status_code == 401
+
+    token = asyncio.run(services.authenticate_user(db, "a@b.io", "s3cret"))
+    assert token["token_type"] == "bearer"
+
+
+def test_saturated_pool_answers_503(fake_bcrypt, monkeypatch):
+    monkeypatch.setattr(auth, "_hash_slots", asyncio.Semaphore(0))
+    monkeypatch.setattr(settings, "auth_hash_wait_seconds", 0.01)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.verify_password("s3cret", "hashed:s3cret:x"))
+    assert exc.value.status_code == 503
+    assert exc.value.headers == {"Retry-After": "1"}
@@ -0,0 +1,90 @@
+import asyncio
+
+from app.infrastructure import cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
+
+
+def _use(monkeypatch, fake):
+    monkeypatch.setattr(cache, "get_client", lambda: fake)
+    monkeypatch.setattr(cache.settings, "analytics_cache_ttl", 60)
+
+
+def test_cache_key_ignores_unset_filters_and_case():
+    a = cache.cache_key("summary", {"title": "Dev", "country": None}, "3")
+    b = cache.cache_key("summary", {"country": "", "title": "dev"}, "3")
+    c = cache.cache_key("summary", {"title": "dev"}, "4")
+
+    assert a == b
+    assert a != c
+
+
+def test_concurrent_misses_run_the_query_once(monkeypatch):
+    fake = FakeRedis()
+    _use(monkeypatch, fake)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"n": 1}
+
+    async def scenario():
+        return await asyncio.gather(
+            *[cache.cached("summary", {"title": "dev"}, compute) for _ in range(5)]
+        )
+
+    assert asyncio.run(scenario()) == [{"n": 1}] * 5
+    assert len(calls) == 1
+    # now served from Redis
+    assert asyncio.run(cache.cached("summary", {"title": "dev"}, compute)) == {"n": 1}
+    assert len(calls) == 1
+
+
+def test_data_version_bump_makes_entries_stale(monkeypatch):
+    fake = FakeRedis()
+    _use(monkeypatch, fake)
+    results = iter([{"n": 1}, {"n": 2}])
+
+    async def compute():
+        return next(results)
+
+    first = asyncio.run(cache.cached("summary", {}, compute))
+    asyncio.run(fake.incr(cache.DATA_VERSION_KEY))
+    second = asyncio.run(cache.cached("summary", {}, compute))
+
+    assert (first, second) == ({"n": 1}, {"n": 2})
+
+
+def test_waiters_recompute_when_the_running_request_is_cancelled(monkeypatch):
+    fake = FakeRedis()
+    _use(monkeypatch, fake)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"n": len(calls)}
+
+    async def scenario():
+        owner = asyncio.create_task(cache.cached("summary", {}, compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.cached("summary", {}, compute))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await waiter, owner.cancelled()
+
+    assert asyncio.run(scenario()) == ({"n": 2}, True)
+    assert len(calls) == 2
@@ -0,0 +1,92 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from app.jobs import listing
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def _row(i: int) -> dict:
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    row = {c: None for c in listing.COLUMN_NAMES}
+    row.update(id=i, title=f"Dev {i}", salary=1000.0 * i, created_at=created)
+    return row
+
+
+def test_jobs_query_is_keyset_paginated_with_analytics_filters():
+    sql = _sql(listing.jobs_query("dev", None, None, technology="go", after=42))
+
+    assert "jobs.id > " in sql
+    assert "ORDER BY jobs.id" in sql
+    assert "OFFSET" not in sql
+    assert "jobs.title ILIKE" in sql and "jobs.technologies @>" in sql
+
+
+def test_page_result_returns_cursor_only_when_more_rows_exist():
+    rows = [_row(i) for i in (3, 5, 8)]
+
+    assert listing.page_result(rows, 2)["next_after"] == 5
+    assert [r["id"] for r in listing.page_result(rows, 2)["items"]] == [3, 5]
+    assert listing.page_result(rows, 3)["next_after"] is None
+
+
+class FakeResult:
+    def __init__(self, batches):
+        self.batches = batches
+
+    def mappings(self):
+        return self
+
+    async def partitions(self):
+        for batch in self.batches:
+            yield batch
+
+
+class FakeSession:
+    def __init__(self, batches, calls):
+        self.batches, self.calls = batches, calls
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def stream(self, query):
+        self.calls.append(query.get_execution_options())
+        return FakeResult(self.batches)
+
+
+def _export(monkeypatch, fmt):
+    calls = []
+    batches = [[_row(1), _row(2)], [_row(3)]]
+    monkeypatch.setattr(listing, "async_session", lambda: FakeSession(batches, calls))
+
+    async def collect():
+        return [c async for c in listing.export_rows(listing.jobs_query(), fmt)]
+
+    return asyncio.run(collect()), calls
+
+
+def test_export_streams_one_chunk_per_cursor_batch(monkeypatch):
+    chunks, calls = _export(monkeypatch, "ndjson")
+
+    assert calls[0]["yield_per"] == listing.EXPORT_BATCH_ROWS
+    assert len(chunks) == 2
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
+    assert json.loads(lines[0])["created_at"] == "2026-01-01T00:00:00+00:00"
+
+
+def test_csv_export_sends_the_header_first(monkeypatch):
+    chunks, _ = _export(monkeypatch, "csv")
+
+    assert chunks[0].decode().strip() == ",".join(listing.COLUMN_NAMES)
+    body = b"".join(chunks[1:]).decode().splitlines()
+    assert body[0].startswith("1,Dev 1,,,,1000.0,")
+    assert len(body) == 3
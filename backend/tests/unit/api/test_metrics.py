@@ -0,0 +1,74 @@
+import logging
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.infrastructure.instrumentation import (
+    TimedQueuePool,
+    current_route,
+    instrument_engine,
+)
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def engine(tmp_path: Path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'metrics.db'}",
+        poolclass=TimedQueuePool,
+        pool_logging_name="unit",
+    )
+    instrument_engine(engine, "unit")
+    yield engine
+    engine.dispose()
+
+
+def test_metrics_endpoint_reports_requests_by_route(client):
+    client.get("/api/jobs/ingest/uploads/nope")
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert (
+        'skillora_http_request_seconds_count{method="GET",'
+        'route="get_resumable_upload",status="404"}'
+    ) in resp.text
+
+
+def test_statements_are_timed_by_route(engine):
+    labels = dict(engine="unit", route="list_jobs", operation="SELECT")
+    before = _sample("skillora_db_query_seconds_count", **labels)
+    waits = _sample("skillora_db_pool_wait_seconds_count", engine="unit")
+
+    token = current_route.set("list_jobs")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            out = _sample(
+                "skillora_db_pool_connections", engine="unit", state="checked_out"
+            )
+            assert out == 1
+    finally:
+        current_route.reset(token)
+
+    assert _sample("skillora_db_query_seconds_count", **labels) == before + 1
+    assert _sample("skillora_db_pool_wait_seconds_count", engine="unit") == waits + 1
+    assert (
+        _sample("skillora_db_pool_connections", engine="unit", state="checked_in") == 1
+    )
+
+
+def test_slow_statements_are_logged(engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "db_slow_query_ms", 1e-6)
+
+    with caplog.at_level(logging.WARNING), engine.connect() as conn:
+        conn.execute(text("SELECT   2"))
+
+    assert "slow query" in caplog.text and "SELECT 2" in caplog.text
+    assert _sample("skillora_db_slow_queries_total", engine="unit", route="-") >= 1
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from app.jobs import progress
+
+
+def _status(state, ready=False, processed=0):
+    return {
+        "id": "t1",
+        "state": state,
+        "meta": {"processed": processed},
+        "ready": ready,
+    }
+
+
+def _run(monkeypatch, events, statuses):
+    events, statuses = iter(events), iter(statuses)
+
+    @asynccontextmanager
+    async def subscription(task_id):
+        yield task_id
+
+    async def next_event(pubsub, timeout):
+        return next(events)
+
+    monkeypatch.setattr(progress, "subscription", subscription)
+    monkeypatch.setattr(progress, "next_event", next_event)
+    monkeypatch.setattr(progress, "task_status", lambda task_id: next(statuses))
+
+    async def collect():
+        return [chunk.decode() async for chunk in progress.task_events("t1")]
+
+    return asyncio.run(collect())
+
+
+def _data(chunk):
+    assert chunk.startswith("event: status\ndata: ")
+    return json.loads(chunk.split("data: ", 1)[1])
+
+
+def test_events_forward_published_statuses_until_ready(monkeypatch):
+    final = {**_status("SUCCESS", ready=True), "result": {"inserted": 3}}
+    chunks = _run(
+        monkeypatch,
+        events=[_status("PROGRESS", processed=2), None, final],
+        statuses=[_status("STARTED")],
+    )
+
+    assert [_data(c)["state"] for c in chunks if not c.startswith(":")] == [
+        "STARTED",
+        "PROGRESS",
+        "SUCCESS",
+    ]
+    # an idle period sends a comment, which EventSource ignores
+    assert chunks[2] == ": keep-alive\n\n"
+
+
+def test_shard_notifications_reread_the_combined_status(monkeypatch):
+    chunks = _run(
+        monkeypatch,
+        events=[{"refresh": True}],
+        statuses=[_status("PROGRESS", processed=1), _status("SUCCESS", ready=True)],
+    )
+
+    assert [_data(c)["state"] for c in chunks] == ["PROGRESS", "SUCCESS"]
+
+
+def test_finished_task_sends_one_event(monkeypatch):
+    chunks = _run(monkeypatch, events=[], statuses=[_status("SUCCESS", ready=True)])
+
+    assert len(chunks) == 1
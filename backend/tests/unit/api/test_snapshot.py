@@ -0,0 +1,151 @@
+import asyncio
+import contextlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.jobs import analytics
+from app.jobs import snapshot as snapshot_module
+from app.jobs.schemas import AnalyticsBatchIn
+from app.jobs.snapshot import JobsSnapshot
+
+
+def _jobs(rows: int, seed: int = 0, start_id: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(start_id, start_id + rows),
+            "salary": rng.integers(1_000, 20_000, rows).astype(float),
+            "title": rng.choice(["Backend Dev", "Frontend Dev", "QA"], rows),
+            "country": rng.choice(["Brazil", "Portugal", None], rows),
+            "stack": rng.choice(["python", "go", "java", None], rows),
+            "seniority": rng.choice(["junior", "senior"], rows),
+        }
+    )
+
+
+@pytest.fixture
+def loaded():
+    snap = JobsSnapshot()
+    first, second = _jobs(500, seed=1), _jobs(300, seed=2, start_id=501)
+    snap.append(first)
+    snap.append(second)  # incremental: codes keep growing
+    return snap, pd.concat([first, second], ignore_index=True)
+
+
+def test_summary_matches_percentile_cont(loaded):
+    snap, df = loaded
+    sel = df[df["title"].str.lower().str.contains("dev")]
+
+    res = snap.salary_summary(title="DEV")
+
+    assert res["n"] == len(sel)
+    assert res["p75"] == pytest.approx(np.percentile(sel["salary"], 75))
+
+
+def test_exact_and_prefix_match(loaded):
+    snap, df = loaded
+
+    assert snap.salary_summary("exact", country=" brazil ")["n"] == int(
+        (df["country"] == "Brazil").sum()
+    )
+    assert snap.salary_summary("prefix", title="back")["n"] == int(
+        (df["title"] == "Backend Dev").sum()
+    )
+    assert snap.salary_summary(title="nobody") == {
+        "p50": None,
+        "p75": None,
+        "p90": None,
+        "n": 0,
+    }
+
+
+def test_stack_compare_matches_groupby_median(loaded):
+    snap, df = loaded
+    sel = df[df["country"] == "Portugal"]
+    expected = sel.groupby(sel["stack"].fillna(""))["salary"].agg(["median", "size"])
+
+    rows = snap.stack_compare("exact", country="portugal")
+
+    assert [r["p50"] for r in rows] == sorted((r["p50"] for r in rows), reverse=True)
+    for r in rows:
+        ref = expected.loc[r["stack"]]
+        assert (r["p50"], r["n"]) == (ref["median"], ref["size"])
+
+
+def test_percentiles_per_group_match_pandas_quantiles(loaded):
+    snap, df = loaded
+    sel = df[df["title"] == "QA"]
+    expected = sel.groupby("seniority")["salary"].quantile(0.9)
+
+    rows = snap.percentiles({"p90": 0.9}, "seniority", "exact", title="qa")
+
+    assert {r["seniority"]: r["p90"] for r in rows} == pytest.approx(expected.to_dict())
+    assert sum(r["n"] for r in rows) == len(sel)
+
+
+def test_stats_report_memory_footprint(loaded):
+    snap, _ = loaded
+    stats = snap.stats()
+
+    assert stats["rows"] == 800
+    assert stats["distinct"]["stack"] == 4  # None is stored as ""
+    assert stats["memory_bytes"] >= 800 * (8 + 4 * 4)
+
+
+def test_rows_committed_late_with_lower_ids_are_loaded(monkeypatch):
+    # Two uploads load concurrently: batch 1 draws ids 1-3, batch 2 ids 4-6,
+    # and batch 2 finishes (commits) first
+    jobs = pd.concat(
+        [_jobs(3).assign(batch_id=1), _jobs(3, start_id=4).assign(batch_id=2)]
+    )
+    finished = {}
+
+    async def finished_batches(self, session):
+        return dict(finished)
+
+    async def fetch(self, session, batch_ids, after_id):
+        rows = jobs[jobs["batch_id"].isin(batch_ids) & (jobs["id"] > after_id)]
+        return rows.drop(columns="batch_id")
+
+    monkeypatch.setattr(JobsSnapshot, "_finished_batches", finished_batches)
+    monkeypatch.setattr(JobsSnapshot, "_fetch", fetch)
+    monkeypatch.setattr(snapshot_module, "async_session", contextlib.nullcontext)
+    snap = JobsSnapshot()
+
+    finished[2] = "t1"
+    assert asyncio.run(snap._load_finished_batches())
+    assert snap.rows == 3
+
+    finished[1] = "t2"  # ids below the ones already loaded
+    assert asyncio.run(snap._load_finished_batches())
+    assert snap.rows == 6
+    assert snap.salary_summary()["n"] == 6
+
+    finished[1] = "t3"  # batch 1 loaded again: its rows may have changed
+    assert not asyncio.run(snap._load_finished_batches())
+
+
+def test_empty_stack_group_is_the_same_for_every_source(loaded, monkeypatch):
+    snap, df = loaded
+    monkeypatch.setattr(analytics.settings, "analytics_rollups", True)
+    batch = AnalyticsBatchIn(queries=[{"group_by": "stack", "percentiles": [0.5]}])
+    specs = batch.queries
+    # jobs and the rollups both store a missing stack as ""
+    stacks = sorted(df["stack"].fillna("").unique())
+
+    numpy_rows = snap.percentiles({"p50": 0.5}, "stack")
+    scan_rows = analytics.batch_results(
+        specs,
+        [{"stack": s, "grouping_id": 0, "q0_p50": 1.0, "q0_n": 1} for s in stacks],
+    )[0]["rows"]
+    rollup_rows = analytics.batch_rollup_results(
+        specs, [{"spec": 0, "key": s, "v0": 1.0, "n": 1} for s in stacks]
+    )[0]["rows"]
+    rollup_sql = str(analytics.batch_rollup_query(specs).compile())
+
+    assert sorted(r["stack"] for r in numpy_rows) == stacks
+    assert sorted(r["stack"] for r in scan_rows) == stacks
+    assert sorted(r["stack"] for r in rollup_rows) == stacks
+    assert "" in stacks and "nullif" not in rollup_sql
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.jobs import uploads
+from app.jobs.models import IngestedFile
+
+BASE = "/api/jobs/ingest"
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(uploads.settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(uploads.settings, "upload_chunk_bytes", 4)
+    return tmp_path
+
+
+def test_upload_streams_file_and_returns_checksum(client, upload_dir: Path):
+    content = b"title,salary\nDev,10\n"
+    resp = client.post(
+        f"{BASE}/upload", files={"file": ("data.csv", content, "text/csv")}
+    )
+    data = resp.json()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert data["size"] == len(content)
+    assert data["sha256"] == hashlib.sha256(content).hexdigest()
+    assert (upload_dir / data["file_id"]).read_bytes() == content
+
+
+def test_upload_rejects_files_over_the_limit(
+    client, upload_dir: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(uploads.settings, "upload_max_bytes", 8)
+    resp = client.post(
+        f"{BASE}/upload", files={"file": ("data.csv", b"0123456789", "text/csv")}
+    )
+    assert resp.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_resumable_upload_roundtrip(client, upload_dir: Path):
+    content = b"title,salary\nDev,10\nOps,20\n"
+    init = client.post(
+        f"{BASE}/uploads", json={"filename": "data.csv", "size": len(content)}
+    )
+    assert init.status_code == status.HTTP_201_CREATED
+    upload_id = init.json()["upload_id"]
+
+    first = client.put(f"{BASE}/uploads/{upload_id}?offset=0", content=content[:10])
+    assert first.json()["offset"] == 10
+
+    # a retried/out-of-order chunk is rejected with the offset to resume from
+    stale = client.put(f"{BASE}/uploads/{upload_id}?offset=0", content=content[:10])
+    assert stale.status_code == status.HTTP_409_CONFLICT
+    assert stale.json()["detail"]["offset"] == 10
+
+    early = client.post(f"{BASE}/uploads/{upload_id}/complete")
+    assert early.status_code == status.HTTP_409_CONFLICT
+
+    assert client.get(f"{BASE}/uploads/{upload_id}").json()["offset"] == 10
+    client.put(f"{BASE}/uploads/{upload_id}?offset=10", content=content[10:])
+
+    sha = hashlib.sha256(content).hexdigest()
+    done = client.post(f"{BASE}/uploads/{upload_id}/complete", json={"sha256": sha})
+    data = done.json()
+
+    assert done.status_code == status.HTTP_200_OK
+    assert data["sha256"] == sha
+    assert (upload_dir / data["file_id"]).read_bytes() == content
+    assert client.get(f"{BASE}/uploads/{upload_id}").status_code == 404
+
+
+def test_resumable_upload_checksum_mismatch(client):
+    upload_id = client.post(f"{BASE}/uploads", json={"filename": "d.csv"}).json()[
+        "upload_id"
+    ]
+    client.put(f"{BASE}/uploads/{upload_id}?offset=0", content=b"abc")
+    resp = client.post(
+        f"{BASE}/uploads/{upload_id}/complete", json={"sha256": "0" * 64}
+    )
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_preview_returns_header_dtypes_and_sample(client, upload_dir: Path):
+    (upload_dir / "data.csv").write_text("title,salary\nDev,10\nOps,\nQA,30\n")
+
+    resp = client.get(f"{BASE}/preview/data.csv?rows=2")
+    data = resp.json()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert data["columns"] == ["title", "salary"]
+    assert data["dtypes"] == {"title": "string", "salary": "floating"}
+    assert data["rows"] == [
+        {"title": "Dev", "salary": 10.0},
+        {"title": "Ops", "salary": None},
+    ]
+
+
+def test_preview_unknown_file(client):
+    assert client.get(f"{BASE}/preview/missing.csv").status_code == 404
+    assert client.get(f"{BASE}/preview/..%2Fetc.csv").status_code == 404
+
+
+def test_idle_partial_uploads_expire_with_their_lock(client, upload_dir: Path):
+    upload_id = client.post(f"{BASE}/uploads", json={"filename": "d.csv"}).json()[
+        "upload_id"
+    ]
+    client.put(f"{BASE}/uploads/{upload_id}?offset=0", content=b"abc")
+    assert upload_id in uploads._locks
+
+    ttl = uploads.settings.upload_partial_ttl_seconds
+    assert uploads.expire_partial_uploads() == 0
+    assert uploads.expire_partial_uploads(now=time.time() + ttl + 1) == 1
+
+    assert upload_id not in uploads._locks
+    assert list((upload_dir / uploads.PARTIAL_DIR).iterdir()) == []
+    assert client.get(f"{BASE}/uploads/{upload_id}").status_code == 404
+
+
+def test_complete_waits_for_a_chunk_being_written(upload_dir: Path):
+    upload_id = uploads.init_upload("d.csv", None)["upload_id"]
+    order = []
+
+    async def slow_chunks():
+        yield b"ab"
+        await asyncio.sleep(0.01)
+        order.append("chunk written")
+        yield b"cd"
+
+    async def complete():
+        await asyncio.sleep(0)
+        info = await uploads.complete_upload(upload_id, None)
+        order.append("completed")
+        return info
+
+    async def run():
+        return await asyncio.gather(
+            uploads.write_chunk(upload_id, 0, slow_chunks()), complete()
+        )
+
+    _, info = asyncio.run(run())
+
+    assert order == ["chunk written", "completed"]
+    assert info["size"] == 4
+    assert (upload_dir / info["file_id"]).read_bytes() == b"abcd"
+
+
+def test_chunk_waiting_on_a_completing_upload_gets_404(upload_dir: Path):
+    upload_id = uploads.init_upload("d.csv", None)["upload_id"]
+
+    async def chunks():
+        yield b"cd"
+
+    async def run():
+        lock = uploads._locks.setdefault(upload_id, asyncio.Lock())
+        async with lock:
+            # the chunk arrives while another request holds the lock...
+            write = asyncio.ensure_future(uploads.write_chunk(upload_id, 0, chunks()))
+            await asyncio.sleep(0)
+            # ...which publishes the upload under a file_id before releasing it
+            _, meta = uploads._partial_paths(upload_id)
+            await uploads._publish(upload_id, meta.with_suffix(".part"), meta, None)
+        return await write
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(run())
+    assert exc.value.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_earlier_result_is_looked_up_with_the_api_session(
+    upload_dir: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(uploads.settings, "ingest_dedup", True)
+    (upload_dir / "b.csv").write_text("title,salary\nDev,10\n")
+    earlier = IngestedFile(sha256="x", file_id="a.csv", result={"inserted": 1})
+    queries = []
+
+    class FakeResult:
+        def scalar_one_or_none(self):
+            return earlier
+
+    class FakeSession:
+        async def execute(self, stmt):
+            queries.append(stmt.compile().params)
+            return FakeResult()
+
+    res = asyncio.run(uploads.earlier_result(FakeSession(), "b.csv"))
+
+    sha256 = hashlib.sha256(b"title,salary\nDev,10\n").hexdigest()
+    assert queries == [{"sha256_1": sha256}]
+    assert res == {"inserted": 1, "file_id": "b.csv", "duplicate_of": "a.csv"}
+    assert asyncio.run(uploads.earlier_result(FakeSession(), "missing.csv")) is None
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.core.config import settings
+from app.users import services
+from app.users.cache import invalidate_user, user_cache
+from app.users.models import User
+from app.users.schemas import UserOut
+
+
+class FakeResult:
+    def __init__(self, user):
+        self.user = user
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self.user
+
+
+class FakeDB:
+    def __init__(self, user):
+        self.user, self.queries = user, 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return FakeResult(self.user)
+
+
+def _user(email="a@b.io", is_active=True) -> User:
+    return User(
+        id=1,
+        email=email,
+        hashed_password="x",
+        full_name=None,
+        is_active=is_active,
+        created_at=datetime(2026, 1, 1),
+    )
+
+
+def _token(email="a@b.io", exp=None) -> str:
+    claims = {"sub": email, "exp": exp or int(time.time()) + 3600}
+    return jwt.encode(claims, settings.secret_key, algorithm=settings.algorithm)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+def _current(db, token):
+    return asyncio.run(services.get_current_user(db, token))
+
+
+def test_verified_token_is_served_from_the_cache():
+    db, token = FakeDB(_user()), _token()
+
+    first = _current(db, token)
+    second = _current(db, token)
+
+    assert isinstance(first, UserOut) and first.email == "a@b.io"
+    assert second == first
+    assert db.queries == 1
+
+
+def test_invalidation_forces_a_fresh_lookup():
+    db, token = FakeDB(_user()), _token()
+    _current(db, token)
+
+    invalidate_user("a@b.io")
+    db.user = _user(is_active=False)
+
+    with pytest.raises(HTTPException) as exc:
+        _current(db, token)
+    assert exc.value.status_code == 401
+    assert db.queries == 2 and len(user_cache) == 0
+
+
+def test_entries_never_outlive_the_token():
+    snapshot = UserOut.model_validate(_user(), from_attributes=True)
+
+    user_cache.put("expired", snapshot, exp=time.time() - 1)
+    user_cache.put("soon", snapshot, exp=time.time() + 0.05)
+    time.sleep(0.06)
+
+    assert user_cache.get("expired") is None
+    assert user_cache.get("soon") is None
+
+
+def test_least_recently_used_token_is_evicted(monkeypatch):
+    monkeypatch.setattr(settings, "auth_user_cache_size", 2)
+    snapshot = UserOut.model_validate(_user(), from_attributes=True)
+
+    user_cache.put("t1", snapshot)
+    user_cache.put("t2", snapshot)
+    user_cache.get("t1")
+    user_cache.put("t3", snapshot)
+
+    assert user_cache.get("t2") is None
+    assert user_cache.get("t1") == snapshot and user_cache.get("t3") == snapshot
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from app.workers import dedup
+
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def scalars(self):
+        return iter(self.values)
+
+
+class FakeSession:
+    """Claims every fingerprint it hasn't seen, like ON CONFLICT DO NOTHING;
+    deletes by file_id release the fingerprints of that file."""
+
+    def __init__(self):
+        self.seen = {}
+        self.claims = []
+
+    def execute(self, stmt, params=None):
+        if params is None:
+            file_id = next(iter(stmt.compile().params.values()))
+            self.seen = {h: f for h, f in self.seen.items() if f != file_id}
+            return None
+        self.claims.append(params["hashes"])
+        new = [h for h in params["hashes"] if h not in self.seen]
+        self.seen.update(dict.fromkeys(new, params["file_id"]))
+        return FakeResult(new)
+
+
+def _frame(**overrides):
+    data = {
+        "title": ["Dev", "QA"],
+        "salary": [100.0, 90.0],
+        "currency": ["USD", "USD"],
+        "country": ["BR", "PT"],
+        "seniority": ["senior", "junior"],
+        "stack": ["python", "java"],
+    }
+    data.update(overrides)
+    return pd.DataFrame(data)
+
+
+def test_fingerprints_are_stable_and_ignore_column_order():
+    df = _frame()
+    first = dedup.row_fingerprints(df)
+    again = dedup.row_fingerprints(df[df.columns[::-1]])
+
+    assert first.dtype == np.int64
+    assert np.array_equal(first, again)
+    assert first[0] != first[1]
+
+
+def test_missing_columns_hash_like_loader_defaults():
+    full = _frame()
+    partial = full.drop(columns=["currency"])
+
+    assert np.array_equal(dedup.row_fingerprints(full), dedup.row_fingerprints(partial))
+
+
+def test_claim_new_rows_drops_repeats_within_and_across_frames():
+    session = FakeSession()
+    df = pd.concat([_frame(), _frame().iloc[:1]], ignore_index=True)
+
+    first = dedup.claim_new_rows(session, df, "a.csv")
+    second = dedup.claim_new_rows(session, _frame(), "b.csv")
+
+    assert list(first["title"]) == ["Dev", "QA"]
+    assert second.empty
+
+
+def test_fingerprints_are_claimed_in_sorted_order():
+    session = FakeSession()
+    df = pd.concat([_frame(title=[f"t{i}", f"u{i}"]) for i in range(5)])
+    assert list(dedup.row_fingerprints(df)) != sorted(dedup.row_fingerprints(df))
+
+    dedup.claim_new_rows(session, df, "a.csv")
+
+    # the same order in every load, so concurrent claims can't deadlock
+    assert session.claims == [sorted(dedup.row_fingerprints(df).tolist())]
+
+
+def test_purged_upload_takes_rows_skipped_by_later_uploads_with_it():
+    session = FakeSession()
+    dedup.claim_new_rows(session, _frame(), "a.csv")
+    assert dedup.claim_new_rows(session, _frame(), "b.csv").empty
+
+    dedup.forget_upload(session, "a.csv")
+
+    # b.csv holds no fingerprint for the rows it skipped: they are gone from
+    # jobs, and only re-ingesting b.csv brings them back
+    assert session.seen == {}
+    assert list(dedup.claim_new_rows(session, _frame(), "b.csv")["title"]) == [
+        "Dev",
+        "QA",
+    ]
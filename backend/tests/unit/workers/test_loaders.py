@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app.workers import loaders
+
+
+class FakeCopy:
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, data):
+        self.sink.append(data)
+
+
+class FakeCursor(FakeCopy):
+    def __init__(self, sink, statements):
+        super().__init__(sink)
+        self.statements = statements
+
+    def copy(self, sql):
+        self.statements.append(sql)
+        return FakeCopy(self.sink)
+
+
+class FakeSession:
+    """Exposes session.connection().connection.driver_connection.cursor()."""
+
+    def __init__(self):
+        self.written = []
+        self.statements = []
+        self.driver_connection = self
+
+    def connection(self):
+        return SimpleNamespace(connection=self)
+
+    def cursor(self):
+        return FakeCursor(self.written, self.statements)
+
+
+def test_copy_loader_streams_csv_with_defaults():
+    session = FakeSession()
+    df = pd.DataFrame(
+        {"title": ["Dev", "Ops, Sr"], "salary": [10.0, 20.5], "country": ["", None]}
+    )
+
+    assert loaders.copy_loader(session, df) == 2
+
+    (sql,) = session.statements
+    assert sql.startswith("COPY jobs (title, salary, country, currency, source)")
+    assert "FORMAT csv" in sql
+    # empty strings stay empty, missing values become NULL markers
+    assert "".join(session.written).splitlines() == [
+        "Dev,10.0,,USD,upload",
+        '"Ops, Sr",20.5,\\N,USD,upload',
+    ]
+
+
+def test_copy_loader_targets_a_partition():
+    session = FakeSession()
+    df = pd.DataFrame({"title": ["Dev"], "salary": [1.0], "batch_id": [7]})
+
+    loaders.copy_loader(session, df, "jobs_b7")
+
+    assert session.statements[0].startswith("COPY jobs_b7 (title, salary, batch_id,")
+
+
+def test_get_loader_rejects_unknown_backend():
+    assert loaders.get_loader("orm") is loaders.orm_loader
+    with pytest.raises(ValueError, match="Unknown ingest loader"):
+        loaders.get_loader("nope")
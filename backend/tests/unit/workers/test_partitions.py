@@ -0,0 +1,100 @@
+from app.workers import partitions
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one(self):
+        return self.value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class FakeSession:
+    """Records statements; answers the batch id and partition state queries."""
+
+    def __init__(self, state=None, pending=None):
+        self.state, self.pending = state, pending
+        self.statements = []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append(sql)
+        if sql.startswith("INSERT INTO ingest_batches"):
+            return FakeResult(7)
+        if "pg_inherits" in sql:
+            if "inhdetachpending" in sql:
+                return FakeResult(self.pending)
+            return FakeResult(self.state)
+        if sql.startswith("CREATE TABLE"):
+            self.state = False
+        if sql.startswith("ALTER TABLE jobs ATTACH"):
+            self.state = True
+        return FakeResult(None)
+
+    def commit(self):
+        pass
+
+    # Stands in for an autocommit connection in detach_partition
+    def connect(self):
+        return self
+
+    def execution_options(self, **options):
+        assert options == {"isolation_level": "AUTOCOMMIT"}
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_new_partitions_are_created_detached_then_attached(monkeypatch):
+    monkeypatch.setattr(partitions.settings, "analytics_rollups", False)
+    session = FakeSession()
+
+    assert partitions.open_partition(session, "f.csv") == (7, "jobs_b7", True)
+
+    ddl = [s for s in session.statements if s.startswith(("CREATE", "ALTER"))]
+    # never CREATE ... PARTITION OF, which locks jobs ACCESS EXCLUSIVE
+    assert ddl[0].startswith("CREATE TABLE jobs_b7 (LIKE jobs")
+    assert (
+        ddl[-1]
+        == "ALTER TABLE jobs ATTACH PARTITION jobs_b7 FOR VALUES FROM (7) TO (8)"
+    )
+
+
+def test_an_attached_partition_stays_attached_for_deferred_loads():
+    session = FakeSession(state=True)
+
+    assert partitions.open_partition(session, "f.csv", attached=False)[2] is True
+    assert not any(s.startswith(("CREATE", "ALTER")) for s in session.statements)
+
+
+def test_deferred_partitions_count_in_rollups_on_attach(monkeypatch):
+    monkeypatch.setattr(partitions.settings, "analytics_rollups", True)
+    session = FakeSession()
+
+    partitions.open_partition(session, "f.csv", attached=False)
+    assert not any("job_salary_rollups" in s for s in session.statements)
+
+    partitions.attach_partition(session, 7)
+    inserts = [s for s in session.statements if s.startswith("INSERT INTO job_salary")]
+    assert len(inserts) == 2 and all("FROM jobs_b7 " in s for s in inserts)
+
+
+def test_detach_runs_concurrently_or_finalizes_an_interrupted_one():
+    attached, interrupted, detached = (
+        FakeSession(pending=False),
+        FakeSession(pending=True),
+        FakeSession(pending=None),
+    )
+    for engine in (attached, interrupted, detached):
+        partitions.detach_partition(engine, 7)
+
+    assert attached.statements[-1].endswith("DETACH PARTITION jobs_b7 CONCURRENTLY")
+    assert interrupted.statements[-1].endswith("DETACH PARTITION jobs_b7 FINALIZE")
+    assert len(detached.statements) == 1
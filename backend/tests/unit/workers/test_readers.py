@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pandas as pd
+
+from app.workers import readers
+
+
+def test_read_columns_csv_header_only(tmp_path: Path):
+    p = tmp_path / "sample.csv"
+    pd.DataFrame({"a": [1, 2], "b": [3, 4]}).to_csv(p, index=False)
+    assert readers.read_columns(p) == ["a", "b"]
+
+
+def test_iter_chunks_csv_streams_fixed_size_chunks(tmp_path: Path):
+    p = tmp_path / "sample.csv"
+    pd.DataFrame({"a": range(10), "b": range(10)}).to_csv(p, index=False)
+
+    chunks = list(readers.iter_chunks(p, chunk_rows=4, usecols=["a"]))
+    assert [len(df) for df, _ in chunks] == [4, 4, 2]
+    assert all(list(df.columns) == ["a"] for df, _ in chunks)
+    # the last chunk reports the whole file as consumed
+    assert chunks[-1][1] == p.stat().st_size
+
+
+def test_iter_chunks_xlsx_streams_like_read_excel(tmp_path: Path):
+    p = tmp_path / "sample.xlsx"
+    df = pd.DataFrame({"a": range(10), "b": [f"x{i}" for i in range(10)]})
+    df.to_excel(p, index=False)
+
+    chunks = list(readers.iter_chunks(p, chunk_rows=4, usecols=["b"]))
+    assert [len(c) for c, _ in chunks] == [4, 4, 2]
+    assert all(list(c.columns) == ["b"] for c, _ in chunks)
+    offsets = [offset for _, offset in chunks]
+    assert offsets == sorted(offsets) and offsets[-1] == p.stat().st_size
+
+    streamed = pd.concat([c for c, _ in readers.iter_chunks(p, 3)], ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, pd.read_excel(p))
+
+
+def test_estimate_total_rows():
+    assert readers.estimate_total_rows(100, 250, 1000) == 400
+    assert readers.estimate_total_rows(100, 1000, 1000) == 100
+    assert readers.estimate_total_rows(0, 0, 1000) == 0
+
+
+def test_plan_shards_covers_every_row_once(tmp_path: Path):
+    p = tmp_path / "sample.csv"
+    pd.DataFrame({"a": range(1001), "b": ["x, y"] * 1001}).to_csv(p, index=False)
+
+    shards = readers.plan_shards(p, 4)
+    assert len(shards) == 4
+    assert shards[-1][1] == p.stat().st_size
+
+    rows = []
+    for byte_range in shards:
+        for df, _ in readers.iter_chunks(p, 100, usecols=["a"], byte_range=byte_range):
+            rows.extend(df["a"])
+    assert rows == list(range(1001))
+
+
+def test_plan_shards_small_file_single_range(tmp_path: Path):
+    p = tmp_path / "sample.csv"
+    pd.DataFrame({"a": [1]}).to_csv(p, index=False)
+    assert len(readers.plan_shards(p, 8)) == 1
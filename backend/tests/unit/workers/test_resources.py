@@ -0,0 +1,64 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from app.infrastructure.instrumentation import current_route
+from app.workers import resources
+
+
+@pytest.fixture
+def sqlite_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        resources,
+        "settings",
+        SimpleNamespace(
+            alembic_database_url=f"sqlite:///{tmp_path / 'worker.db'}",
+            worker_db_pool_size=1,
+            worker_db_max_overflow=0,
+            worker_db_pool_recycle=60,
+            worker_db_pool_timeout=5,
+        ),
+    )
+    resources.dispose_engine()
+    yield
+    resources.dispose_engine()
+
+
+def test_engine_is_shared_per_process(sqlite_settings):
+    assert resources.get_engine() is resources.get_engine()
+
+
+def test_pool_stats_track_checkouts(sqlite_settings):
+    assert resources.pool_stats()["initialized"] is False
+
+    engine = resources.get_engine()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert resources.pool_stats()["checked_out"] == 1
+
+    stats = resources.pool_stats()
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["checkins"] == 1
+    assert stats["size"] == 1
+
+
+def test_worker_process_init_replaces_inherited_engine(sqlite_settings):
+    inherited = resources.get_engine()
+    resources._on_worker_process_init()
+    assert resources.get_engine() is not inherited
+
+    resources._on_worker_process_shutdown()
+    assert resources.pool_stats()["initialized"] is False
+
+
+def test_task_statements_are_labelled_with_the_task_name():
+    task = SimpleNamespace(name="app.workers.tasks.process_file")
+
+    resources._on_task_prerun(task_id="t1", task=task)
+    assert current_route.get() == "app.workers.tasks.process_file"
+
+    resources._on_task_postrun(task_id="t1")
+    assert current_route.get() == "-"
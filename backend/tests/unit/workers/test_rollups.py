@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from app.jobs import sketches
+from app.workers import rollups
+
+
+def test_rollup_rows_counts_jobs_per_group_and_salary():
+    df = pd.DataFrame(
+        {
+            "title": ["Dev", "Dev", "Dev", "QA"],
+            "country": ["BR", "BR", "BR", "PT"],
+            "seniority": ["senior", "senior", "senior", ""],
+            "salary": [100.0, 100.0, 120.0, 90.0],
+        }
+    )
+
+    rows = rollups.rollup_rows(df)
+
+    assert list(rows.columns) == [*rollups.ROLLUP_DIMENSIONS, "salary", "n"]
+    # missing dimensions are stored as "", groups come out sorted by key
+    assert rows.to_dict(orient="records") == [
+        {"title": "Dev", "country": "BR", "stack": "", "seniority": "senior",
+         "salary": 100.0, "n": 2},
+        {"title": "Dev", "country": "BR", "stack": "", "seniority": "senior",
+         "salary": 120.0, "n": 1},
+        {"title": "QA", "country": "PT", "stack": "", "seniority": "",
+         "salary": 90.0, "n": 1},
+    ]  # fmt: skip
+
+
+def test_sketch_rows_count_jobs_per_bucket():
+    df = pd.DataFrame({"title": ["Dev"] * 3, "salary": [1000.0, 1001.0, 5000.0]})
+
+    rows = rollups.sketch_rows(df)
+
+    # 1000 and 1001 are within 1% of each other: same bucket
+    assert rows["n"].tolist() == [2, 1]
+    assert rows["bucket"].is_monotonic_increasing
+
+
+def test_refresh_rollups_sends_one_upsert_per_table():
+    calls = []
+
+    class FakeSession:
+        def execute(self, stmt, params):
+            calls.append(params)
+
+    df = pd.DataFrame({"title": ["Dev", "Dev"], "salary": [1.0, 1.0]})
+    rollups.refresh_rollups(FakeSession(), df)
+    rollups.refresh_rollups(FakeSession(), df.iloc[:0])
+
+    # rollups then sketches, nothing for an empty chunk
+    assert len(calls) == 2
+    assert calls[0]["n"] == [2] and calls[0]["salary"] == [1.0]
+    assert calls[1]["n"] == [2] and calls[1]["bucket"] == [0]
+
+
+def test_subtract_rollups_reads_the_partition_being_dropped():
+    statements = []
+
+    class FakeSession:
+        def execute(self, stmt):
+            statements.append(str(stmt))
+
+    rollups.subtract_rollups(FakeSession(), "jobs_b7")
+
+    updates = [s for s in statements if s.startswith("UPDATE")]
+    assert [s.split()[1] for s in updates] == [
+        "job_salary_rollups",
+        "job_salary_sketches",
+    ]
+    assert all("FROM jobs_b7 " in s for s in updates)
+    # groups whose count drops to zero are removed
+    assert statements[1] == "DELETE FROM job_salary_rollups WHERE n <= 0"
+
+
+def test_add_rollups_upserts_the_counts_of_the_partition():
+    statements = []
+
+    class FakeSession:
+        def execute(self, stmt):
+            statements.append(str(stmt))
+
+    rollups.add_rollups(FakeSession(), "jobs_b7")
+
+    assert [s.split()[2] for s in statements] == [
+        "job_salary_rollups",
+        "job_salary_sketches",
+    ]
+    assert all("FROM jobs_b7 " in s and "ON CONFLICT" in s for s in statements)
+
+
+def test_sketch_buckets_estimate_within_relative_error():
+    values = np.geomspace(1, 10_000_000, 5_000)
+    estimates = sketches.bucket_value(sketches.bucket_index(values))
+
+    assert np.all(np.abs(estimates - values) <= sketches.SKETCH_ALPHA * values)
+    assert sketches.bucket_value(
+        sketches.bucket_index(np.array([0.0, -5.0]))
+    ).tolist() == [0.0, 0.0]
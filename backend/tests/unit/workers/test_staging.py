@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pandas as pd
+
+from app.workers import staging
+from app.workers.readers import iter_chunks
+
+
+def _write_xlsx(tmp_path: Path) -> Path:
+    p = tmp_path / "data.xlsx"
+    pd.DataFrame(
+        {"title": ["Dev", None, "Ops"], "salary": [10, 20, None], "x": [1, 2, 3]}
+    ).to_excel(p, index=False)
+    return p
+
+
+def test_first_read_stages_the_upload(tmp_path: Path):
+    p = _write_xlsx(tmp_path)
+
+    chunks, extent = staging.stage_chunks(p, chunk_rows=2, usecols=["title"])
+    frames = [df for df, _ in chunks]
+
+    assert extent == p.stat().st_size
+    assert [list(df.columns) for df in frames] == [["title"], ["title"]]
+    assert staging.staged_path(p).exists()
+    assert sorted(f.name for f in tmp_path.iterdir()) == [
+        "data.xlsx",
+        "data.xlsx.arrow",
+    ]
+
+
+def test_staged_read_is_projected_and_row_based(tmp_path: Path):
+    p = _write_xlsx(tmp_path)
+    list(staging.stage_chunks(p, chunk_rows=2)[0])
+
+    chunks, extent = staging.stage_chunks(p, chunk_rows=2, usecols=["salary", "title"])
+    frames = list(chunks)
+    df = pd.concat([f for f, _ in frames], ignore_index=True)
+
+    assert extent == 3
+    assert [offset for _, offset in frames] == [2, 3]
+    assert list(df.columns) == ["salary", "title"]
+    # each chunk gets back the dtypes the raw read gave it
+    raw = iter_chunks(p, 2, usecols=["salary", "title"])
+    for (staged, _), (direct, _) in zip(frames, raw):
+        pd.testing.assert_frame_equal(staged, direct)
+    assert df["title"].tolist()[::2] == ["Dev", "Ops"]
+    assert df["salary"].tolist()[:2] == [10, 20]
+    assert df.isna().to_dict("list") == {
+        "salary": [False, False, True],
+        "title": [False, True, False],
+    }
+
+
+def test_interrupted_read_leaves_no_staging_file(tmp_path: Path):
+    p = _write_xlsx(tmp_path)
+    chunks, _ = staging.stage_chunks(p, chunk_rows=1)
+    next(chunks)
+    chunks.close()
+
+    assert [f.name for f in tmp_path.iterdir()] == ["data.xlsx"]
+
+
+def test_csv_uploads_are_read_directly(tmp_path: Path):
+    p = tmp_path / "data.csv"
+    pd.DataFrame({"title": ["Dev", "Ops"]}).to_csv(p, index=False)
+
+    chunks, extent = staging.stage_chunks(p, chunk_rows=1)
+
+    assert len(list(chunks)) == 2 and extent == p.stat().st_size
+    assert [f.name for f in tmp_path.iterdir()] == ["data.csv"]
@@ -0,0 +1,109 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.workers import sharding
+
+
+class FakeBackend:
+    """Result backend keeping encoded task metas, counting MGET calls."""
+
+    READY_STATES = frozenset({"SUCCESS", "FAILURE", "REVOKED"})
+
+    def __init__(self, metas):
+        self.store = {self.get_key_for_task(k): json.dumps(v) for k, v in metas.items()}
+        self.mgets = []
+
+    def get_key_for_task(self, task_id):
+        return f"celery-task-meta-{task_id}".encode()
+
+    def mget(self, keys):
+        self.mgets.append(keys)
+        return [self.store.get(k) for k in keys]
+
+    def decode(self, value):
+        return json.loads(value)
+
+    def store_result(self, task_id, result, state):
+        meta = {"status": state, "result": result}
+        self.store[self.get_key_for_task(task_id)] = json.dumps(meta)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    metas = {
+        "done": {"status": "SUCCESS", "result": {"inserted": 5, "sample": []}},
+        "running": {"status": "PROGRESS", "result": {"processed": 2, "total": 4,
+                                                     "percent": 50}},
+        "sharded": {"status": "PROGRESS", "result": {"stage": "sharded", "shards": [
+            {"id": "s1", "bytes": 100}, {"id": "s2", "bytes": 100}]}},
+        "s1": {"status": "SUCCESS", "result": {"inserted": 10, "total": 10}},
+        "s2": {"status": "PROGRESS", "result": {"processed": 5, "total": 10}},
+        "failed": {"status": "FAILURE", "result": {"exc_type": "ValueError",
+                                                   "exc_message": ["bad"]}},
+    }  # fmt: skip
+    fake = FakeBackend(metas)
+    monkeypatch.setattr(sharding, "celery", SimpleNamespace(backend=fake))
+    return fake
+
+
+def test_bulk_status_reads_every_task_with_one_mget(backend):
+    ids = ["done", "running", "failed", "unknown"]
+    records = sharding.bulk_task_status(ids)
+
+    assert len(backend.mgets) == 1
+    assert [r["state"] for r in records] == [
+        "SUCCESS",
+        "PROGRESS",
+        "FAILURE",
+        "PENDING",
+    ]
+    assert records[1] == {
+        "id": "running",
+        "state": "PROGRESS",
+        "ready": False,
+        "successful": False,
+        "processed": 2,
+        "total": 4,
+        "percent": 50,
+    }
+    # compact unless asked for
+    assert "result" not in records[0]
+
+
+def test_bulk_status_includes_results_on_request(backend):
+    done, failed = sharding.bulk_task_status(["done", "failed"], include_result=True)
+
+    assert done["result"]["inserted"] == 5
+    assert failed["result"]["exc_type"] == "ValueError"
+
+
+def test_sharded_progress_reads_all_shards_in_one_more_mget(backend):
+    (record,) = sharding.bulk_task_status(["sharded"])
+
+    assert len(backend.mgets) == 2
+    assert (record["processed"], record["total"], record["percent"]) == (15, 20, 75)
+    # the single-task route reports the same combined progress
+    assert sharding.task_status("sharded")["meta"]["processed"] == 15
+
+
+def test_sharded_reupload_is_answered_without_fanning_out(
+    backend, monkeypatch, tmp_path
+):
+    (tmp_path / "big.csv").write_text("title,salary\n" + "Dev,1\n" * 100)
+    monkeypatch.setattr(sharding.settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(sharding.settings, "ingest_shard_min_bytes", 0)
+    previous = {"file_id": "big.csv", "inserted": 0, "duplicate_of": "first.csv"}
+
+    def no_fan_out(*args, **kwargs):
+        raise AssertionError("shards were queued")
+
+    monkeypatch.setattr(sharding, "chord", no_fan_out)
+
+    task_id = sharding.dispatch_ingest(
+        "big.csv", {"title": "title"}, sharded=True, previous=previous
+    )
+
+    status = sharding.task_status(task_id)
+    assert status["ready"] and status["result"] == previous
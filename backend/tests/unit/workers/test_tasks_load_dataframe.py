@@ -14,6 +14,25 @@ def test_load_dataframe_csv(tmp_path: Path):
     assert len(df) == 2
 
 
+def test_load_dataframe_dtypes_do_not_depend_on_staging(tmp_path: Path, monkeypatch):
+    p = tmp_path / "sample.xlsx"
+    pd.DataFrame(
+        {"a": [1, 2], "b": [1.5, None], "c": ["x", None], "d": [True, False]}
+    ).to_excel(p, index=False)
+
+    monkeypatch.setattr(tasks.settings, "ingest_staging", False)
+    direct = tasks._load_dataframe(p)
+    assert [f.name for f in tmp_path.iterdir()] == ["sample.xlsx"]
+
+    monkeypatch.setattr(tasks.settings, "ingest_staging", True)
+    first, staged = tasks._load_dataframe(p), tasks._load_dataframe(p)
+
+    assert (tmp_path / "sample.xlsx.arrow").exists()
+    assert direct["a"].dtype == "int64" and direct["b"].dtype == "float64"
+    pd.testing.assert_frame_equal(first, direct)
+    pd.testing.assert_frame_equal(staged, direct)
+
+
 def test_load_dataframe_xlsx(tmp_path: Path):
     p = tmp_path / "sample.xlsx"
     pd.DataFrame({"a": [1], "b": [2]}).to_excel(p, index=False)
@@ -31,3 +31,42 @@ def test_normalize_keeps_only_canon_and_cleans_fields():
     assert row["country"] == "BR"
     assert row["seniority"] == "Senior"
     assert row["stack"] == "Python"
+
+
+def test_normalize_matches_previous_implementation():
+    from benchmarks.bench_normalize import legacy_normalize, make_frame
+
+    raw = make_frame(5_000, seed=7)
+    # mixed types, numeric text columns and an all-valid salary subset
+    raw.loc[::97, "title"] = 42
+    raw.loc[::89, "country"] = 1.5
+    raw.loc[::83, "salary"] = None
+    raw.loc[::79, "salary"] = 1234.5
+
+    pd.testing.assert_frame_equal(tasks._normalize(raw), legacy_normalize(raw))
+
+    subset = raw.loc[raw["salary"].astype(str).str.isdigit(), ["salary", "stack"]]
+    pd.testing.assert_frame_equal(tasks._normalize(subset), legacy_normalize(subset))
+
+    no_salary = raw[["title", "currency"]]
+    pd.testing.assert_frame_equal(
+        tasks._normalize(no_salary), legacy_normalize(no_salary)
+    )
+
+
+def test_normalize_keeps_mixed_type_values_apart():
+    from benchmarks.bench_normalize import legacy_normalize
+
+    # what openpyxl yields for a column holding numbers, booleans and text
+    raw = pd.DataFrame(
+        {
+            "title": [1, 1.0, True, "1", None, " x "],
+            "stack": [0, False, 0.0, "0", float("nan"), ""],
+            "salary": [1, 2, 3, 4, 5, 6],
+        },
+        dtype=object,
+    )
+    df = tasks._normalize(raw)
+
+    assert df["title"].tolist() == ["1", "1.0", "True", "1", "", "x"]
+    pd.testing.assert_frame_equal(df, legacy_normalize(raw))
@@ -1,6 +1,6 @@
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import styles from './ColumnMapForm.module.scss';
-import { mapColumns, type ColumnMap } from '../../lib/api';
+import { mapColumns, previewFile, type ColumnMap } from '../../lib/api';
 import Button from '../Button/Button';
 
 type Props = {
@@ -23,6 +23,16 @@ const FIELDS = ['title', 'salary', 'currency', 'country', 'seniority', 'stack']
 function ColumnMapForm({ fileId, onMapped }: Props) {
   const [map, setMap] = useState<ColumnMap>(DEFAULT_MAP);
   const [error, setError] = useState<string | null>(null);
+  const [columns, setColumns] = useState<string[]>([]);
+
+  // Header-only preview: suggests the real column names of the uploaded file
+  useEffect(() => {
+    const ctrl = new AbortController();
+    previewFile(fileId, 0, ctrl.signal)
+      .then((p) => setColumns(p.columns))
+      .catch(() => setColumns([]));
+    return () => ctrl.abort();
+  }, [fileId]);
 
   function onChange(key: keyof ColumnMap, val: string) {
     setMap((m) => ({ ...m, [key]: val }));
@@ -68,6 +78,7 @@ function ColumnMapForm({ fileId, onMapped }: Props) {
                       value={map[k]}
                       onChange={(e) => onChange(k, e.target.value)}
                       placeholder={`CSV column for ${k}`}
+                      list="column-map-columns"
                       required
                     />
                   </td>
@@ -75,6 +86,11 @@ function ColumnMapForm({ fileId, onMapped }: Props) {
               ))}
             </tbody>
           </table>
+          <datalist id="column-map-columns">
+            {columns.map((c) => (
+              <option key={c} value={c} />
+            ))}
+          </datalist>
         </div>
 
         <div className={styles.mapForm__actions}>
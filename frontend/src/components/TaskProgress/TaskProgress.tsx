@@ -1,41 +1,25 @@
-import { useEffect, useRef, useState } from 'react';
+import { useEffect, useState } from 'react';
 import styles from './TaskProgress.module.scss';
-import { taskStatus, type TaskStatusResp } from '../../lib/api';
+import { watchTask, type TaskStatusResp } from '../../lib/api';
 
 type Props = {
   taskId: string;
   onFinish?: (s: TaskStatusResp) => void;
 };
 
-const POLL_MS = 1200;
-
 export default function TaskProgress({ taskId, onFinish }: Props) {
   const [s, setS] = useState<TaskStatusResp | null>(null);
-  const timer = useRef<number | null>(null);
 
   useEffect(() => {
-    let cancelled = false;
-
-    const tick = async () => {
-      try {
-        const next = await taskStatus(taskId);
-        if (cancelled) return;
-        setS(next);
-        if (next.ready) {
-          onFinish?.(next);
-          return;
-        }
-      } catch {
-        // intentionally empty
-      }
-      timer.current = window.setTimeout(tick, POLL_MS);
-    };
-
-    tick();
-    return () => {
-      cancelled = true;
-      if (timer.current) window.clearTimeout(timer.current);
-    };
+    const controller = new AbortController();
+
+    watchTask(taskId, setS, controller.signal)
+      .then((last) => onFinish?.(last))
+      .catch(() => {
+        // aborted on unmount
+      });
+
+    return () => controller.abort();
   }, [taskId, onFinish]);
 
   if (!s) return null;
@@ -1,22 +1,19 @@
 import { useEffect, useRef, useState } from 'react';
 import styles from './TaskStatus.module.scss';
-import { taskStatus, type TaskStatusResp } from '../../lib/api';
+import { watchTask, type TaskStatusResp } from '../../lib/api';
 import toast from 'react-hot-toast';
 
 type Props = { taskId: string };
 
-const POLL_MS = 1200;
-
 export default function TaskStatus({ taskId }: Props) {
   const [s, setS] = useState<TaskStatusResp | null>(null);
-  const pollTimerRef = useRef<number | null>(null);
 
   const loadingTimerRef = useRef<number | null>(null);
   const loadingShownRef = useRef(false);
   const finishedRef = useRef(false); // garante que não dispara duas vezes
 
   useEffect(() => {
-    let cancelled = false;
+    const controller = new AbortController();
 
     // Schedule "Processing…" if time takes more than 800ms
     if (loadingTimerRef.current) window.clearTimeout(loadingTimerRef.current);
@@ -28,24 +25,13 @@ export default function TaskStatus({ taskId }: Props) {
       loadingShownRef.current = true;
     }, 800);
 
-    const tick = async () => {
-      try {
-        const next = await taskStatus(taskId);
-        if (!cancelled) {
-          setS(next);
-          if (!next.ready) {
-            pollTimerRef.current = window.setTimeout(tick, POLL_MS);
-          }
-        }
-      } catch {
-        pollTimerRef.current = window.setTimeout(tick, POLL_MS);
-      }
-    };
+    // Pushed over SSE, polled as a fallback
+    watchTask(taskId, setS, controller.signal).catch(() => {
+      // aborted on unmount
+    });
 
-    tick();
     return () => {
-      cancelled = true;
-      if (pollTimerRef.current) window.clearTimeout(pollTimerRef.current);
+      controller.abort();
       if (loadingTimerRef.current) window.clearTimeout(loadingTimerRef.current);
     };
   }, [taskId]);
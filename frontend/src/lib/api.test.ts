@@ -1,6 +1,16 @@
 // src/lib/api.test.ts
 import { describe, it, expect, vi, beforeEach } from 'vitest';
-import { ApiError, uploadFile, mapColumns, taskStatus, salarySummary, stackCompare } from './api';
+import {
+  ApiError,
+  uploadFile,
+  previewFile,
+  mapColumns,
+  taskStatus,
+  salarySummary,
+  stackCompare,
+  dashboardAnalytics,
+  watchTask,
+} from './api';
 import type { ColumnMap } from './api';
 
 // Small helper to generate a JSON Response with proper headers
@@ -63,6 +73,30 @@ describe('uploadFile', () => {
   });
 });
 
+/* ============================================================================
+ * previewFile
+ * ========================================================================== */
+
+describe('previewFile', () => {
+  it('normalizes the preview payload', async () => {
+    const spy = vi.spyOn(global, 'fetch').mockResolvedValueOnce(
+      jsonResponse({
+        file_id: 'f.csv',
+        columns: ['job_title', 'compensation'],
+        dtypes: { job_title: 'string', compensation: 'integer' },
+        rows: [{ job_title: 'Dev', compensation: 10 }],
+      })
+    );
+
+    const res = await previewFile('f.csv', 1);
+    expect(String(spy.mock.calls[0][0])).toContain('ingest/preview/f.csv?rows=1');
+    expect(res.fileId).toBe('f.csv');
+    expect(res.columns).toEqual(['job_title', 'compensation']);
+    expect(res.dtypes.compensation).toBe('integer');
+    expect(res.rows).toHaveLength(1);
+  });
+});
+
 /* ============================================================================
  * mapColumns
  * ========================================================================== */
@@ -111,6 +145,69 @@ describe('taskStatus', () => {
   });
 });
 
+/* ============================================================================
+ * watchTask (SSE, polling fallback)
+ * ========================================================================== */
+
+// Minimal EventSource: tests push events through the last created instance
+class FakeEventSource {
+  static last: FakeEventSource;
+  readonly url: string;
+  onerror: (() => void) | null = null;
+  closed = false;
+  private listeners: ((e: MessageEvent<string>) => void)[] = [];
+
+  constructor(url: string) {
+    this.url = url;
+    FakeEventSource.last = this;
+  }
+
+  addEventListener(_type: string, fn: (e: MessageEvent<string>) => void) {
+    this.listeners.push(fn);
+  }
+
+  emit(data: unknown) {
+    this.listeners.forEach((fn) => fn(new MessageEvent('status', { data: JSON.stringify(data) })));
+  }
+
+  close() {
+    this.closed = true;
+  }
+}
+
+describe('watchTask', () => {
+  it('follows pushed events until the task is ready', async () => {
+    vi.stubGlobal('EventSource', FakeEventSource);
+    const seen: string[] = [];
+
+    const done = watchTask('t-1', (s) => seen.push(s.state));
+    const source = FakeEventSource.last;
+    source.emit({ id: 't-1', state: 'PROGRESS', meta: { percent: 50 }, ready: false });
+    source.emit({ id: 't-1', state: 'SUCCESS', ready: true, successful: true });
+
+    const last = await done;
+    expect(source.url).toContain('ingest/tasks/t-1/events');
+    expect(seen).toEqual(['PROGRESS', 'SUCCESS']);
+    expect(last.successful).toBe(true);
+    expect(source.closed).toBe(true);
+    vi.unstubAllGlobals();
+  });
+
+  it('falls back to polling when the stream fails', async () => {
+    vi.stubGlobal('EventSource', FakeEventSource);
+    const fetchSpy = vi
+      .spyOn(global, 'fetch')
+      .mockResolvedValueOnce(jsonResponse({ id: 't-1', state: 'SUCCESS', ready: true }));
+
+    const done = watchTask('t-1', () => {});
+    FakeEventSource.last.onerror?.();
+
+    expect((await done).state).toBe('SUCCESS');
+    expect(String(fetchSpy.mock.calls[0][0])).toContain('ingest/tasks/t-1');
+    vi.unstubAllGlobals();
+  });
+});
+
 /* ============================================================================
  * salarySummary (accepts {data:{...}} or flat; median/count fallbacks)
  * ========================================================================== */
@@ -181,3 +278,27 @@ describe('stackCompare', () => {
     expect(rows).toEqual([]);
   });
 });
+
+/* ============================================================================
+ * dashboardAnalytics (one POST to /analytics/batch)
+ * ========================================================================== */
+
+describe('dashboardAnalytics', () => {
+  it('sends both specs in one request and splits the results', async () => {
+    const fetchSpy = vi.spyOn(global, 'fetch').mockResolvedValueOnce(
+      jsonResponse({
+        results: [
+          { id: 'summary', rows: [{ p50: 42, p75: 60, p90: 80, n: 7 }] },
+          { id: 'stacks', rows: [{ stack: 'python', p50: 60, n: 4 }] },
+        ],
+      })
+    );
+
+    const res = await dashboardAnalytics();
+
+    expect(fetchSpy).toHaveBeenCalledTimes(1);
+    expect(String(fetchSpy.mock.calls[0][0])).toContain('analytics/batch');
+    expect(res.summary).toEqual({ p50: 42, p75: 60, p90: 80, n: 7 });
+    expect(res.stacks).toEqual([{ stack: 'python', p50: 60, n: 4 }]);
+  });
+});
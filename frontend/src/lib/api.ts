@@ -1,4 +1,5 @@
 import { API_BASE, joinUrl } from './env';
+import { poll } from './poll';
 
 /* ========= Public types (camelCase) ========= */
 
@@ -8,6 +9,13 @@ export type ColumnMap = Record<ColumnKey, string>;
 export type UploadResponse = { fileId: string };
 export type MapResponse = { taskId: string };
 
+export type FilePreview = {
+  fileId: string;
+  columns: string[];
+  dtypes: Record<string, string>;
+  rows: Record<string, unknown>[];
+};
+
 export type CeleryState = 'PENDING' | 'STARTED' | 'PROGRESS' | 'RETRY' | 'FAILURE' | 'SUCCESS';
 
 export type TaskStatusResp = {
@@ -180,6 +188,25 @@ export async function uploadFile(file: File, signal?: AbortSignal): Promise<Uplo
   return normalizeUpload(raw);
 }
 
+/** GET /api/jobs/ingest/preview/{file_id} -> header, inferred dtypes and first rows */
+export async function previewFile(
+  fileId: string,
+  rows = 5,
+  signal?: AbortSignal
+): Promise<FilePreview> {
+  const raw = await requestJson<Record<string, unknown>>(
+    `${INGEST}/preview/${encodeURIComponent(fileId)}?rows=${rows}`,
+    { method: 'GET', signal }
+  );
+  const n = normalizeKeys(raw) as Partial<FilePreview>;
+  return {
+    fileId: n.fileId ?? fileId,
+    columns: Array.isArray(n.columns) ? n.columns.map(String) : [],
+    dtypes: n.dtypes ?? {},
+    rows: Array.isArray(n.rows) ? n.rows : [],
+  };
+}
+
 /** POST /api/jobs/ingest/map -> { task_id } */
 export async function mapColumns(
   fileId: string,
@@ -206,6 +233,70 @@ export async function taskStatus(taskId: string, signal?: AbortSignal): Promise<
   return normalizeTaskStatus(raw);
 }
 
+/** GET /api/jobs/ingest/tasks/{task_id}/events -> Server-Sent Events of TaskStatusResp */
+export function taskEventsUrl(taskId: string): string {
+  return `${API_BASE}/${joinUrl(INGEST, 'tasks', encodeURIComponent(taskId), 'events')}`;
+}
+
+/**
+ * Follow a task until it's ready, calling onStatus on every update.
+ * Updates are pushed over one SSE connection; when EventSource isn't available
+ * or the stream fails, taskStatus is polled instead. Resolves with the final status.
+ */
+export function watchTask(
+  taskId: string,
+  onStatus: (s: TaskStatusResp) => void,
+  signal?: AbortSignal
+): Promise<TaskStatusResp> {
+  let last: TaskStatusResp = { id: taskId, state: 'PENDING', ready: false, successful: false };
+
+  const fallback = () =>
+    poll({
+      // transient errors keep the last known status and retry on the next tick
+      fn: () =>
+        taskStatus(taskId, signal).catch((err: unknown) => {
+          if (signal?.aborted) throw err;
+          return last;
+        }),
+      shouldStop: (s) => {
+        last = s;
+        onStatus(s);
+        return s.ready;
+      },
+      maxMs: 0,
+      signal,
+    });
+
+  if (typeof EventSource === 'undefined') return fallback();
+
+  return new Promise<TaskStatusResp>((resolve, reject) => {
+    const source = new EventSource(taskEventsUrl(taskId));
+    const close = () => {
+      source.close();
+      signal?.removeEventListener('abort', onAbort);
+    };
+    const onAbort = () => {
+      close();
+      reject(new DOMException('Aborted', 'AbortError'));
+    };
+    signal?.addEventListener('abort', onAbort, { once: true });
+
+    source.addEventListener('status', (e) => {
+      last = normalizeTaskStatus(JSON.parse((e as MessageEvent<string>).data) as RawTaskStatus);
+      onStatus(last);
+      if (last.ready) {
+        close();
+        resolve(last);
+      }
+    });
+    // Closed stream or no Redis on the server: poll instead
+    source.onerror = () => {
+      close();
+      fallback().then(resolve, reject);
+    };
+  });
+}
+
 /** GET /api/jobs/analytics/salary/summary -> SalarySummary */
 type RawSalarySummary = {
   data?: {
@@ -229,7 +320,10 @@ export async function salarySummary(signal?: AbortSignal): Promise<SalarySummary
     method: 'GET',
     signal,
   });
+  return normalizeSummary(raw);
+}
 
+function normalizeSummary(raw: RawSalarySummary | undefined): SalarySummary {
   const container: { [k: string]: unknown } =
     (raw?.data as Record<string, unknown> | undefined) ?? (raw as Record<string, unknown>) ?? {};
 
@@ -259,7 +353,10 @@ export async function stackCompare(signal?: AbortSignal): Promise<StackCompareRo
     method: 'GET',
     signal,
   });
+  return normalizeStackRows(raw);
+}
 
+function normalizeStackRows(raw: RawStackCompare): StackCompareRow[] {
   // Accept either { data: [...] } or [...]
   const container = raw as { data?: unknown } | unknown;
   const maybeArr = (container as { data?: unknown })?.data ?? container;
@@ -288,3 +385,31 @@ export async function stackCompare(signal?: AbortSignal): Promise<StackCompareRo
     return { stack: String(stack), p50: Number(p50), n: Number(n) };
   });
 }
+
+/** POST /api/jobs/analytics/batch -> summary + stack comparison in one round trip */
+type RawBatch = { results?: { id?: unknown; rows?: unknown }[] };
+
+export async function dashboardAnalytics(
+  signal?: AbortSignal
+): Promise<{ summary: SalarySummary; stacks: StackCompareRow[] }> {
+  const body = JSON.stringify({
+    queries: [
+      { id: 'summary', percentiles: [0.5, 0.75, 0.9] },
+      { id: 'stacks', group_by: 'stack', percentiles: [0.5] },
+    ],
+  });
+  const raw = await requestJson<RawBatch>(`${ANALYTICS}/batch`, {
+    method: 'POST',
+    body,
+    headers: { 'Content-Type': 'application/json' },
+    signal,
+  });
+
+  const rows = (id: string) => raw?.results?.find((r) => r.id === id)?.rows;
+  const summaryRows = rows('summary');
+  const first = Array.isArray(summaryRows) ? summaryRows[0] : undefined;
+  return {
+    summary: normalizeSummary(first as RawSalarySummary | undefined),
+    stacks: normalizeStackRows(rows('stacks')),
+  };
+}
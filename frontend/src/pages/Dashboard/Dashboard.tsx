@@ -1,12 +1,7 @@
 import { useEffect, useState, useMemo } from 'react';
 import styles from './Dashboard.module.scss';
 import Metric from '../../components/Metric/Metric';
-import {
-  salarySummary,
-  stackCompare,
-  type SalarySummary,
-  type StackCompareRow,
-} from '../../lib/api';
+import { dashboardAnalytics, type SalarySummary, type StackCompareRow } from '../../lib/api';
 import { fmtInt, fmtNumber } from '../../lib/format';
 
 const PAGE_SIZES = [10, 25, 50, 100];
@@ -26,8 +21,9 @@ function Dashboard() {
     setLoading(true);
     setError(null);
 
-    Promise.all([salarySummary(ctrl.signal), stackCompare(ctrl.signal)])
-      .then(([s, rows]) => {
+    // Summary and stack comparison in a single batch request
+    dashboardAnalytics(ctrl.signal)
+      .then(({ summary: s, stacks: rows }) => {
         setSummary(s);
         setStacks(Array.isArray(rows) ? rows : []);
       })